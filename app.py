@@ -1,58 +1,115 @@
 from flask import Flask
 from dotenv import load_dotenv
 import os
-from flasgger import Swagger
-from flask_jwt_extended import JWTManager
 from datetime import timedelta
 
 
-# Load .env file
+# Load .env file (once; db.py and the blueprints read os.environ lazily)
 load_dotenv()
 PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
 BASE_URL = os.getenv("BASE_URL", "http://localhost:5000")
 
-# Initialize Flask app
-app = Flask(__name__)
-
-# Set JWT secret
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'dev-secret')
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=7)
-
-
-# === Debug Print for Environment Variables ===
-db_url = os.getenv("DATABASE_URL")
-jwt_key = os.getenv("JWT_SECRET_KEY")
-cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
-cloud_api_key = os.getenv("CLOUDINARY_API_KEY")
-cloud_api_secret = os.getenv("CLOUDINARY_API_SECRET")
 
 def mask(value):
     """Mask sensitive values for safe logging."""
     return value[:5] + "..." + value[-5:] if value and len(value) > 10 else value or "None"
 
-print("\n=== Environment Variables Check ===")
-print("DATABASE_URL:", mask(db_url))
-print("JWT_SECRET_KEY:", mask(jwt_key))
-print("CLOUDINARY_CLOUD_NAME:", mask(cloud_name))
-print("CLOUDINARY_API_KEY:", mask(cloud_api_key))
-print("CLOUDINARY_API_SECRET:", mask(cloud_api_secret))
-print("PAYSTACK_SECRET_KEY:", mask(PAYSTACK_SECRET_KEY))
-print("-------------------\n")
-
-# JWT setup
-jwt = JWTManager(app)
-
-# Import blueprints
-from routes.auth import auth_bp
-from routes.workouts import workouts_bp
-from routes.public_api import public_bp
-from routes.reminders import reminders_bp
-
-# Register blueprints
-app.register_blueprint(auth_bp, url_prefix='/auth')
-app.register_blueprint(workouts_bp, url_prefix='/users')
-app.register_blueprint(public_bp, url_prefix='/public')
-app.register_blueprint(reminders_bp, url_prefix='/api')
+
+# === Debug Print for Environment Variables (ENV_DIAGNOSTICS=1) ===
+def print_env_diagnostics():
+    print("\n=== Environment Variables Check ===")
+    for name in (
+        "DATABASE_URL",
+        "JWT_SECRET_KEY",
+        "CLOUDINARY_CLOUD_NAME",
+        "CLOUDINARY_API_KEY",
+        "CLOUDINARY_API_SECRET",
+        "PAYSTACK_SECRET_KEY",
+    ):
+        print(f"{name}:", mask(os.getenv(name)))
+    print("-------------------\n")
+
+
+def create_app(config=None):
+    """Build the app. Cloudinary and the DB pool are set up on first use,
+    Swagger only when SWAGGER_ENABLED=1."""
+    if os.getenv("ENV_DIAGNOSTICS", "").lower() in ("1", "true", "yes"):
+        print_env_diagnostics()
+
+    # Initialize Flask app
+    app = Flask(__name__)
+
+    # Set JWT secret
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'dev-secret')
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=7)
+    if config:
+        app.config.update(config)
+
+    # Behind TRUSTED_PROXIES reverse proxies (count), take the client's IP,
+    # scheme and host from their X-Forwarded-* headers; rate limits key on it
+    app.config.setdefault("TRUSTED_PROXIES", int(os.getenv("TRUSTED_PROXIES", "0")))
+    trusted = app.config["TRUSTED_PROXIES"]
+    if trusted:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted, x_proto=trusted, x_host=trusted)
+
+    # JWT setup
+    from flask_jwt_extended import JWTManager
+    JWTManager(app)
+
+    # Typed errors -> JSON, 503 + Retry-After when the DB is saturated,
+    # generic 500s, per-class error counters
+    from utils import errors
+    errors.init_app(app)
+
+    # gzip/brotli response compression
+    from utils import compression
+    compression.init_app(app)
+
+    # Keep a user's reads on the primary right after they write
+    import db
+    db.init_app(app)
+
+    # Per-endpoint token-bucket rate limits (RATE_LIMITS config)
+    from utils import rate_limit
+    rate_limit.init_app(app)
+
+    # /media for MEDIA_STORAGE=local
+    from utils import media
+    media.init_app(app)
+
+    # SQL tracing / query budgets (dev & test only, QUERY_TRACE=1)
+    from utils import query_tracer
+    if query_tracer.QUERY_TRACE:
+        query_tracer.init_app(app)
+
+    # API docs are opt-in: flasgger is heavy to import
+    if os.getenv("SWAGGER_ENABLED", "").lower() in ("1", "true", "yes"):
+        from flasgger import Swagger
+        Swagger(app)
+
+    # Import blueprints
+    from routes.auth import auth_bp
+    from routes.workouts import workouts_bp
+    from routes.public_api import public_bp
+    from routes.reminders import reminders_bp
+    from routes.home import home_bp
+    from routes.uploads import uploads_bp
+    from routes.gestures import gestures_bp
+
+    # Register blueprints
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(workouts_bp, url_prefix='/users')
+    app.register_blueprint(public_bp, url_prefix='/public')
+    app.register_blueprint(reminders_bp, url_prefix='/api')
+    app.register_blueprint(home_bp, url_prefix='/users')
+    app.register_blueprint(uploads_bp, url_prefix='/users')
+    app.register_blueprint(gestures_bp, url_prefix='/users')
+
+    return app
+
+
+app = create_app()
 
 # Run app
 if __name__ == '__main__':
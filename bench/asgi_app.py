@@ -0,0 +1,15 @@
+"""The app behind an ASGI adapter, for bench.async_vs_sync only.
+
+    gunicorn bench.asgi_app:application -k uvicorn.workers.UvicornWorker -w 2
+
+The event loop owns the client sockets and the (sync) blueprints run
+unchanged in ASGI_WSGI_THREADS threads per worker. Not a supported serving
+mode: bench/async_vs_sync.json has the numbers that kept gthread workers.
+"""
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import app
+
+application = WSGIMiddleware(app, workers=int(os.getenv("ASGI_WSGI_THREADS", "32")))
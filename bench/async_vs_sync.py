@@ -0,0 +1,274 @@
+"""Compare sync gunicorn workers with the ASGI serving mode on I/O-bound traffic.
+
+    python -m bench.seed --users 200
+    python -m bench.async_vs_sync --db-delay-ms 5 --json bench/async_vs_sync.json
+    python -m bench.async_vs_sync --db-delay-ms 20 --json bench/async_vs_sync.json
+
+Both modes run the same app behind gunicorn with --workers processes:
+"sync" with gthread workers (--threads each), "async" with uvicorn workers
+and bench/asgi_app.py (--asgi-threads each; needs uvicorn and a2wsgi). Postgres is reached through a
+bench.latency_proxy adding --db-delay-ms each way, so handlers spend their
+time waiting on the network as they do in production; images go to
+MEDIA_STORAGE=local.
+
+For each mode --idle keep-alive connections are opened and parked (one
+request each, then silence, like backgrounded mobile clients) and kept open
+while --concurrency clients run the mix below. Every virtual user logs in
+before the clock starts, so the mix is the app's own I/O-bound calls, not
+password hashing. Both modes keep idle connections for --keep-alive
+seconds. Reports the idle connections each mode still held after the run,
+per-call latency, errors and throughput. --json merges the run into the
+file under its --db-delay-ms.
+
+The committed bench/async_vs_sync.json (one CPU, defaults, 5 and 20 ms):
+gthread workers held the same 1000 idle connections as the ASGI mode, with
+20-30% more throughput and a lower median at both latencies (the ASGI p95
+was lower only at 5 ms), so the ASGI mode was not kept.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from dotenv import load_dotenv
+from psycopg.conninfo import make_conninfo
+
+from bench.run import ROOT, GunicornTarget, HttpTarget, percentile, wait_for_port
+from bench.seed import BENCH_PASSWORD, EQUIPMENT, bench_username
+from bench.write_latency import upstream_address
+
+MODES = {
+    "sync": ("app:app", ["-k", "gthread"]),
+    "async": ("bench.asgi_app:application", ["-k", "uvicorn.workers.UvicornWorker"]),
+}
+
+# (name, weight): launch, library screen, new workout with a photo
+MIX = [
+    ("home", 35),
+    ("list_workouts", 50),
+    ("create_with_image", 15),
+]
+
+# Smallest valid JPEG header + padding: enough for the upload path
+IMAGE = b"\xff\xd8\xff\xe0" + b"\x00" * 20 * 1024 + b"\xff\xd9"
+
+
+class Client(HttpTarget):
+    def multipart(self, path, token, fields, file_field, filename, data):
+        boundary = uuid.uuid4().hex
+        parts = [
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+            for k, v in fields.items()
+        ]
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f"Content-Type: image/jpeg\r\n\r\n".encode() + data + b"\r\n"
+        )
+        body = b"".join(parts) + f"--{boundary}--\r\n".encode()
+        conn = self._conn()
+        try:
+            conn.request("POST", path, body=body, headers={
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+                "Authorization": f"Bearer {token}",
+            })
+            resp = conn.getresponse()
+            resp.read()
+        except OSError:
+            conn.close()
+            self._local.conn = None
+            raise
+        return resp.status
+
+
+def start_proxy(dsn, delay_ms, port):
+    proc = subprocess.Popen([
+        sys.executable, "-m", "bench.latency_proxy", "--upstream", upstream_address(dsn),
+        "--delay-ms", str(delay_ms), "--port", str(port),
+    ], cwd=ROOT)
+    wait_for_port("127.0.0.1", port)
+    return proc
+
+
+def park_idle_connections(port, count, timeout=5):
+    parked = []
+    request = b"GET /auth/me HTTP/1.1\r\nHost: localhost\r\nConnection: keep-alive\r\n\r\n"
+    for _ in range(count):
+        try:
+            s = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+            s.sendall(request)
+            if not s.recv(65536):
+                s.close()
+                break
+            parked.append(s)
+        except OSError:
+            break
+    return parked
+
+
+def still_open(parked):
+    alive = 0
+    for s in parked:
+        s.setblocking(False)
+        try:
+            alive += s.recv(1) != b""  # b"" = closed by the server
+        except BlockingIOError:
+            alive += 1
+        except OSError:
+            pass
+    return alive
+
+
+def login(client, user_no):
+    status, data = client.request("POST", "/auth/login",
+                                  body={"username": bench_username(user_no), "password": BENCH_PASSWORD})
+    if status != 200:
+        raise SystemExit(f"login failed ({status}); seed the database with bench.seed first")
+    return data["token"]
+
+
+def run_mix(client, tokens, total_requests, concurrency, rnd_seed):
+    names = [n for n, _ in MIX]
+    weights = [w for _, w in MIX]
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def worker(thread_no):
+        rnd = random.Random(rnd_seed + thread_no)
+        local, local_err = defaultdict(list), defaultdict(int)
+        for _ in range(total_requests // concurrency):
+            token = rnd.choice(tokens)
+            action = rnd.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                if action == "home":
+                    status, _ = client.request("GET", "/users/home", token)
+                elif action == "list_workouts":
+                    status, _ = client.request("GET", "/users/workouts", token)
+                else:
+                    status = client.multipart("/users/workouts", token, {
+                        "name": f"bench {rnd.randint(1, 10 ** 6)}",
+                        "equipment": ",".join(rnd.sample(EQUIPMENT, 2)),
+                    }, "file", "photo.jpg", IMAGE)
+            except OSError:
+                local_err[action] += 1
+                continue
+            local[action].append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                local_err[action] += 1
+        with lock:
+            for k, v in local.items():
+                samples[k].extend(v)
+            for k, v in local_err.items():
+                errors[k] += v
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    report = {}
+    for name in sorted(samples):
+        values = sorted(samples[name])
+        report[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+    total = sum(len(v) for v in samples.values())
+    return {"wall_s": round(wall, 2), "total_rps": round(total / wall, 1), "endpoints": report}
+
+
+def run_mode(mode, args):
+    app_module, extra = MODES[mode]
+    threads = args.threads if mode == "sync" else 1
+    # One pool connection per request that can run at once in a worker
+    os.environ["DB_POOL_MAX"] = str(args.threads if mode == "sync" else args.asgi_threads)
+    os.environ["ASGI_WSGI_THREADS"] = str(args.asgi_threads)
+    target = GunicornTarget(args.port, args.workers, threads, app_module,
+                            [*extra, "--keep-alive", str(args.keep_alive), "--graceful-timeout", "5"])
+    parked = []
+    try:
+        client = Client("127.0.0.1", args.port)
+        rnd = random.Random(args.seed)
+        tokens = [login(client, rnd.randint(1, args.users)) for _ in range(args.logins)]
+        parked = park_idle_connections(args.port, args.idle)
+        time.sleep(0.5)
+        result = run_mix(client, tokens, args.requests, args.concurrency, args.seed)
+        result["idle_connections"] = {"opened": len(parked), "open_after_run": still_open(parked)}
+        return result
+    finally:
+        for s in parked:
+            s.close()
+        target.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-delay-ms", type=float, default=5, help="added each way to every DB packet")
+    parser.add_argument("--idle", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=50, help="virtual users (one login each)")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="gthread threads per worker (sync)")
+    parser.add_argument("--asgi-threads", type=int, default=32, help="ASGI_WSGI_THREADS per worker (async)")
+    parser.add_argument("--keep-alive", type=int, default=120,
+                        help="seconds an idle keep-alive connection is kept (both modes)")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--proxy-port", type=int, default=6544)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the results (and options) to this file")
+    args = parser.parse_args()
+
+    dsn = os.getenv("DATABASE_URL")
+    if not dsn:
+        raise SystemExit("DATABASE_URL environment variable is not set")
+    proxy = start_proxy(dsn, args.db_delay_ms, args.proxy_port)
+    os.environ["DATABASE_URL"] = make_conninfo(dsn, host="127.0.0.1", port=args.proxy_port)
+    os.environ["RATE_LIMIT_ENABLED"] = "0"
+    os.environ["MEDIA_STORAGE"] = "local"
+    try:
+        results = {mode: run_mode(mode, args) for mode in MODES}
+    finally:
+        proxy.terminate()
+        proxy.wait(timeout=10)
+
+    print("\nidle connections open after the run: " + ", ".join(
+        f"{m}={r['idle_connections']['open_after_run']}/{args.idle}" for m, r in results.items()))
+    print(f"{'call':<20}{'sync p50':>10}{'sync p95':>10}{'sync err':>10}"
+          f"{'async p50':>11}{'async p95':>11}{'async err':>11}")
+    names = sorted(set(results["sync"]["endpoints"]) | set(results["async"]["endpoints"]))
+    for name in names:
+        s = results["sync"]["endpoints"].get(name, {})
+        a = results["async"]["endpoints"].get(name, {})
+        print(f"{name:<20}{s.get('p50_ms', 0):>10.1f}{s.get('p95_ms', 0):>10.1f}{s.get('errors', 0):>10}"
+              f"{a.get('p50_ms', 0):>11.1f}{a.get('p95_ms', 0):>11.1f}{a.get('errors', 0):>11}")
+    print(f"\ntotal req/s: sync={results['sync']['total_rps']} async={results['async']['total_rps']}")
+
+    if args.json:
+        saved = {}
+        if os.path.exists(args.json):
+            with open(args.json) as f:
+                saved = json.load(f)
+        saved[f"db_delay_{args.db_delay_ms:g}ms"] = {"options": vars(args), "results": results}
+        with open(args.json, "w") as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Cold-open latency: four launch calls vs the single /users/home call.
+
+    python -m bench.seed --users 200
+    RATE_LIMIT_ENABLED=0 python -m bench.home --iterations 200
+    python -m bench.home --target gunicorn --iterations 200
+
+"separate" issues /auth/me, /users/workouts, /api/reminders and
+/public/workouts back to back, as the app did on launch; "home" issues
+/users/home once. Run against a database with real network latency (or a
+replica) to see the round-trip saving; on a local socket the difference is
+mostly per-request overhead.
+"""
+import argparse
+import random
+import time
+
+from dotenv import load_dotenv
+
+from bench.run import ClientTarget, GunicornTarget, percentile
+from bench.seed import BENCH_PASSWORD, bench_username
+
+LAUNCH_CALLS = ["/auth/me", "/users/workouts", "/api/reminders", "/public/workouts"]
+
+
+def login(target, user_no):
+    status, data = target.request("POST", "/auth/login",
+                                  body={"username": bench_username(user_no), "password": BENCH_PASSWORD})
+    if status != 200:
+        raise SystemExit(f"login failed ({status}); seed the database with bench.seed first")
+    return data["token"]
+
+
+def timed(target, token, paths):
+    start = time.perf_counter()
+    for path in paths:
+        status, _ = target.request("GET", path, token)
+        if status != 200:
+            raise RuntimeError(f"{path} returned {status}")
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="client", help="client | gunicorn")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--port", type=int, default=5056)
+    args = parser.parse_args()
+
+    target = ClientTarget() if args.target == "client" else GunicornTarget(args.port, 1, 4)
+    try:
+        rnd = random.Random(42)
+        tokens = [login(target, rnd.randint(1, args.users)) for _ in range(8)]
+        # Warm up (catalog index build, prepared statements)
+        timed(target, tokens[0], LAUNCH_CALLS + ["/users/home"])
+
+        samples = {"separate": [], "home": []}
+        for i in range(args.iterations):
+            token = tokens[i % len(tokens)]
+            samples["separate"].append(timed(target, token, LAUNCH_CALLS))
+            samples["home"].append(timed(target, token, ["/users/home"]))
+    finally:
+        target.close()
+
+    print(f"\n{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for mode, values in samples.items():
+        values.sort()
+        print(f"{mode:<10}{percentile(values, 50):>10.2f}{percentile(values, 95):>10.2f}"
+              f"{percentile(values, 99):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
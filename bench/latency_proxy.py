@@ -0,0 +1,94 @@
+"""TCP proxy that adds a fixed delay in each direction, to simulate the
+network between the app and Postgres on a single machine.
+
+    python -m bench.latency_proxy --upstream /tmp/.s.PGSQL.5432 --delay-ms 5 --port 6543
+    DATABASE_URL=postgresql://user@127.0.0.1:6543/app python -m bench.run
+
+--upstream is host:port or a Unix socket path. Every chunk is delivered
+--delay-ms after it was read, in order, so one request/response round trip
+costs 2 x delay on top of the real work.
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+
+class LatencyProxy:
+    def __init__(self, upstream, delay_ms, host="127.0.0.1", port=0):
+        self.upstream = upstream
+        self.delay = delay_ms / 1000
+        self.host, self.port = host, port
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+
+    def _open_upstream(self):
+        if self.upstream.startswith("/"):
+            return asyncio.open_unix_connection(self.upstream)
+        host, _, port = self.upstream.rpartition(":")
+        return asyncio.open_connection(host, int(port))
+
+    async def _pipe(self, reader, writer):
+        queue = asyncio.Queue()
+
+        async def deliver():
+            while True:
+                due, data = await queue.get()
+                if data is None:
+                    break
+                wait = due - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                writer.write(data)
+                await writer.drain()
+            writer.close()
+
+        sender = asyncio.ensure_future(deliver())
+        try:
+            while data := await reader.read(65536):
+                queue.put_nowait((time.monotonic() + self.delay, data))
+        except ConnectionError:
+            pass
+        queue.put_nowait((0, None))
+        await sender
+
+    async def _handle(self, client_reader, client_writer):
+        try:
+            up_reader, up_writer = await self._open_upstream()
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(
+            self._pipe(client_reader, up_writer),
+            self._pipe(up_reader, client_writer),
+            return_exceptions=True,
+        )
+
+    async def _serve(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def start(self):
+        """Serve from a daemon thread; returns the listening port."""
+        threading.Thread(target=self._loop.run_until_complete, args=(self._serve(),), daemon=True).start()
+        self._ready.wait()
+        return self.port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--upstream", required=True, help="host:port or Unix socket path")
+    parser.add_argument("--delay-ms", type=float, default=5)
+    parser.add_argument("--port", type=int, default=6543)
+    args = parser.parse_args()
+
+    port = LatencyProxy(args.upstream, args.delay_ms, port=args.port).start()
+    print(f"proxying 127.0.0.1:{port} -> {args.upstream} (+{args.delay_ms} ms each way)")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
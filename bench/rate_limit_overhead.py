@@ -0,0 +1,81 @@
+"""Measure the per-request cost of rate limiting.
+
+    python -m bench.rate_limit_overhead [--requests 5000] [--postgres]
+
+1. Raw bucket check latency for each store.
+2. End-to-end: /auth/me (no DB work) through the test client with and
+   without a limit configured on it; the p50 difference is the overhead.
+
+Exits non-zero if the end-to-end overhead reaches 1 ms.
+"""
+import argparse
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from bench.run import percentile
+
+BUDGET_MS = 1.0
+
+
+def time_calls(fn, n):
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)
+
+
+def bench_stores(names, n):
+    from utils.rate_limit import make_store
+
+    print(f"\n{'store':<10}{'p50 us':>10}{'p99 us':>10}")
+    for name in names:
+        store = make_store(name)
+        samples = time_calls(lambda i: store.take(f"bench:{i % 100}", 10**9, 10**6), n)
+        print(f"{name:<10}{percentile(samples, 50) * 1000:>10.1f}{percentile(samples, 99) * 1000:>10.1f}")
+
+
+def bench_requests(store_name, n):
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+
+    results = {}
+    for label, limits in (("unlimited", {}), ("limited", {"auth.me": "1000000000/second"})):
+        app = create_app({"RATE_LIMITS": limits, "RATE_LIMIT_STORE": store_name})
+        with app.app_context():
+            token = create_access_token(identity="1", additional_claims={"username": "bench"})
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        for _ in range(200):  # warm up
+            client.get("/auth/me", headers=headers)
+        results[label] = time_calls(lambda i: client.get("/auth/me", headers=headers), n)
+
+    base = percentile(results["unlimited"], 50)
+    limited = percentile(results["limited"], 50)
+    print(f"\n/auth/me p50: unlimited {base:.3f} ms, limited ({store_name}) {limited:.3f} ms")
+    overhead = limited - base
+    print(f"overhead: {overhead * 1000:.0f} us (budget {BUDGET_MS * 1000:.0f} us)")
+    return overhead
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--store", default="sqlite", help="store used for the end-to-end run")
+    parser.add_argument("--postgres", action="store_true", help="also benchmark the postgres store")
+    args = parser.parse_args()
+
+    bench_stores(["memory", "sqlite"] + (["postgres"] if args.postgres else []), args.requests)
+    overhead = bench_requests(args.store, args.requests)
+    if overhead >= BUDGET_MS:
+        print("✗ Rate limiting overhead over budget")
+        sys.exit(1)
+    print("✓ Within budget")
+
+
+if __name__ == "__main__":
+    main()
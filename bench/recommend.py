@@ -0,0 +1,73 @@
+"""Benchmark the recommendation index on synthetic catalogs.
+
+    python -m bench.recommend --sizes 1000,10000,100000,1000000
+
+No database needed: catalogs are generated in memory with the same shape as
+public_workouts. Reports index build time, memory held by the arrays, and
+p50/p99 ranking latency for random users.
+"""
+import argparse
+import random
+import time
+
+from bench.run import percentile
+from utils.recommend import CatalogIndex
+
+EQUIPMENT = ["Dumbbell", "Barbell", "Kettlebell", "Mat", "Resistance Band", "Pull-up Bar",
+             "Jump Rope", "Bench", "Weight Plates", "Foam Roller", "None"]
+MUSCLES = ["Chest", "Back", "Legs", "Glutes", "Shoulders", "Arms", "Core", "Hamstrings",
+           "Calves", "Traps", "Full Body"]
+TYPES = ["Strength", "Cardio", "Yoga", "HIIT", "Mobility"]
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+
+
+def synthetic_catalog(n, rnd):
+    return [
+        (i + 1,
+         rnd.sample(EQUIPMENT, rnd.randint(1, 3)),
+         rnd.sample(MUSCLES, rnd.randint(1, 3)),
+         rnd.choice(TYPES),
+         rnd.choice(LEVELS))
+        for i in range(n)
+    ]
+
+
+def index_bytes(index):
+    total = index.ids.nbytes + index.equipment_bits.nbytes + index.equipment_count.nbytes
+    total += index.level_ids.nbytes + index.type_ids.nbytes
+    total += sum(p.nbytes for p in index.muscle_postings.values())
+    total += sum(s.nbytes for s in index.base_scores.values())
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    print(f"{'catalog':>10}{'build s':>10}{'index MB':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        rows = synthetic_catalog(n, rnd)
+        start = time.perf_counter()
+        index = CatalogIndex.from_rows(rows)
+        build = time.perf_counter() - start
+
+        samples = []
+        for _ in range(args.queries):
+            available = rnd.sample(EQUIPMENT, rnd.randint(0, 5))
+            saved = [(rnd.randint(1, n), rnd.sample(MUSCLES, 2), rnd.choice(TYPES), rnd.choice(LEVELS))
+                     for _ in range(rnd.randint(0, 10))]
+            start = time.perf_counter()
+            index.recommend(available, saved, None, args.limit)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        print(f"{n:>10}{build:>10.2f}{index_bytes(index) / 2**20:>10.1f}"
+              f"{percentile(samples, 50):>10.2f}{percentile(samples, 99):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
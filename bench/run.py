@@ -0,0 +1,395 @@
+"""HTTP load benchmark for every endpoint.
+
+    python -m bench.seed --users 200
+    python -m bench.run --target client --requests 5000
+    python -m bench.run --target gunicorn --workers 4 --threads 4 --concurrency 32
+    python -m bench.run --target client --save-baseline
+    python -m bench.run --target client --compare
+
+Each virtual user logs in once and then issues a weighted mix of list, save,
+toggle and reminder calls, workout create/update/delete and subscription
+payments (plus occasional re-logins). Workouts are only deleted by the
+virtual user that created them in the run, so the seeded libraries keep
+their size. The report gives
+p50/p95/p99 latency and throughput per endpoint. --save-baseline stores the
+result in bench/baseline.json (keyed by target); --compare diffs a run against
+it and exits non-zero when any endpoint's p95 regresses past --tolerance.
+The committed baseline was recorded on a fresh ``bench.seed --users 200``
+with RATE_LIMIT_ENABLED=0 and the default options; re-record it on the
+machine you compare on, since absolute latencies don't travel.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+from bench.seed import BENCH_PASSWORD, EQUIPMENT, bench_email, bench_username
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "bench", "baseline.json")
+
+# (name, weight) — roughly what the mobile app does after launch
+MIX = [
+    ("login", 3),
+    ("me", 5),
+    ("list_workouts", 30),
+    ("public_workouts", 15),
+    ("save_public", 5),
+    ("toggle_item", 20),
+    ("list_reminders", 15),
+    ("create_reminder", 4),
+    ("update_reminder", 3),
+    ("create_workout", 3),
+    ("update_workout", 3),
+    ("delete_workout", 2),
+    ("payment", 1),
+]
+
+
+# ---------------- TARGETS ----------------
+class ClientTarget:
+    """In-process Flask test client: measures the app without a server."""
+
+    def __init__(self):
+        from app import app
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, token=None, body=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        resp = client.open(path, method=method, json=body, headers=headers)
+        return resp.status_code, resp.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class HttpTarget:
+    """Keep-alive HTTP/1.1 connections against a running server."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        return conn
+
+    def request(self, method, path, token=None, body=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = json.dumps(body) if body is not None else None
+        conn = self._conn()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            raise
+        data = resp.read()
+        try:
+            return resp.status, json.loads(data) if data else None
+        except ValueError:
+            return resp.status, None
+
+    def close(self):
+        pass
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not come up on {host}:{port}")
+
+
+class GunicornTarget(HttpTarget):
+    def __init__(self, port, workers, threads, app_module="app:app", extra_args=()):
+        super().__init__("127.0.0.1", port)
+        cmd = [
+            sys.executable, "-m", "gunicorn", app_module,
+            "-b", f"127.0.0.1:{port}",
+            "-w", str(workers), "--threads", str(threads),
+            "--log-level", "warning", *extra_args,
+        ]
+        self.proc = subprocess.Popen(cmd, cwd=ROOT)
+        wait_for_port("127.0.0.1", port)
+
+    def close(self):
+        self.proc.terminate()
+        self.proc.wait(timeout=30)
+
+
+# ---------------- WORKLOAD ----------------
+class VirtualUser:
+    def __init__(self, target, user_no, rnd):
+        self.target = target
+        self.user_no = user_no
+        self.username = bench_username(user_no)
+        self.rnd = rnd
+        self.token = None
+        self.checklist_ids = []
+        self.workout_ids = []
+        self.created_ids = []
+        self.reminder_ids = []
+        self.catalog_ids = []
+
+    def call(self, name, method, path, body=None, auth=True):
+        start = time.perf_counter()
+        status, data = self.target.request(method, path, self.token if auth else None, body)
+        return name, (time.perf_counter() - start) * 1000, status, data
+
+    def login(self):
+        result = self.call("login", "POST", "/auth/login",
+                           {"username": self.username, "password": BENCH_PASSWORD}, auth=False)
+        if result[2] == 200:
+            self.token = result[3]["token"]
+        return result
+
+    def step(self, action):
+        if action == "login" or self.token is None:
+            return self.login()
+        if action == "me":
+            return self.call("me", "GET", "/auth/me")
+        if action == "list_workouts":
+            result = self.call("list_workouts", "GET", "/users/workouts")
+            if result[2] == 200 and isinstance(result[3], list):
+                self.checklist_ids = [
+                    item["id"] for w in result[3] for item in w.get("checklist", [])
+                ]
+                self.workout_ids = [w["workout_id"] for w in result[3] if w.get("workout_id")]
+            return result
+        if action == "public_workouts":
+            result = self.call("public_workouts", "GET", "/public/workouts")
+            if result[2] == 200:
+                self.catalog_ids = [w[0] if isinstance(w, list) else w["id"]
+                                    for w in result[3].get("workouts", [])]
+            return result
+        if action == "save_public":
+            if not self.catalog_ids:
+                return self.step("public_workouts")
+            wid = self.rnd.choice(self.catalog_ids)
+            return self.call("save_public", "POST", f"/public/workouts/save/{wid}", {})
+        if action == "toggle_item":
+            if not self.checklist_ids:
+                return self.step("list_workouts")
+            item_id = self.rnd.choice(self.checklist_ids)
+            return self.call("toggle_item", "PATCH", f"/users/checklist/items/{item_id}")
+        if action == "list_reminders":
+            result = self.call("list_reminders", "GET", "/api/reminders")
+            if result[2] == 200:
+                self.reminder_ids = [r["id"] for r in result[3]["reminders"]]
+            return result
+        if action == "create_reminder":
+            return self.call("create_reminder", "POST", "/api/reminders",
+                             {"time": f"{self.rnd.randint(5, 21):02d}:00", "description": "bench"})
+        if action == "update_reminder":
+            if not self.reminder_ids:
+                return self.step("list_reminders")
+            rid = self.rnd.choice(self.reminder_ids)
+            return self.call("update_reminder", "PUT", f"/api/reminders/{rid}",
+                             {"description": "bench updated"})
+        if action == "create_workout":
+            result = self.call("create_workout", "POST", "/users/workouts", {
+                "name": f"bench {self.rnd.randint(1, 10 ** 6)}",
+                "equipment": self.rnd.sample(EQUIPMENT, self.rnd.randint(1, 3)),
+            })
+            if result[2] == 201:
+                self.created_ids.append(result[3]["workout_id"])
+            return result
+        if action == "update_workout":
+            if not self.workout_ids:
+                return self.step("list_workouts")
+            wid = self.rnd.choice(self.workout_ids)
+            return self.call("update_workout", "PUT", f"/users/workouts/{wid}",
+                             {"description": "bench updated"})
+        if action == "delete_workout":
+            if not self.created_ids:
+                return self.step("create_workout")
+            wid = self.created_ids.pop()
+            if wid in self.workout_ids:
+                self.workout_ids.remove(wid)
+            return self.call("delete_workout", "DELETE", f"/users/workouts/{wid}")
+        if action == "payment":
+            return self.call("payment", "POST", "/users/paystack/dummy-payment",
+                             {"email": bench_email(self.user_no)})
+        raise ValueError(action)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_load(target, users, total_requests, concurrency, rnd_seed=42):
+    names = [n for n, _ in MIX]
+    weights = [w for _, w in MIX]
+    per_thread = total_requests // concurrency
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def worker(thread_no):
+        rnd = random.Random(rnd_seed + thread_no)
+        vusers = [VirtualUser(target, rnd.randint(1, users), rnd) for _ in range(4)]
+        local = defaultdict(list)
+        local_err = defaultdict(int)
+        for _ in range(per_thread):
+            vu = rnd.choice(vusers)
+            action = rnd.choices(names, weights)[0]
+            try:
+                name, ms, status, _ = vu.step(action)
+            except Exception:
+                local_err[action] += 1
+                continue
+            local[name].append(ms)
+            if status >= 500:
+                local_err[name] += 1
+        with lock:
+            for k, v in local.items():
+                samples[k].extend(v)
+            for k, v in local_err.items():
+                errors[k] += v
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    report = {}
+    for name in sorted(samples):
+        values = sorted(samples[name])
+        report[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "rps": round(len(values) / wall, 1),
+        }
+    total = sum(len(v) for v in samples.values())
+    return {"wall_s": round(wall, 3), "total_rps": round(total / wall, 1), "endpoints": report}
+
+
+# ---------------- REPORTING ----------------
+def print_report(result, baseline=None):
+    print(f"\n{'endpoint':<18}{'count':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>9}"
+          + ("   p95 vs base" if baseline else ""))
+    for name, r in result["endpoints"].items():
+        line = (f"{name:<18}{r['count']:>7}{r['errors']:>5}{r['p50_ms']:>10.2f}"
+                f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['rps']:>9.1f}")
+        base = (baseline or {}).get("endpoints", {}).get(name)
+        if base and base["p95_ms"]:
+            line += f"   {(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.1f}%"
+        print(line)
+    print(f"\ntotal: {result['total_rps']} req/s over {result['wall_s']}s")
+
+
+def regressions(result, baseline, tolerance):
+    found = []
+    for name, r in result["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if base and base["p95_ms"] and r["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            found.append(name)
+    return found
+
+
+def load_baselines():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+def make_target(args):
+    if args.target == "client":
+        return ClientTarget()
+    if args.target == "gunicorn":
+        return GunicornTarget(args.port, args.workers, args.threads)
+    host, _, port = args.target.partition(":")
+    return HttpTarget(host, int(port or 80))
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="client",
+                        help="client | gunicorn | host:port of an already running server")
+    parser.add_argument("--users", type=int, default=200, help="number of seeded users to draw from")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed p95 regression vs baseline (fraction)")
+    parser.add_argument("--json", help="also write the raw result to this file")
+    args = parser.parse_args()
+
+    key = "client" if args.target == "client" else "http"
+    target = make_target(args)
+    try:
+        result = run_load(target, args.users, args.requests, args.concurrency, args.seed)
+    finally:
+        target.close()
+    result["params"] = {"users": args.users, "requests": args.requests,
+                        "concurrency": args.concurrency, "seed": args.seed}
+
+    baselines = load_baselines()
+    base_params = baselines.get(key, {}).get("params")
+    if args.compare and base_params and base_params != result["params"]:
+        print(f"! baseline was recorded with {base_params}; this run used {result['params']}")
+    print_report(result, baselines.get(key) if args.compare else None)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.save_baseline:
+        baselines[key] = result
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"✓ Baseline saved to {BASELINE_PATH} [{key}]")
+
+    if args.compare:
+        if key not in baselines:
+            raise SystemExit(f"No stored baseline for '{key}'; run with --save-baseline first")
+        slower = regressions(result, baselines[key], args.tolerance)
+        if slower:
+            print(f"✗ p95 regression over {args.tolerance:.0%}: {', '.join(slower)}")
+            sys.exit(1)
+        print("✓ No p95 regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
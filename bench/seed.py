@@ -0,0 +1,139 @@
+"""Seed a local Postgres with a reproducible benchmark dataset.
+
+    python -m bench.seed --users 200 --workouts 10 --reminders 5
+
+Runs db_init.sql (DROPS the app tables), loads the workouts.json catalog and
+bulk-loads users, workouts, checklist items, reminders and a subscription
+payment per user with COPY. Every user gets the password BENCH_PASSWORD.
+Point DATABASE_URL at a throwaway database.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import psycopg
+from dotenv import load_dotenv
+from werkzeug.security import generate_password_hash
+
+from utils.equipment import normalize_equipment
+from utils.generate_checklist import generate_checklist
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_PASSWORD = "bench-password"
+EQUIPMENT = ["dumbbell", "mat", "band", "kettlebell", "jump rope", "barbell"]
+
+
+def bench_username(i):
+    return f"bench_user_{i}"
+
+
+def bench_email(i):
+    return f"bench{i}@example.com"
+
+
+def load_catalog(cur):
+    with open(os.path.join(ROOT, "workouts.json")) as f:
+        workouts = json.load(f)
+
+    with cur.copy(
+        "COPY public_workouts (type, name, muscles, equipment, description, instructions, level) FROM STDIN"
+    ) as copy:
+        for w in workouts:
+            muscles = w.get("muscles") or []
+            instr = w.get("instructions") or ""
+            desc = w.get("description") or ""
+            copy.write_row((
+                w.get("type"),
+                w.get("name"),
+                muscles if isinstance(muscles, list) else [muscles],
+                normalize_equipment(w.get("equipments")),
+                "\n".join(desc) if isinstance(desc, list) else desc,
+                "\n".join(instr) if isinstance(instr, list) else instr,
+                w.get("level"),
+            ))
+    return len(workouts)
+
+
+def seed(db_url, users, workouts_per_user, reminders_per_user, rnd_seed=42):
+    rnd = random.Random(rnd_seed)
+    # Hash once; werkzeug hashing is deliberately slow
+    hashed_pw = generate_password_hash(BENCH_PASSWORD)
+
+    with open(os.path.join(ROOT, "db_init.sql")) as f:
+        init_sql = f.read()
+
+    with psycopg.connect(db_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(init_sql)
+            catalog_size = load_catalog(cur)
+
+            with cur.copy("COPY users (id, username, name, reg_number, email, password) FROM STDIN") as copy:
+                for i in range(1, users + 1):
+                    copy.write_row((i, bench_username(i), f"Bench User {i}", f"BENCH{i:06d}",
+                                    bench_email(i), hashed_pw))
+
+            with cur.copy("COPY payments (user_id, amount, currency, status, type, paid_at) FROM STDIN") as copy:
+                for i in range(1, users + 1):
+                    copy.write_row((i, 5000, "NGN", "success", "subscription", "now"))
+
+            workout_id = 0
+            with cur.copy("COPY workouts (id, name, description, equipment, user_id) FROM STDIN") as copy:
+                checklist_rows = []
+                for i in range(1, users + 1):
+                    for _ in range(workouts_per_user):
+                        workout_id += 1
+                        equipment = rnd.sample(EQUIPMENT, rnd.randint(0, 3))
+                        copy.write_row((workout_id, f"Workout {workout_id}", "Seeded workout",
+                                        equipment, i))
+                        for item in generate_checklist(equipment):
+                            checklist_rows.append((item["task"], rnd.random() < 0.3, workout_id))
+
+            with cur.copy("COPY checklist_items (task, done, workout_id) FROM STDIN") as copy:
+                for row in checklist_rows:
+                    copy.write_row(row)
+
+            with cur.copy("COPY reminders (user_id, time, description) FROM STDIN") as copy:
+                for i in range(1, users + 1):
+                    for r in range(reminders_per_user):
+                        copy.write_row((i, f"{rnd.randint(5, 21):02d}:{rnd.choice(['00', '30'])}",
+                                        f"Reminder {r}"))
+
+            # COPY with explicit ids leaves the sequences behind
+            for table in ("users", "workouts"):
+                cur.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                )
+
+        conn.commit()
+
+    return {
+        "catalog": catalog_size,
+        "users": users,
+        "workouts": workout_id,
+        "checklist_items": len(checklist_rows),
+        "reminders": users * reminders_per_user,
+    }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--workouts", type=int, default=10, help="workouts per user")
+    parser.add_argument("--reminders", type=int, default=5, help="reminders per user")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise SystemExit("DATABASE_URL environment variable is not set")
+
+    start = time.perf_counter()
+    counts = seed(db_url, args.users, args.workouts, args.reminders, args.seed)
+    print(f"✓ Seeded {counts} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
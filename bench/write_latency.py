@@ -0,0 +1,94 @@
+"""Write-handler latency under simulated database network latency.
+
+    python -m bench.seed --users 10
+    python -m bench.write_latency --delay-ms 5 --iterations 50
+
+Starts a bench.latency_proxy in front of DATABASE_URL, points the app at it
+and times the multi-statement write handlers through the Flask test client.
+"round trips" is the p50 divided by the simulated round-trip time (2 x
+delay), i.e. roughly how many times the handler waited on the database.
+"""
+import argparse
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
+
+from bench.latency_proxy import LatencyProxy
+from bench.run import percentile
+
+
+def upstream_address(dsn):
+    info = conninfo_to_dict(dsn)
+    host = info.get("host") or "/var/run/postgresql"
+    port = info.get("port") or "5432"
+    return f"{host}/.s.PGSQL.{port}" if host.startswith("/") else f"{host}:{port}"
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay-ms", type=float, default=5)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    dsn = os.getenv("DATABASE_URL")
+    if not dsn:
+        raise SystemExit("DATABASE_URL environment variable is not set")
+    port = LatencyProxy(upstream_address(dsn), args.delay_ms).start()
+    os.environ["DATABASE_URL"] = make_conninfo(dsn, host="127.0.0.1", port=port)
+    os.environ["RATE_LIMIT_ENABLED"] = "0"
+
+    from app import create_app
+
+    client = create_app({"TESTING": True}).test_client()
+
+    def call(method, path, token=None, **kwargs):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        start = time.perf_counter()
+        resp = client.open(path, method=method, headers=headers, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        if resp.status_code >= 400:
+            raise RuntimeError(f"{method} {path} -> {resp.status_code} {resp.get_data(as_text=True)}")
+        return elapsed, resp.get_json()
+
+    def register():
+        name = f"wl_{uuid.uuid4().hex[:12]}"
+        ms, _ = call("POST", "/auth/register", json={
+            "username": name, "password": "bench", "name": "Bench",
+            "reg_number": name, "email": f"{name}@example.com",
+        })
+        return ms, name
+
+    _, username = register()
+    _, login = call("POST", "/auth/login", json={"username": username, "password": "bench"})
+    token = login["token"]
+    call("POST", "/users/paystack/dummy-payment", token, json={"email": "bench@example.com"})
+    catalog_ids = [w[0] for w in call("GET", "/public/workouts?fields=id")[1]["workouts"]]
+
+    samples = {name: [] for name in ("register", "create_workout", "update_workout", "save_public")}
+    for i in range(args.iterations):
+        samples["register"].append(register()[0])
+        ms, created = call("POST", "/users/workouts", token,
+                           json={"name": f"W{i}", "equipment": ["dumbbell", "mat", "kettlebell"]})
+        samples["create_workout"].append(ms)
+        samples["update_workout"].append(call(
+            "PUT", f"/users/workouts/{created['workout_id']}", token,
+            json={"name": f"W{i}b", "equipment": ["band", "mat"]})[0])
+        ids = [catalog_ids[(i * 3 + k) % len(catalog_ids)] for k in range(3)]
+        samples["save_public"].append(call("POST", "/public/workouts/save", token,
+                                           json={"workout_ids": ids})[0])
+
+    rtt = 2 * args.delay_ms
+    print(f"\nsimulated RTT {rtt:.1f} ms")
+    print(f"{'handler':<18}{'p50 ms':>10}{'p95 ms':>10}{'round trips':>13}")
+    for name, values in samples.items():
+        values.sort()
+        p50 = percentile(values, 50)
+        print(f"{name:<18}{p50:>10.2f}{percentile(values, 95):>10.2f}{p50 / rtt:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
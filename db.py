@@ -1,15 +1,233 @@
 # db.py
+import itertools
 import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
 import psycopg
-from dotenv import load_dotenv
+from psycopg_pool import ConnectionPool, PoolTimeout
+from utils import local_store, query_tracer
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+# How long a request waits for a free connection before PoolTimeout (turned
+# into 503 + Retry-After by utils.errors); psycopg_pool's default is 30s
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+# Read replicas: comma-separated DSNs. Read-only handlers use them round-robin;
+# a replica that fails to connect or errors mid-query is ejected for
+# REPLICA_EJECT_SECONDS. After a user writes, their reads stay on the primary
+# for READ_YOUR_WRITES_SECONDS so they never see replica lag.
+REPLICA_EJECT_SECONDS = float(os.getenv("REPLICA_EJECT_SECONDS", "30"))
+REPLICA_CONNECT_TIMEOUT = float(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Writes that can be lost in a crash without harm (checklist toggles, ...)
+# skip waiting for the WAL flush. "on" makes them durable like the rest.
+NONCRITICAL_SYNCHRONOUS_COMMIT = os.getenv("NONCRITICAL_SYNCHRONOUS_COMMIT", "off")
+SYNCHRONOUS_COMMIT_LEVELS = ("on", "off", "local", "remote_write", "remote_apply")
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+_replicas = None
+_replicas_pid = None
+_round_robin = itertools.count()
+
+local_store.register_schema(
+    "CREATE TABLE IF NOT EXISTS primary_pins (user_id INTEGER PRIMARY KEY, until REAL NOT NULL)"
+)
+
+
+def get_db_url():
+    # Read at first use, not import, so importing the app never needs a DB
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise RuntimeError("DATABASE_URL environment variable is not set")
+    return db_url
+
+
+def get_replica_urls():
+    return [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+
+
+def _connection_kwargs():
+    kwargs = {"autocommit": True}
+    if query_tracer.QUERY_TRACE:
+        kwargs["cursor_factory"] = query_tracer.TracingCursor
+    return kwargs
+
+
+def get_pool():
+    # Created on first use so every (forked) worker opens its own connections;
+    # a pool inherited across fork (preload_app) is discarded, never shared.
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(
+                    get_db_url(),
+                    min_size=DB_POOL_MIN,
+                    max_size=DB_POOL_MAX,
+                    timeout=DB_POOL_TIMEOUT,
+                    kwargs=_connection_kwargs(),
+                    open=True,
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+
+# ---------------- READ REPLICAS ----------------
+class Replica:
+    def __init__(self, url):
+        self.url = url
+        self.ejected_until = 0.0
+        # open(wait=False): a dead replica must not block worker startup
+        self.pool = ConnectionPool(
+            url,
+            min_size=DB_POOL_MIN,
+            max_size=DB_POOL_MAX,
+            kwargs=_connection_kwargs(),
+            open=False,
+        )
+        self.pool.open(wait=False)
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.ejected_until
+
+    def eject(self):
+        self.ejected_until = time.monotonic() + REPLICA_EJECT_SECONDS
+
+
+def get_replicas():
+    global _replicas, _replicas_pid
+    if _replicas is None or _replicas_pid != os.getpid():
+        with _pool_lock:
+            if _replicas is None or _replicas_pid != os.getpid():
+                _replicas = [Replica(url) for url in get_replica_urls()]
+                _replicas_pid = os.getpid()
+    return _replicas
+
+
+def _next_replica():
+    replicas = get_replicas()
+    for _ in range(len(replicas)):
+        replica = replicas[next(_round_robin) % len(replicas)]
+        if replica.healthy:
+            return replica
+    return None
+
+
+@contextmanager
+def _replica_conn(replica):
+    with ExitStack() as stack:
+        try:
+            conn = stack.enter_context(replica.pool.connection(timeout=REPLICA_CONNECT_TIMEOUT))
+        except (PoolTimeout, psycopg.OperationalError):
+            replica.eject()
+            replica = None
+            conn = stack.enter_context(get_pool().connection())
+        try:
+            yield conn
+        except psycopg.OperationalError:
+            if replica is not None:
+                replica.eject()
+            raise
+
+
+# ---------------- READ-YOUR-WRITES ----------------
+def pin_to_primary(user_id):
+    if user_id is None or not get_replica_urls():
+        return
+    local_store.connect().execute(
+        "INSERT OR REPLACE INTO primary_pins (user_id, until) VALUES (?, ?)",
+        (int(user_id), time.time() + READ_YOUR_WRITES_SECONDS),
+    )
+
+
+def pinned_to_primary(user_id):
+    if user_id is None:
+        return False
+    row = local_store.connect().execute(
+        "SELECT until FROM primary_pins WHERE user_id = ?", (int(user_id),)
+    ).fetchone()
+    return bool(row) and row[0] > time.time()
+
+
+def get_conn(readonly=False, user_id=None):
+    # Usage stays `with get_conn() as conn:`; the connection goes back to the
+    # pool (keeping its prepared statements) instead of being closed. It is in
+    # autocommit mode: use it for reads and single-statement writes, and
+    # unit_of_work()/pipeline() for anything else.
+    # readonly=True may be served by a replica unless user_id wrote recently.
+    if readonly and get_replica_urls() and not pinned_to_primary(user_id):
+        replica = _next_replica()
+        if replica is not None:
+            return _replica_conn(replica)
+    return get_pool().connection()
+
+
+# ---------------- UNITS OF WORK ----------------
+# Pooled connections are autocommit, which suits reads. Every write handler
+# goes through one of these instead, so a request commits exactly once and
+# either all of its writes land or none do.
+def _set_synchronous_commit(conn, level):
+    if level is None:
+        return
+    if level not in SYNCHRONOUS_COMMIT_LEVELS:
+        raise ValueError(f"Invalid synchronous_commit level: {level!r}")
+    # is_local=true: applies to this transaction only
+    conn.execute("SELECT set_config('synchronous_commit', %s, true)", (level,))
+
+
+@contextmanager
+def unit_of_work(synchronous_commit=None):
+    """Primary connection inside one explicit transaction.
+
+    For writes that need to read their own results before deciding what to
+    write next. Commits when the block exits, rolls back on any exception.
+    synchronous_commit="off" (see NONCRITICAL_SYNCHRONOUS_COMMIT) skips the
+    WAL flush wait for this transaction only.
+    """
+    with get_pool().connection() as conn:
+        with conn.transaction():
+            _set_synchronous_commit(conn, synchronous_commit)
+            yield conn
+
+
+@contextmanager
+def pipeline(synchronous_commit=None):
+    """Primary connection in pipeline mode, as one transaction.
+
+    Statements run on it are queued and sent in one batch ending in a single
+    Sync when the block exits, so a multi-statement write costs one round
+    trip. On an autocommit connection Postgres runs everything up to the
+    Sync as one implicit transaction: an error rolls back the whole block.
+    (psycopg's conn.transaction() would add syncs of its own, hence none
+    here.) Fetch results after the block: they are buffered in the cursors,
+    and a fetch inside it forces an early Sync that commits what came before.
+    Statements that need each other's results should be one CTE.
+    """
+    with get_pool().connection() as conn:
+        with conn.pipeline():
+            _set_synchronous_commit(conn, synchronous_commit)
+            yield conn
 
-# Load environment variables from a .env file if present
-load_dotenv()
 
-# Get the database URL from environment
-DB_URL = os.getenv("DATABASE_URL")
-if not DB_URL:
-    raise RuntimeError("DATABASE_URL environment variable is not set")
+def init_app(app):
+    from flask import request
+    from flask_jwt_extended import get_jwt_identity
 
-def get_conn():
-    return psycopg.connect(DB_URL, autocommit=True)
+    @app.after_request
+    def _pin_writer_to_primary(response):
+        if request.method in ("GET", "HEAD", "OPTIONS") or response.status_code >= 400:
+            return response
+        try:
+            user_id = get_jwt_identity()
+        except RuntimeError:  # endpoint without @jwt_required
+            user_id = None
+        pin_to_primary(user_id)
+        return response
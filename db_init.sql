@@ -1,5 +1,19 @@
+DROP TABLE IF EXISTS reminders_archive CASCADE;
+DROP TABLE IF EXISTS checklist_items_archive CASCADE;
+DROP TABLE IF EXISTS reminders CASCADE;
+DROP TABLE IF EXISTS payments CASCADE;
+DROP TABLE IF EXISTS payment_events CASCADE;
+DROP TABLE IF EXISTS uploads CASCADE;
+DROP TABLE IF EXISTS dead_jobs CASCADE;
+DROP TABLE IF EXISTS jobs CASCADE;
+DROP TABLE IF EXISTS activity_summary CASCADE;
+DROP TABLE IF EXISTS activity_weekly CASCADE;
+DROP TABLE IF EXISTS activity_daily CASCADE;
+DROP TABLE IF EXISTS activity_log CASCADE;
+DROP TABLE IF EXISTS idempotency_keys CASCADE;
 DROP TABLE IF EXISTS saved_workouts CASCADE;
 DROP TABLE IF EXISTS gestures CASCADE;
+DROP TABLE IF EXISTS default_gestures CASCADE;
 DROP TABLE IF EXISTS checklist_items CASCADE;
 DROP TABLE IF EXISTS workouts CASCADE;
 DROP TABLE IF EXISTS public_workouts CASCADE;
@@ -22,23 +36,28 @@ CREATE TABLE IF NOT EXISTS public_workouts (
     type VARCHAR(50),
     name VARCHAR(100),
     muscles TEXT[],
-    equipment TEXT,
+    equipment TEXT[] NOT NULL DEFAULT '{}',
     description TEXT,
     instructions TEXT,
     level VARCHAR(20)
 );
+CREATE INDEX IF NOT EXISTS idx_public_workouts_equipment ON public_workouts USING GIN (equipment);
 
 -- USER-CREATED WORKOUTS
 CREATE TABLE IF NOT EXISTS workouts (
     id SERIAL PRIMARY KEY,
     name VARCHAR(120) NOT NULL,
     description TEXT,
-    equipment TEXT,
+    equipment TEXT[] NOT NULL DEFAULT '{}',
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     image_url TEXT,
-    public_id TEXT 
+    public_id TEXT,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()  -- every UPDATE sets it (scripts/export.py)
 );
+CREATE INDEX IF NOT EXISTS idx_workouts_equipment ON workouts USING GIN (equipment);
+CREATE INDEX IF NOT EXISTS idx_workouts_user_id ON workouts (user_id);
+CREATE INDEX IF NOT EXISTS idx_workouts_updated_at ON workouts (updated_at);
 
 -- SAVED PUBLIC WORKOUTS
 CREATE TABLE IF NOT EXISTS saved_workouts (
@@ -48,48 +67,237 @@ CREATE TABLE IF NOT EXISTS saved_workouts (
     name VARCHAR(120) NOT NULL,
     description TEXT,
     instructions TEXT,
-    equipment TEXT,
+    equipment TEXT[] NOT NULL DEFAULT '{}',
     type VARCHAR(50),
     muscles TEXT[],
     level VARCHAR(20),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(user_id, public_workout_id)
 );
+CREATE INDEX IF NOT EXISTS idx_saved_workouts_equipment ON saved_workouts USING GIN (equipment);
 
--- CHECKLIST ITEMS
+-- CHECKLIST ITEMS (hash-partitioned by workout, see migrations/009)
 CREATE TABLE IF NOT EXISTS checklist_items (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     task TEXT NOT NULL,
     done BOOLEAN DEFAULT FALSE,
-    workout_id INTEGER NOT NULL REFERENCES workouts(id) ON DELETE CASCADE
+    completed_at TIMESTAMP,  -- set while done; what retention ages by
+    workout_id INTEGER NOT NULL REFERENCES workouts(id) ON DELETE CASCADE,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, workout_id)
+) PARTITION BY HASH (workout_id);
+CREATE INDEX IF NOT EXISTS idx_checklist_items_workout_id ON checklist_items (workout_id);
+CREATE INDEX IF NOT EXISTS idx_checklist_items_completed_at ON checklist_items (completed_at) WHERE done;
+CREATE INDEX IF NOT EXISTS idx_checklist_items_updated_at ON checklist_items (updated_at);
+
+-- GESTURES: shared defaults plus per-user overrides only
+CREATE TABLE IF NOT EXISTS default_gestures (
+    name VARCHAR(100) PRIMARY KEY,
+    action VARCHAR(200) NOT NULL
 );
+INSERT INTO default_gestures (name, action) VALUES
+    ('swipe_left', 'delete'),
+    ('swipe_right', 'mark as done'),
+    ('shake', 'reset')
+ON CONFLICT (name) DO NOTHING;
 
--- GESTURES
 CREATE TABLE IF NOT EXISTS gestures (
     id SERIAL PRIMARY KEY,
-    name VARCHAR(100),
-    action VARCHAR(200),
-    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
+    name VARCHAR(100) NOT NULL,
+    action VARCHAR(200) NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE
 );
+CREATE UNIQUE INDEX IF NOT EXISTS idx_gestures_user_name ON gestures (user_id, name);
 
+-- PAYMENTS (hash-partitioned by user)
 CREATE TABLE IF NOT EXISTS payments (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     amount NUMERIC(10,2) DEFAULT 0,  
     currency VARCHAR(10) DEFAULT 'NGN',
     status VARCHAR(20) DEFAULT 'pending', 
     created_at TIMESTAMP DEFAULT NOW(),
     paid_at TIMESTAMP NULL,
-    type VARCHAR(50) DEFAULT 'subscription'  -- Add type column
-);
+    type VARCHAR(50) DEFAULT 'subscription',  -- Add type column
+    reference VARCHAR(100),  -- provider reference (webhook events)
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, user_id)
+) PARTITION BY HASH (user_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_user_reference ON payments (user_id, reference);
+CREATE INDEX IF NOT EXISTS idx_payments_updated_at ON payments (updated_at);
 
 
--- REMINDERS TABLE
+-- REMINDERS TABLE (hash-partitioned by user)
 CREATE TABLE IF NOT EXISTS reminders (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    time VARCHAR(50) NOT NULL,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP,  -- NULL: never expires
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, user_id)
+) PARTITION BY HASH (user_id);
+CREATE INDEX IF NOT EXISTS idx_reminders_user_id ON reminders (user_id);
+CREATE INDEX IF NOT EXISTS idx_reminders_expires_at ON reminders (expires_at) WHERE expires_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_reminders_updated_at ON reminders (updated_at);
+
+-- 8 hash partitions each for checklist_items, payments and reminders
+DO $$
+DECLARE
+    parent TEXT;
+    i INTEGER;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['checklist_items', 'payments', 'reminders'] LOOP
+        FOR i IN 0..7 LOOP
+            EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I'
+                           ' FOR VALUES WITH (MODULUS 8, REMAINDER %s)', parent || '_p' || i, parent, i);
+        END LOOP;
+    END LOOP;
+END $$;
+
+-- COLD ARCHIVES (utils/retention.py moves old rows here in batches)
+CREATE TABLE IF NOT EXISTS checklist_items_archive (
+    id INTEGER NOT NULL,
+    workout_id INTEGER NOT NULL,  -- no FK: the workout may be gone
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    task TEXT NOT NULL,
+    done BOOLEAN,
+    completed_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, workout_id)
+);
+CREATE INDEX IF NOT EXISTS idx_checklist_items_archive_user_id ON checklist_items_archive (user_id);
+
+CREATE TABLE IF NOT EXISTS reminders_archive (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     time VARCHAR(50) NOT NULL,
     description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP,
+    expires_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, user_id)
+);
+
+
+-- RATE LIMIT BUCKETS (RATE_LIMIT_STORE=postgres)
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    ts DOUBLE PRECISION NOT NULL,
+    allowed BOOLEAN NOT NULL
+);
+
+-- USER CACHE VERSIONS (utils/user_cache.py); not dropped above: resetting
+-- them would make bodies cached before the reset current again
+CREATE TABLE IF NOT EXISTS user_cache_versions (
+    cache TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    version BIGINT NOT NULL,
+    PRIMARY KEY (cache, user_id)
 );
 
+-- IDEMPOTENCY KEYS (replayed responses for retried writes)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    key VARCHAR(255) NOT NULL,
+    request_hash TEXT NOT NULL,
+    status_code INTEGER,  -- NULL while the original request is in flight
+    response_body BYTEA,
+    content_type VARCHAR(100),
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, key)
+);
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+
+-- ACTIVITY HISTORY AND ROLLUPS (checklist toggles)
+CREATE TABLE IF NOT EXISTS activity_log (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    checklist_item_id INTEGER NOT NULL,  -- no FK: history outlives regenerated checklists
+    workout_id INTEGER NOT NULL,
+    done BOOLEAN NOT NULL,
+    day DATE NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_activity_log_user_created ON activity_log (user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS activity_daily (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    uncompleted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS activity_weekly (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    week DATE NOT NULL,  -- Monday
+    completed INTEGER NOT NULL DEFAULT 0,
+    uncompleted INTEGER NOT NULL DEFAULT 0,
+    active_days INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, week)
+);
+
+CREATE TABLE IF NOT EXISTS activity_summary (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    completed INTEGER NOT NULL DEFAULT 0,
+    uncompleted INTEGER NOT NULL DEFAULT 0,
+    current_streak INTEGER NOT NULL DEFAULT 0,
+    longest_streak INTEGER NOT NULL DEFAULT 0,
+    last_active_day DATE
+);
+
+-- BACKGROUND JOBS (utils/jobs.py)
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    run_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    locked_at TIMESTAMP,  -- NULL while queued
+    locked_by TEXT,
+    last_error TEXT,
+    dedupe_key TEXT UNIQUE,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_kind_run_at ON jobs (kind, run_at);
+
+CREATE TABLE IF NOT EXISTS dead_jobs (
+    id BIGINT PRIMARY KEY,
+    kind VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL,
+    failed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- RESUMABLE UPLOADS (routes/uploads.py; chunks staged under UPLOAD_DIR)
+CREATE TABLE IF NOT EXISTS uploads (
+    id UUID PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    filename VARCHAR(255),
+    content_type VARCHAR(100) NOT NULL,
+    size BIGINT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'open',  -- open | complete
+    workout_id INTEGER,
+    image_url TEXT,
+    public_id TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_expires_at ON uploads (expires_at) WHERE status = 'open';
+
+-- PAYSTACK WEBHOOK INBOX (utils/payments.py)
+CREATE TABLE IF NOT EXISTS payment_events (
+    id BIGSERIAL PRIMARY KEY,
+    payload JSONB NOT NULL,
+    received_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    processed_at TIMESTAMP,  -- NULL until a batch has applied it
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_payment_events_pending ON payment_events (id) WHERE processed_at IS NULL;
@@ -0,0 +1,11 @@
+# gunicorn.conf.py
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Import the app (Flask, blueprints, registry) once in the master and let
+# workers share those pages copy-on-write. Nothing opens sockets at import:
+# the DB pool and Cloudinary are created lazily inside each worker.
+preload_app = True
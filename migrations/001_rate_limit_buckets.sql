@@ -0,0 +1,8 @@
+-- Token buckets for RATE_LIMIT_STORE=postgres. UNLOGGED: losing them on a
+-- crash only resets the limits.
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    ts DOUBLE PRECISION NOT NULL,
+    allowed BOOLEAN NOT NULL
+);
@@ -0,0 +1,13 @@
+-- Stored responses for Idempotency-Key retries (utils/idempotency.py)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    key VARCHAR(255) NOT NULL,
+    request_hash TEXT NOT NULL,
+    status_code INTEGER,  -- NULL while the original request is in flight
+    response_body BYTEA,
+    content_type VARCHAR(100),
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, key)
+);
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at);
@@ -0,0 +1,35 @@
+-- equipment: comma-joined TEXT -> TEXT[] with GIN indexes, so reads no
+-- longer split strings and "needs a kettlebell" queries can use an index.
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'public_workouts' AND column_name = 'equipment') = 'text' THEN
+        ALTER TABLE public_workouts ALTER COLUMN equipment TYPE TEXT[]
+            USING array_remove(string_to_array(regexp_replace(btrim(equipment), '\s*,\s*', ',', 'g'), ','), '');
+    END IF;
+
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'workouts' AND column_name = 'equipment') = 'text' THEN
+        ALTER TABLE workouts ALTER COLUMN equipment TYPE TEXT[]
+            USING array_remove(string_to_array(regexp_replace(btrim(equipment), '\s*,\s*', ',', 'g'), ','), '');
+    END IF;
+
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'saved_workouts' AND column_name = 'equipment') = 'text' THEN
+        ALTER TABLE saved_workouts ALTER COLUMN equipment TYPE TEXT[]
+            USING array_remove(string_to_array(regexp_replace(btrim(equipment), '\s*,\s*', ',', 'g'), ','), '');
+    END IF;
+END $$;
+
+UPDATE public_workouts SET equipment = '{}' WHERE equipment IS NULL;
+UPDATE workouts SET equipment = '{}' WHERE equipment IS NULL;
+UPDATE saved_workouts SET equipment = '{}' WHERE equipment IS NULL;
+
+ALTER TABLE public_workouts ALTER COLUMN equipment SET DEFAULT '{}', ALTER COLUMN equipment SET NOT NULL;
+ALTER TABLE workouts ALTER COLUMN equipment SET DEFAULT '{}', ALTER COLUMN equipment SET NOT NULL;
+ALTER TABLE saved_workouts ALTER COLUMN equipment SET DEFAULT '{}', ALTER COLUMN equipment SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_public_workouts_equipment ON public_workouts USING GIN (equipment);
+CREATE INDEX IF NOT EXISTS idx_workouts_equipment ON workouts USING GIN (equipment);
+CREATE INDEX IF NOT EXISTS idx_saved_workouts_equipment ON saved_workouts USING GIN (equipment);
+CREATE INDEX IF NOT EXISTS idx_workouts_user_id ON workouts (user_id);
@@ -0,0 +1,38 @@
+-- Checklist activity history and per-user rollups (queries.py "checklist_toggle").
+-- History starts when this is applied; past toggles were never recorded.
+CREATE TABLE IF NOT EXISTS activity_log (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    checklist_item_id INTEGER NOT NULL,  -- no FK: history outlives regenerated checklists
+    workout_id INTEGER NOT NULL,
+    done BOOLEAN NOT NULL,
+    day DATE NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_activity_log_user_created ON activity_log (user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS activity_daily (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    uncompleted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS activity_weekly (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    week DATE NOT NULL,  -- Monday
+    completed INTEGER NOT NULL DEFAULT 0,
+    uncompleted INTEGER NOT NULL DEFAULT 0,
+    active_days INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, week)
+);
+
+CREATE TABLE IF NOT EXISTS activity_summary (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    completed INTEGER NOT NULL DEFAULT 0,
+    uncompleted INTEGER NOT NULL DEFAULT 0,
+    current_streak INTEGER NOT NULL DEFAULT 0,
+    longest_streak INTEGER NOT NULL DEFAULT 0,
+    last_active_day DATE
+);
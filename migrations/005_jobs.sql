@@ -0,0 +1,25 @@
+-- Background job queue (utils/jobs.py, python -m scripts.worker)
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    run_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    locked_at TIMESTAMP,  -- NULL while queued
+    locked_by TEXT,
+    last_error TEXT,
+    dedupe_key TEXT UNIQUE,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_kind_run_at ON jobs (kind, run_at);
+
+CREATE TABLE IF NOT EXISTS dead_jobs (
+    id BIGINT PRIMARY KEY,
+    kind VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL,
+    failed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,17 @@
+-- Resumable chunked uploads (routes/uploads.py). Chunks are staged on disk
+-- under UPLOAD_DIR; this row tracks ownership, the declared size and where
+-- the finished object went.
+CREATE TABLE IF NOT EXISTS uploads (
+    id UUID PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    filename VARCHAR(255),
+    content_type VARCHAR(100) NOT NULL,
+    size BIGINT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'open',  -- open | complete
+    workout_id INTEGER,
+    image_url TEXT,
+    public_id TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_expires_at ON uploads (expires_at) WHERE status = 'open';
@@ -0,0 +1,25 @@
+-- Gestures: one shared default set, per-user rows only where a user changed
+-- an action (routes/gestures.py). Registration no longer copies defaults.
+CREATE TABLE IF NOT EXISTS default_gestures (
+    name VARCHAR(100) PRIMARY KEY,
+    action VARCHAR(200) NOT NULL
+);
+INSERT INTO default_gestures (name, action) VALUES
+    ('swipe_left', 'delete'),
+    ('swipe_right', 'mark as done'),
+    ('shake', 'reset')
+ON CONFLICT (name) DO NOTHING;
+
+-- Per-user copies of a default are redundant now
+DELETE FROM gestures g USING default_gestures d
+WHERE g.name = d.name AND g.action IS NOT DISTINCT FROM d.action;
+DELETE FROM gestures WHERE user_id IS NULL OR name IS NULL OR action IS NULL;
+-- One override per (user, gesture): keep the newest
+DELETE FROM gestures g USING gestures newer
+WHERE newer.user_id = g.user_id AND newer.name = g.name AND newer.id > g.id;
+
+ALTER TABLE gestures
+    ALTER COLUMN user_id SET NOT NULL,
+    ALTER COLUMN name SET NOT NULL,
+    ALTER COLUMN action SET NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_gestures_user_name ON gestures (user_id, name);
@@ -0,0 +1,21 @@
+-- Paystack webhook inbox (utils/payments.py). The webhook only appends the
+-- verified event; the payments.process_events job applies batches of them.
+CREATE TABLE IF NOT EXISTS payment_events (
+    id BIGSERIAL PRIMARY KEY,
+    payload JSONB NOT NULL,
+    received_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    processed_at TIMESTAMP,  -- NULL until a batch has applied it
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_payment_events_pending ON payment_events (id) WHERE processed_at IS NULL;
+
+-- Provider reference: what webhook events are matched and deduplicated on
+ALTER TABLE payments ADD COLUMN IF NOT EXISTS reference VARCHAR(100);
+ALTER TABLE payments ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+-- (payments partitioned by migrations/009 are unique on (user_id, reference))
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'payments'::regclass) = 'r' THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_reference ON payments (reference);
+    END IF;
+END $$;
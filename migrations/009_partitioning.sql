@@ -0,0 +1,159 @@
+-- Hash-partition the tables that grow with every user, and give the
+-- retention job (utils/retention.py) cold archives to move old rows into.
+--
+-- checklist_items by workout_id (every read goes through the workout),
+-- reminders and payments by user_id; 8 partitions each. The partition key
+-- has to be part of every unique key, so primary keys become (id, key) and
+-- the webhook's payment reference is unique per user.
+--
+-- Each table is converted by copying it into a new partitioned table under
+-- an ACCESS EXCLUSIVE lock: run this in a quiet period. Ids keep their
+-- sequences. Tables that are already partitioned are left alone.
+
+-- ---------------- CHECKLIST ITEMS ----------------
+DO $$
+DECLARE
+    i INTEGER;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'checklist_items'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE checklist_items RENAME TO checklist_items_unpartitioned;
+    ALTER TABLE checklist_items_unpartitioned
+        RENAME CONSTRAINT checklist_items_pkey TO checklist_items_unpartitioned_pkey;
+
+    CREATE TABLE checklist_items (
+        id INTEGER NOT NULL DEFAULT nextval('checklist_items_id_seq'),
+        task TEXT NOT NULL,
+        done BOOLEAN DEFAULT FALSE,
+        completed_at TIMESTAMP,  -- set while done; what retention ages by
+        workout_id INTEGER NOT NULL REFERENCES workouts(id) ON DELETE CASCADE,
+        PRIMARY KEY (id, workout_id)
+    ) PARTITION BY HASH (workout_id);
+    FOR i IN 0..7 LOOP
+        EXECUTE format('CREATE TABLE checklist_items_p%s PARTITION OF checklist_items'
+                       ' FOR VALUES WITH (MODULUS 8, REMAINDER %s)', i, i);
+    END LOOP;
+
+    -- Done items take their last completion from activity_log (migrations/004);
+    -- without one completed_at stays NULL and retention never archives them
+    INSERT INTO checklist_items (id, task, done, completed_at, workout_id)
+    SELECT c.id, c.task, c.done, CASE WHEN c.done THEN l.completed_at END, c.workout_id
+    FROM checklist_items_unpartitioned c
+    LEFT JOIN (
+        SELECT checklist_item_id, workout_id, MAX(created_at) AS completed_at
+        FROM activity_log WHERE done
+        GROUP BY checklist_item_id, workout_id
+    ) l ON l.checklist_item_id = c.id AND l.workout_id = c.workout_id;
+
+    ALTER SEQUENCE checklist_items_id_seq OWNED BY checklist_items.id;
+    DROP TABLE checklist_items_unpartitioned;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_checklist_items_workout_id ON checklist_items (workout_id);
+CREATE INDEX IF NOT EXISTS idx_checklist_items_completed_at ON checklist_items (completed_at) WHERE done;
+
+-- ---------------- REMINDERS ----------------
+DO $$
+DECLARE
+    i INTEGER;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'reminders'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE reminders RENAME TO reminders_unpartitioned;
+    ALTER TABLE reminders_unpartitioned RENAME CONSTRAINT reminders_pkey TO reminders_unpartitioned_pkey;
+
+    CREATE TABLE reminders (
+        id INTEGER NOT NULL DEFAULT nextval('reminders_id_seq'),
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        time VARCHAR(50) NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP,  -- NULL: never expires
+        PRIMARY KEY (id, user_id)
+    ) PARTITION BY HASH (user_id);
+    FOR i IN 0..7 LOOP
+        EXECUTE format('CREATE TABLE reminders_p%s PARTITION OF reminders'
+                       ' FOR VALUES WITH (MODULUS 8, REMAINDER %s)', i, i);
+    END LOOP;
+
+    -- Reminders without a user were unreachable anyway
+    INSERT INTO reminders (id, user_id, time, description, created_at)
+    SELECT id, user_id, time, description, created_at
+    FROM reminders_unpartitioned
+    WHERE user_id IS NOT NULL;
+
+    ALTER SEQUENCE reminders_id_seq OWNED BY reminders.id;
+    DROP TABLE reminders_unpartitioned;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_reminders_user_id ON reminders (user_id);
+CREATE INDEX IF NOT EXISTS idx_reminders_expires_at ON reminders (expires_at) WHERE expires_at IS NOT NULL;
+
+-- ---------------- PAYMENTS ----------------
+DO $$
+DECLARE
+    i INTEGER;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'payments'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE payments RENAME TO payments_unpartitioned;
+    ALTER TABLE payments_unpartitioned RENAME CONSTRAINT payments_pkey TO payments_unpartitioned_pkey;
+
+    CREATE TABLE payments (
+        id INTEGER NOT NULL DEFAULT nextval('payments_id_seq'),
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        amount NUMERIC(10,2) DEFAULT 0,
+        currency VARCHAR(10) DEFAULT 'NGN',
+        status VARCHAR(20) DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT NOW(),
+        paid_at TIMESTAMP NULL,
+        type VARCHAR(50) DEFAULT 'subscription',
+        reference VARCHAR(100),
+        updated_at TIMESTAMP,
+        PRIMARY KEY (id, user_id)
+    ) PARTITION BY HASH (user_id);
+    FOR i IN 0..7 LOOP
+        EXECUTE format('CREATE TABLE payments_p%s PARTITION OF payments'
+                       ' FOR VALUES WITH (MODULUS 8, REMAINDER %s)', i, i);
+    END LOOP;
+
+    INSERT INTO payments (id, user_id, amount, currency, status, created_at, paid_at, type, reference, updated_at)
+    SELECT id, user_id, amount, currency, status, created_at, paid_at, type, reference, updated_at
+    FROM payments_unpartitioned;
+
+    ALTER SEQUENCE payments_id_seq OWNED BY payments.id;
+    DROP TABLE payments_unpartitioned;  -- takes idx_payments_reference with it
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_user_reference ON payments (user_id, reference);
+
+-- ---------------- COLD ARCHIVES ----------------
+-- Plain tables: written in batches by the retention job, rarely read
+CREATE TABLE IF NOT EXISTS checklist_items_archive (
+    id INTEGER NOT NULL,
+    workout_id INTEGER NOT NULL,  -- no FK: the workout may be gone
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    task TEXT NOT NULL,
+    done BOOLEAN,
+    completed_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, workout_id)
+);
+CREATE INDEX IF NOT EXISTS idx_checklist_items_archive_user_id ON checklist_items_archive (user_id);
+
+CREATE TABLE IF NOT EXISTS reminders_archive (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    time VARCHAR(50) NOT NULL,
+    description TEXT,
+    created_at TIMESTAMP,
+    expires_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, user_id)
+);
@@ -0,0 +1,42 @@
+-- Un-doing a checklist item completed the same day now takes the completion
+-- back (queries.py "checklist_toggle"); before, toggling an item off and on
+-- again counted it twice. Recompute the rollups from activity_log with the
+-- same rule: per item and day, a completion if its last toggle left it done,
+-- an uncompletion if its first toggle un-did an earlier day's completion.
+-- Safe to re-run.
+UPDATE activity_daily d
+SET completed = c.completed, uncompleted = c.uncompleted
+FROM (
+    SELECT user_id, day,
+           COUNT(*) FILTER (WHERE last_done) AS completed,
+           COUNT(*) FILTER (WHERE NOT first_done) AS uncompleted
+    FROM (
+        SELECT user_id, day,
+               (array_agg(done ORDER BY id DESC))[1] AS last_done,
+               (array_agg(done ORDER BY id))[1] AS first_done
+        FROM activity_log
+        GROUP BY user_id, day, checklist_item_id, workout_id
+    ) items
+    GROUP BY user_id, day
+) c
+WHERE d.user_id = c.user_id AND d.day = c.day;
+
+UPDATE activity_weekly w
+SET completed = c.completed, uncompleted = c.uncompleted, active_days = c.active_days
+FROM (
+    SELECT user_id, date_trunc('week', day)::date AS week,
+           SUM(completed) AS completed, SUM(uncompleted) AS uncompleted,
+           COUNT(*) FILTER (WHERE completed > 0) AS active_days
+    FROM activity_daily
+    GROUP BY user_id, date_trunc('week', day)::date
+) c
+WHERE w.user_id = c.user_id AND w.week = c.week;
+
+UPDATE activity_summary s
+SET completed = c.completed, uncompleted = c.uncompleted
+FROM (
+    SELECT user_id, SUM(completed) AS completed, SUM(uncompleted) AS uncompleted
+    FROM activity_daily
+    GROUP BY user_id
+) c
+WHERE s.user_id = c.user_id;
@@ -0,0 +1,5 @@
+-- Registration writes the default gestures inline since the pipelined
+-- rewrite, and the gestures.create_defaults handler is gone: queued jobs of
+-- that kind can never run. (Since migration 007 defaults aren't copied per
+-- user at all.)
+DELETE FROM jobs WHERE kind = 'gestures.create_defaults';
@@ -0,0 +1,19 @@
+-- updated_at on the tables whose rows change after insert, so
+-- scripts/export.py can export them incrementally by last change instead of
+-- by id. Every UPDATE of these tables in queries.py sets it.
+--
+-- The new columns get a constant default for existing rows (no table
+-- rewrite): they count as changed now and go out once more with the next
+-- export. Existing payments take their last known change.
+ALTER TABLE workouts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE checklist_items ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT NOW();
+
+UPDATE payments SET updated_at = COALESCE(paid_at, created_at, NOW()) WHERE updated_at IS NULL;
+ALTER TABLE payments ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE payments ALTER COLUMN updated_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_workouts_updated_at ON workouts (updated_at);
+CREATE INDEX IF NOT EXISTS idx_checklist_items_updated_at ON checklist_items (updated_at);
+CREATE INDEX IF NOT EXISTS idx_reminders_updated_at ON reminders (updated_at);
+CREATE INDEX IF NOT EXISTS idx_payments_updated_at ON payments (updated_at);
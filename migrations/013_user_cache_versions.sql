@@ -0,0 +1,11 @@
+-- Per-user versions of the response caches (utils/user_cache.py). They were
+-- kept in each host's local_store, so an invalidation from the job worker
+-- (retention) or another host never reached the hosts holding the old body.
+-- Logged on purpose: losing versions in a crash would make stale bodies
+-- current again.
+CREATE TABLE IF NOT EXISTS user_cache_versions (
+    cache TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    version BIGINT NOT NULL,
+    PRIMARY KEY (cache, user_id)
+);
@@ -0,0 +1,622 @@
+# queries.py
+"""Registry of hot-path SQL.
+
+Every statement the request handlers run is defined here once, by name, and
+executed through ``run()`` as a server-side prepared statement. Pooled
+connections (db.get_conn) keep their prepared statements between requests,
+so each statement is parsed and planned once per connection instead of once
+per call. Set DB_PREPARE=0 when going through a transaction-mode pooler that
+cannot keep prepared statements.
+"""
+import os
+from itertools import combinations
+
+PREPARE = os.getenv("DB_PREPARE", "1") != "0"
+
+_LIBRARY_LIST = """
+    SELECT
+        id AS workout_id, NULL::integer AS saved_id,
+        name, description, equipment, image_url,
+        NULL AS instructions, NULL AS muscles, NULL AS type, NULL AS level,
+        'created' AS source
+    FROM workouts
+    WHERE user_id = %s {equipment_filter}
+
+    UNION ALL
+
+    SELECT
+        NULL::integer AS workout_id, id AS saved_id,
+        name, description, equipment, NULL AS image_url,
+        instructions, muscles, type, level,
+        'saved' AS source
+    FROM saved_workouts
+    WHERE user_id = %s {equipment_filter}
+
+    ORDER BY source DESC, name
+"""
+
+# Deletes up to %(batch)s of the user's rows; returns (rows deleted, the
+# non-NULL `returning` values of those rows)
+_DELETE_BATCH = """
+    WITH gone AS (
+        DELETE FROM {table}
+        WHERE id IN (
+            SELECT id FROM {table}
+            WHERE user_id = %(user_id)s {id_filter}
+            ORDER BY id
+            LIMIT %(batch)s
+        )
+        RETURNING {returning} AS asset
+    )
+    SELECT COUNT(*), COALESCE(array_agg(asset) FILTER (WHERE asset IS NOT NULL), '{{}}')
+    FROM gone
+"""
+
+QUERIES = {
+    # ---------------- AUTH ----------------
+    "user_conflicts": """
+        SELECT username, email, reg_number
+        FROM users
+        WHERE username=%s OR email=%s OR reg_number=%s
+    """,
+    # Any unique conflict returns no row (user_conflicts then says which
+    # field clashed). New users start on default_gestures: nothing to copy.
+    "user_register": """
+        INSERT INTO users (username, password, name, reg_number, email)
+        VALUES (%(username)s, %(password)s, %(name)s, %(reg_number)s, %(email)s)
+        ON CONFLICT DO NOTHING
+        RETURNING id
+    """,
+    "user_credentials": "SELECT id, password FROM users WHERE username=%s",
+    "user_profile": """
+        SELECT u.id, u.username, u.name, u.email, u.reg_number, u.created_at,
+               EXISTS (SELECT 1 FROM payments p
+                       WHERE p.user_id = u.id AND p.status = 'success' AND p.type = 'subscription')
+                   AS subscribed
+        FROM users u
+        WHERE u.id = %s
+    """,
+
+    # ---------------- PUBLIC CATALOG ----------------
+    "catalog_by_ids": """
+        SELECT id, name, equipment, type, muscles, level
+        FROM public_workouts
+        WHERE id = ANY(%s)
+    """,
+    "catalog_index_rows": "SELECT id, equipment, muscles, type, level FROM public_workouts",
+    "saved_profile": "SELECT public_workout_id, muscles, type, level FROM saved_workouts WHERE user_id=%s",
+    # Saves every requested catalog workout in one statement. %(overrides)s is
+    # a JSON object keyed by catalog id: {"<id>": {"name", "description",
+    # "equipment": [...]}}. Returns the new rows plus the user's existing
+    # saves of the same ids (created = false).
+    "saved_insert_many": """
+        WITH picked AS (
+            SELECT p.id,
+                   COALESCE(NULLIF(o.value->>'name', ''), p.name) AS name,
+                   COALESCE(NULLIF(o.value->>'description', ''), p.instructions, '') AS description,
+                   CASE WHEN o.value ? 'equipment'
+                        THEN ARRAY(SELECT jsonb_array_elements_text(o.value->'equipment'))
+                        ELSE p.equipment END AS equipment,
+                   p.type, p.muscles, p.level
+            FROM public_workouts p
+            LEFT JOIN jsonb_each(%(overrides)s::jsonb) AS o ON o.key = p.id::text
+            WHERE p.id = ANY(%(ids)s)
+        ), inserted AS (
+            INSERT INTO saved_workouts
+                (user_id, public_workout_id, name, description, equipment, type, muscles, level)
+            SELECT %(user_id)s, id, name, description, equipment, type, COALESCE(muscles, '{}'), level
+            FROM picked
+            ORDER BY id
+            ON CONFLICT (user_id, public_workout_id) DO NOTHING
+            RETURNING id, public_workout_id, name, description, equipment
+        )
+        SELECT id, public_workout_id, name, description, equipment, true AS created FROM inserted
+        UNION ALL
+        SELECT id, public_workout_id, name, description, equipment, false
+        FROM saved_workouts
+        WHERE user_id = %(user_id)s AND public_workout_id = ANY(%(ids)s)
+        ORDER BY public_workout_id
+    """,
+
+    # ---------------- WORKOUTS ----------------
+    # Subscription check, workout and checklist in one statement; no row
+    # back means no active subscription (and nothing was written).
+    "workout_create": """
+        WITH w AS (
+            INSERT INTO workouts (name, description, equipment, user_id, image_url, public_id)
+            SELECT %(name)s, %(description)s, %(equipment)s, %(user_id)s, %(image_url)s, %(public_id)s
+            WHERE EXISTS (
+                SELECT 1 FROM payments
+                WHERE user_id = %(user_id)s AND status = 'success' AND type = 'subscription'
+            )
+            RETURNING id
+        ), items AS (
+            INSERT INTO checklist_items (task, done, workout_id)
+            SELECT c.task, c.done, w.id
+            FROM w, unnest(%(tasks)s::text[], %(done)s::boolean[]) WITH ORDINALITY AS c(task, done, n)
+            ORDER BY c.n
+        )
+        SELECT id FROM w
+    """,
+    "workout_owner": "SELECT user_id, public_id FROM workouts WHERE id=%s",
+    # One shape for every partial update: NULL means "leave unchanged"
+    "workout_update": """
+        UPDATE workouts
+        SET name = COALESCE(%s, name),
+            description = COALESCE(%s, description),
+            equipment = COALESCE(%s, equipment),
+            image_url = COALESCE(%s, image_url),
+            public_id = COALESCE(%s, public_id),
+            updated_at = NOW()
+        WHERE id = %s
+    """,
+    "library_list": _LIBRARY_LIST.format(equipment_filter=""),
+    # ?equipment=a,b: only workouts needing all of them (GIN on equipment)
+    "library_list_equipment": _LIBRARY_LIST.format(equipment_filter="AND equipment @> %s::text[]"),
+    # Bulk delete, one bounded batch per statement (utils/bulk_delete.py).
+    # Checklist items go with their workout (ON DELETE CASCADE).
+    "workouts_delete_batch": _DELETE_BATCH.format(
+        table="workouts", id_filter="", returning="public_id"),
+    "workouts_delete_batch_ids": _DELETE_BATCH.format(
+        table="workouts", id_filter="AND id = ANY(%(ids)s)", returning="public_id"),
+    "saved_delete_batch": _DELETE_BATCH.format(
+        table="saved_workouts", id_filter="", returning="NULL::text"),
+    "saved_delete_batch_ids": _DELETE_BATCH.format(
+        table="saved_workouts", id_filter="AND id = ANY(%(ids)s)", returning="NULL::text"),
+
+    # ---------------- CHECKLIST ----------------
+    "checklist_insert_many": """
+        INSERT INTO checklist_items (task, done, workout_id)
+        SELECT c.task, c.done, %(workout_id)s
+        FROM unnest(%(tasks)s::text[], %(done)s::boolean[]) WITH ORDINALITY AS c(task, done, n)
+        ORDER BY c.n
+    """,
+    "checklist_for_workouts": """
+        SELECT id, task, done, workout_id
+        FROM checklist_items
+        WHERE workout_id = ANY(%s)
+        ORDER BY id
+    """,
+    # Same rows as checklist_for_workouts over the user's whole library, so it
+    # does not have to wait for library_list
+    "checklist_for_user": """
+        SELECT ci.id, ci.task, ci.done, ci.workout_id
+        FROM checklist_items ci
+        JOIN workouts w ON w.id = ci.workout_id
+        WHERE w.user_id = %s
+        ORDER BY ci.id
+    """,
+    "checklist_delete_for_workout": "DELETE FROM checklist_items WHERE workout_id=%s",
+    # Toggles the item if the user owns it and, in the same statement, appends
+    # to activity_log and bumps the user's daily/weekly/summary rollups (see
+    # migrations/004). Un-doing an item completed the same day takes the
+    # completion back instead of counting an uncompletion, so toggling an
+    # item off and on again counts it once (`prior` reads the log as it was
+    # before this statement; a day spans at most 25 hours of created_at,
+    # which keeps the lookup on the (user_id, created_at) index). The streak
+    # keeps a day whose completions were all taken back. No row back means
+    # not found or not the user's.
+    "checklist_toggle": """
+        WITH toggled AS (
+            UPDATE checklist_items
+            SET done = NOT done,
+                completed_at = CASE WHEN done THEN NULL ELSE NOW() END,
+                updated_at = NOW()
+            WHERE id = %(item_id)s
+              AND workout_id IN (SELECT id FROM workouts WHERE user_id = %(user_id)s)
+            RETURNING id, done, workout_id, (NOW() AT TIME ZONE %(tz)s)::date AS day
+        ), prior AS (
+            SELECT t.done, t.day,
+                   CASE WHEN t.done THEN 1 WHEN EXISTS (
+                       SELECT 1 FROM activity_log l
+                       WHERE l.user_id = %(user_id)s AND l.created_at > NOW() - INTERVAL '25 hours'
+                         AND l.checklist_item_id = t.id AND l.workout_id = t.workout_id
+                         AND l.day = t.day AND l.done
+                   ) THEN -1 ELSE 0 END AS completed
+            FROM toggled t
+        ), delta AS (
+            SELECT day, done, completed, (completed = 0)::int AS uncompleted FROM prior
+        ), log AS (
+            INSERT INTO activity_log (user_id, checklist_item_id, workout_id, done, day)
+            SELECT %(user_id)s, id, workout_id, done, day FROM toggled
+        ), daily AS (
+            INSERT INTO activity_daily AS d (user_id, day, completed, uncompleted)
+            SELECT %(user_id)s, day, completed, uncompleted FROM delta
+            ON CONFLICT (user_id, day) DO UPDATE
+            SET completed = d.completed + EXCLUDED.completed,
+                uncompleted = d.uncompleted + EXCLUDED.uncompleted
+            RETURNING day, completed
+        ), weekly AS (
+            INSERT INTO activity_weekly AS w (user_id, week, completed, uncompleted, active_days)
+            SELECT %(user_id)s, date_trunc('week', x.day)::date, x.completed, x.uncompleted,
+                   CASE WHEN x.completed = 1 AND d.completed = 1 THEN 1
+                        WHEN x.completed = -1 AND d.completed = 0 THEN -1 ELSE 0 END
+            FROM delta x, daily d
+            ON CONFLICT (user_id, week) DO UPDATE
+            SET completed = w.completed + EXCLUDED.completed,
+                uncompleted = w.uncompleted + EXCLUDED.uncompleted,
+                active_days = w.active_days + EXCLUDED.active_days
+        ), summary AS (
+            INSERT INTO activity_summary AS s
+                (user_id, completed, uncompleted, current_streak, longest_streak, last_active_day)
+            SELECT %(user_id)s, completed, uncompleted, done::int, done::int,
+                   CASE WHEN done THEN day END
+            FROM delta
+            ON CONFLICT (user_id) DO UPDATE
+            SET completed = s.completed + EXCLUDED.completed,
+                uncompleted = s.uncompleted + EXCLUDED.uncompleted,
+                current_streak = CASE
+                    WHEN EXCLUDED.last_active_day IS NULL
+                      OR s.last_active_day >= EXCLUDED.last_active_day THEN s.current_streak
+                    WHEN s.last_active_day = EXCLUDED.last_active_day - 1 THEN s.current_streak + 1
+                    ELSE 1 END,
+                longest_streak = GREATEST(s.longest_streak, CASE
+                    WHEN EXCLUDED.last_active_day IS NULL
+                      OR s.last_active_day >= EXCLUDED.last_active_day THEN s.current_streak
+                    WHEN s.last_active_day = EXCLUDED.last_active_day - 1 THEN s.current_streak + 1
+                    ELSE 1 END),
+                last_active_day = GREATEST(s.last_active_day, EXCLUDED.last_active_day)
+        )
+        SELECT id, done FROM toggled
+    """,
+
+    # ---------------- PAYMENTS ----------------
+    "payment_insert": """
+        INSERT INTO payments (user_id, amount, currency, status, type, paid_at)
+        VALUES (%s, %s, %s, %s, %s, NOW())
+        RETURNING id, amount, status
+    """,
+    # Webhook inbox (utils/payments.py): the handler's only statement
+    "payment_event_insert": "INSERT INTO payment_events (payload) VALUES (%s::jsonb)",
+    "payment_events_claim": """
+        SELECT id, payload FROM payment_events
+        WHERE processed_at IS NULL
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    """,
+    # One row per reference (deduplicated by the caller). A status only moves
+    # forward along %(order)s, so replayed or out-of-order events are no-ops.
+    # The user comes from metadata.user_id, else the customer email. Returns
+    # every reference with whether a user matched and whether it changed
+    # payments.
+    "payments_apply_events": """
+        WITH e AS (
+            SELECT e.*, u.id AS matched_user_id
+            FROM unnest(%(references)s::text[], %(user_ids)s::int[], %(emails)s::text[],
+                        %(amounts)s::numeric[], %(currencies)s::text[], %(statuses)s::text[],
+                        %(types)s::text[], %(paid_at)s::timestamp[])
+                 AS e(reference, user_id, email, amount, currency, status, type, paid_at)
+            LEFT JOIN users u
+                   ON u.id = COALESCE(e.user_id, (SELECT x.id FROM users x WHERE x.email = e.email))
+        ), applied AS (
+            INSERT INTO payments (user_id, amount, currency, status, type, reference, paid_at)
+            SELECT matched_user_id, amount, currency, status, type, reference, paid_at
+            FROM e WHERE matched_user_id IS NOT NULL
+            ON CONFLICT (user_id, reference) DO UPDATE
+            SET status = EXCLUDED.status,
+                paid_at = COALESCE(EXCLUDED.paid_at, payments.paid_at),
+                updated_at = NOW()
+            WHERE array_position(%(order)s::text[], EXCLUDED.status)
+                  > COALESCE(array_position(%(order)s::text[], payments.status), 0)
+            RETURNING reference
+        )
+        SELECT e.reference, e.matched_user_id IS NOT NULL, a.reference IS NOT NULL
+        FROM e LEFT JOIN applied a ON a.reference = e.reference
+    """,
+    "payment_events_done": """
+        UPDATE payment_events p
+        SET processed_at = NOW(), error = e.error
+        FROM unnest(%s::bigint[], %s::text[]) AS e(id, error)
+        WHERE p.id = e.id
+    """,
+
+    # ---------------- IDEMPOTENCY KEYS ----------------
+    # Claims a key unless a live record exists; expired records and stale
+    # in-flight claims (crashed worker) are taken over.
+    "idempotency_claim": """
+        INSERT INTO idempotency_keys AS k (user_id, key, request_hash, expires_at)
+        VALUES (%(user_id)s, %(key)s, %(hash)s, NOW() + %(ttl)s * INTERVAL '1 second')
+        ON CONFLICT (user_id, key) DO UPDATE
+        SET request_hash = EXCLUDED.request_hash,
+            status_code = NULL,
+            response_body = NULL,
+            content_type = NULL,
+            created_at = NOW(),
+            expires_at = EXCLUDED.expires_at
+        WHERE k.expires_at < NOW()
+           OR (k.status_code IS NULL AND k.created_at < NOW() - %(lock)s * INTERVAL '1 second')
+        RETURNING 1
+    """,
+    "idempotency_get": """
+        SELECT request_hash, status_code, response_body, content_type
+        FROM idempotency_keys
+        WHERE user_id = %s AND key = %s
+    """,
+    "idempotency_store": """
+        UPDATE idempotency_keys
+        SET status_code = %s, response_body = %s, content_type = %s
+        WHERE user_id = %s AND key = %s
+    """,
+    "idempotency_release": "DELETE FROM idempotency_keys WHERE user_id = %s AND key = %s",
+    "idempotency_purge": "DELETE FROM idempotency_keys WHERE expires_at < NOW()",
+
+    # ---------------- GESTURES (routes/gestures.py) ----------------
+    # Defaults with the user's overrides on top; one index probe on
+    # (user_id, name) per default
+    "gestures_for_user": """
+        SELECT d.name, COALESCE(g.action, d.action) AS action, d.action AS default_action,
+               g.action IS NOT NULL AS overridden
+        FROM default_gestures d
+        LEFT JOIN gestures g ON g.user_id = %s AND g.name = d.name
+        ORDER BY d.name
+    """,
+    # Setting a gesture back to its default action removes the override
+    # instead of storing a copy. No row back means no such gesture.
+    "gesture_set": """
+        WITH d AS (
+            SELECT name, action FROM default_gestures WHERE name = %(name)s
+        ), cleared AS (
+            DELETE FROM gestures g USING d
+            WHERE g.user_id = %(user_id)s AND g.name = d.name AND d.action = %(action)s
+        ), stored AS (
+            INSERT INTO gestures (user_id, name, action)
+            SELECT %(user_id)s, d.name, %(action)s FROM d WHERE d.action <> %(action)s
+            ON CONFLICT (user_id, name) DO UPDATE SET action = EXCLUDED.action
+        )
+        SELECT name FROM d
+    """,
+    "gesture_reset": """
+        WITH removed AS (
+            DELETE FROM gestures WHERE user_id = %(user_id)s AND name = %(name)s
+        )
+        SELECT name FROM default_gestures WHERE name = %(name)s
+    """,
+
+    # ---------------- REMINDERS ----------------
+    "reminder_insert": """
+        INSERT INTO reminders (user_id, time, description, expires_at)
+        VALUES (%s, %s, %s, %s)
+        RETURNING id
+    """,
+    "reminder_delete": "DELETE FROM reminders WHERE id=%s AND user_id=%s RETURNING id",
+    "reminder_update": """
+        UPDATE reminders
+        SET time = COALESCE(%s, time),
+            description = COALESCE(%s, description),
+            expires_at = CASE WHEN %s THEN %s ELSE expires_at END,  -- set or cleared when sent
+            updated_at = NOW()
+        WHERE id = %s AND user_id = %s
+        RETURNING id
+    """,
+    # Expired reminders stay hidden until utils.retention archives them
+    "reminder_list": """
+        SELECT id, time, description, expires_at
+        FROM reminders
+        WHERE user_id = %s AND (expires_at IS NULL OR expires_at > NOW())
+        ORDER BY time ASC
+    """,
+
+    # ---------------- RETENTION (utils/retention.py) ----------------
+    # Move one bounded batch to the cold archive per statement. SKIP LOCKED
+    # leaves rows a request is updating for the next batch.
+    # Whole checklists of finished workouts only: every item done, the last
+    # one longer ago than the cutoff. An item left undone (or done before
+    # completed_at existed) keeps the checklist live. The candidates' items
+    # are locked first and the check is repeated on the locked rows (FOR
+    # UPDATE sees the latest committed version): a checklist with an item
+    # being toggled right now, or un-checked since the snapshot, is left
+    # whole rather than half archived.
+    "checklist_archive_batch": """
+        WITH candidates AS (
+            SELECT DISTINCT c.workout_id FROM checklist_items c
+            WHERE c.done AND c.completed_at < NOW() - %(age)s * INTERVAL '1 second'
+              AND NOT EXISTS (
+                  SELECT 1 FROM checklist_items o
+                  WHERE o.workout_id = c.workout_id
+                    AND (o.done IS NOT TRUE OR o.completed_at IS NULL
+                         OR o.completed_at >= NOW() - %(age)s * INTERVAL '1 second')
+              )
+            LIMIT %(limit)s
+        ), locked AS (
+            SELECT ci.id, ci.workout_id, ci.done, ci.completed_at FROM checklist_items ci
+            WHERE ci.workout_id IN (SELECT workout_id FROM candidates)
+            FOR UPDATE SKIP LOCKED
+        ), finished AS (
+            SELECT l.workout_id FROM locked l
+            GROUP BY l.workout_id
+            HAVING bool_and(l.done IS TRUE AND l.completed_at < NOW() - %(age)s * INTERVAL '1 second')
+               AND COUNT(*) = (SELECT COUNT(*) FROM checklist_items a WHERE a.workout_id = l.workout_id)
+        ), moved AS (
+            DELETE FROM checklist_items ci
+            USING locked l JOIN finished f ON f.workout_id = l.workout_id
+            WHERE ci.id = l.id AND ci.workout_id = l.workout_id
+            RETURNING ci.id, ci.workout_id, ci.task, ci.done, ci.completed_at
+        )
+        INSERT INTO checklist_items_archive (id, workout_id, user_id, task, done, completed_at)
+        SELECT m.id, m.workout_id, w.user_id, m.task, m.done, m.completed_at
+        FROM moved m LEFT JOIN workouts w ON w.id = m.workout_id
+        RETURNING user_id
+    """,
+    "reminders_archive_batch": """
+        WITH moved AS (
+            DELETE FROM reminders r
+            USING (
+                SELECT id, user_id FROM reminders
+                WHERE expires_at < NOW() - %(age)s * INTERVAL '1 second'
+                LIMIT %(limit)s
+                FOR UPDATE SKIP LOCKED
+            ) old
+            WHERE r.id = old.id AND r.user_id = old.user_id
+            RETURNING r.id, r.user_id, r.time, r.description, r.created_at, r.expires_at
+        )
+        INSERT INTO reminders_archive (id, user_id, time, description, created_at, expires_at)
+        SELECT id, user_id, time, description, created_at, expires_at FROM moved
+        RETURNING user_id
+    """,
+
+    # ---------------- JOB QUEUE (utils/jobs.py) ----------------
+    "job_enqueue": """
+        INSERT INTO jobs (kind, payload, run_at, max_attempts, dedupe_key)
+        VALUES (%(kind)s, %(payload)s, NOW() + %(delay)s * INTERVAL '1 second',
+                %(max_attempts)s, %(dedupe_key)s)
+        ON CONFLICT (dedupe_key) DO NOTHING
+        RETURNING id
+    """,
+    "job_lock_kind": "SELECT pg_try_advisory_xact_lock(hashtext('jobs:' || %s))",
+    "job_running_count": """
+        SELECT COUNT(*) FROM jobs
+        WHERE kind = %s AND locked_at > NOW() - %s * INTERVAL '1 second'
+    """,
+    # Unlocked jobs, plus claims whose worker has gone quiet for too long
+    "job_claim": """
+        UPDATE jobs
+        SET locked_at = NOW(), locked_by = %(worker)s, attempts = attempts + 1
+        WHERE id IN (
+            SELECT id FROM jobs
+            WHERE kind = %(kind)s AND run_at <= NOW()
+              AND (locked_at IS NULL OR locked_at < NOW() - %(lock)s * INTERVAL '1 second')
+            ORDER BY run_at
+            LIMIT %(limit)s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, payload, attempts, max_attempts
+    """,
+    "job_done": "DELETE FROM jobs WHERE id = %s",
+    "job_retry": """
+        UPDATE jobs
+        SET locked_at = NULL, locked_by = NULL, last_error = %(error)s,
+            run_at = NOW() + %(delay)s * INTERVAL '1 second'
+        WHERE id = %(id)s
+    """,
+    "job_bury": """
+        WITH dead AS (DELETE FROM jobs WHERE id = %(id)s RETURNING *)
+        INSERT INTO dead_jobs (id, kind, payload, attempts, last_error, created_at)
+        SELECT id, kind, payload, attempts, %(error)s, created_at FROM dead
+    """,
+
+    # ---------------- RESUMABLE UPLOADS (routes/uploads.py) ----------------
+    "upload_create": """
+        INSERT INTO uploads (id, user_id, filename, content_type, size, expires_at)
+        VALUES (%(id)s, %(user_id)s, %(filename)s, %(content_type)s, %(size)s,
+                NOW() + %(ttl)s * INTERVAL '1 second')
+        RETURNING expires_at
+    """,
+    "upload_get": """
+        SELECT status, size, workout_id, image_url, public_id, expires_at
+        FROM uploads
+        WHERE id = %s AND user_id = %s AND expires_at > NOW()
+    """,
+    # Marks the upload complete and points the user's workout at the new
+    # image in one statement; no row back means the upload was already
+    # completed or the workout isn't the user's. Returns the replaced image.
+    "upload_attach": """
+        WITH upload AS (
+            UPDATE uploads
+            SET status = 'complete', workout_id = %(workout_id)s,
+                image_url = %(image_url)s, public_id = %(public_id)s
+            WHERE id = %(id)s AND user_id = %(user_id)s AND status = 'open'
+              AND EXISTS (SELECT 1 FROM workouts WHERE id = %(workout_id)s AND user_id = %(user_id)s)
+            RETURNING workout_id
+        ), old AS (
+            SELECT w.id, w.public_id FROM workouts w JOIN upload u ON u.workout_id = w.id
+            FOR UPDATE OF w
+        )
+        UPDATE workouts w
+        SET image_url = %(image_url)s, public_id = %(public_id)s, updated_at = NOW()
+        FROM old WHERE w.id = old.id
+        RETURNING old.public_id
+    """,
+    "upload_delete": "DELETE FROM uploads WHERE id = %s AND user_id = %s AND status = 'open' RETURNING id",
+    "upload_purge": "DELETE FROM uploads WHERE expires_at < NOW() RETURNING id",
+
+    # ---------------- ACTIVITY STATS ----------------
+    # A streak is only current if the user was active today or yesterday
+    "activity_summary": """
+        SELECT completed, uncompleted,
+               CASE WHEN last_active_day >= (NOW() AT TIME ZONE %(tz)s)::date - 1
+                    THEN current_streak ELSE 0 END,
+               longest_streak, last_active_day
+        FROM activity_summary
+        WHERE user_id = %(user_id)s
+    """,
+    # Dense series ending at the current period: one row per period, zeros
+    # where nothing happened. Each row is a primary-key lookup.
+    "activity_daily_range": """
+        WITH today AS (SELECT (NOW() AT TIME ZONE %(tz)s)::date AS d)
+        SELECT p.day::date, COALESCE(a.completed, 0), COALESCE(a.uncompleted, 0)
+        FROM today,
+             generate_series(today.d - (%(periods)s - 1), today.d, INTERVAL '1 day') AS p(day)
+        LEFT JOIN activity_daily a ON a.user_id = %(user_id)s AND a.day = p.day::date
+        ORDER BY p.day
+    """,
+    "activity_weekly_range": """
+        WITH this_week AS (SELECT date_trunc('week', NOW() AT TIME ZONE %(tz)s) AS w)
+        SELECT p.week::date, COALESCE(a.completed, 0), COALESCE(a.uncompleted, 0),
+               COALESCE(a.active_days, 0)
+        FROM this_week,
+             generate_series(this_week.w - (%(periods)s - 1) * INTERVAL '1 week', this_week.w,
+                             INTERVAL '1 week') AS p(week)
+        LEFT JOIN activity_weekly a ON a.user_id = %(user_id)s AND a.week = p.week::date
+        ORDER BY p.week
+    """,
+
+    # ---------------- USER CACHE VERSIONS (utils/user_cache.py) ----------------
+    "user_cache_version": "SELECT version FROM user_cache_versions WHERE cache = %s AND user_id = %s",
+    "user_cache_bump": """
+        INSERT INTO user_cache_versions AS v (cache, user_id, version) VALUES (%s, %s, 1)
+        ON CONFLICT (cache, user_id) DO UPDATE SET version = v.version + 1
+    """,
+
+    # ---------------- RATE LIMITS (utils/rate_limit.py) ----------------
+    # Token bucket refill and take in one UPSERT; `allowed` is stored so
+    # RETURNING can report the decision
+    "rate_limit_take": """
+        INSERT INTO rate_limit_buckets AS b (key, tokens, ts, allowed)
+        VALUES (%(key)s, %(cap)s - 1, %(now)s, true)
+        ON CONFLICT (key) DO UPDATE SET
+            allowed = LEAST(%(cap)s, b.tokens + (%(now)s - b.ts) * %(rate)s) >= 1,
+            tokens = LEAST(%(cap)s, b.tokens + (%(now)s - b.ts) * %(rate)s)
+                     - CASE WHEN LEAST(%(cap)s, b.tokens + (%(now)s - b.ts) * %(rate)s) >= 1
+                            THEN 1 ELSE 0 END,
+            ts = %(now)s
+        RETURNING allowed, tokens
+    """,
+}
+
+
+# ---------------- CATALOG FILTER SHAPES ----------------
+# get_workouts used to concatenate its WHERE clause per call. Instead every
+# combination of the optional filters is registered up front, so the catalog
+# listing only ever uses one of these 8 statements.
+CATALOG_FILTERS = {
+    "type": "LOWER(type) LIKE LOWER(%(type)s)",
+    "muscle": "EXISTS (SELECT 1 FROM unnest(muscles) m WHERE LOWER(m) LIKE LOWER(%(muscle)s))",
+    "level": "LOWER(level) LIKE LOWER(%(level)s)",
+}
+
+_CATALOG_SELECT = """
+    SELECT id, name, equipment, type, muscles, level, instructions
+    FROM public_workouts
+"""
+
+
+def _catalog_name(active):
+    return "catalog_list:" + ("+".join(active) or "all")
+
+
+for _n in range(len(CATALOG_FILTERS) + 1):
+    for _active in combinations(CATALOG_FILTERS, _n):
+        _where = " AND ".join(CATALOG_FILTERS[f] for f in _active)
+        QUERIES[_catalog_name(_active)] = _CATALOG_SELECT + (f"WHERE {_where}" if _where else "")
+
+
+def catalog_query(**filters):
+    """Map optional substring filters to (query name, params)."""
+    active = tuple(f for f in CATALOG_FILTERS if filters.get(f))
+    return _catalog_name(active), {f: f"%{filters[f]}%" for f in active}
+
+
+def run(cur, name, params=None):
+    cur.execute(QUERIES[name], params, prepare=PREPARE)
+    return cur
@@ -0,0 +1,59 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from psycopg import rows
+from db import get_conn, pipeline
+from queries import run
+from utils import user_cache
+from utils.errors import Field, NotFound, validate
+
+gestures_bp = Blueprint("gestures", __name__)
+
+MAX_ACTION_LENGTH = 200
+
+GESTURE_SET = {"action": Field(str, required=True, max_length=MAX_ACTION_LENGTH)}
+
+
+def load_gestures(user_id, readonly=True):
+    with get_conn(readonly=readonly, user_id=user_id) as conn:
+        with conn.cursor(row_factory=rows.dict_row) as cur:
+            run(cur, "gestures_for_user", (user_id,))
+            return {"gestures": cur.fetchall()}
+
+
+# ---------------- GESTURES ----------------
+# Every user sees the shared default_gestures with their own overrides on
+# top. Reads are served from utils.user_cache until the user changes one.
+@gestures_bp.route("/gestures", methods=["GET"])
+@jwt_required()
+def list_gestures():
+    user_id = int(get_jwt_identity())
+    cache = user_cache.gestures
+    return cache.respond(user_id, "", lambda: load_gestures(user_id, readonly=not cache.enabled)), 200
+
+
+@gestures_bp.route("/gestures/<name>", methods=["PUT"])
+@jwt_required()
+@validate(GESTURE_SET)
+def set_gesture(name, body):
+    user_id = int(get_jwt_identity())
+    action = body["action"]
+    with pipeline() as conn:
+        cur = run(conn.cursor(), "gesture_set", {"user_id": user_id, "name": name, "action": action})
+    if cur.fetchone() is None:
+        raise NotFound("Unknown gesture")
+    user_cache.gestures.invalidate(user_id)
+
+    return jsonify({"message": "Gesture updated", "gesture": {"name": name, "action": action}}), 200
+
+
+@gestures_bp.route("/gestures/<name>", methods=["DELETE"])
+@jwt_required()
+def reset_gesture(name):
+    user_id = int(get_jwt_identity())
+    with pipeline() as conn:
+        cur = run(conn.cursor(), "gesture_reset", {"user_id": user_id, "name": name})
+    if cur.fetchone() is None:
+        raise NotFound("Unknown gesture")
+    user_cache.gestures.invalidate(user_id)
+
+    return jsonify({"message": "Gesture reset to default"}), 200
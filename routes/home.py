@@ -0,0 +1,73 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from psycopg import rows
+from db import get_conn
+from queries import run
+from routes.workouts import LIBRARY_FIELDS, build_library
+from utils.equipment import normalize_equipment
+from utils.errors import NotFound
+from utils.payload import parse_fields
+from utils.recommend import get_catalog_index
+
+home_bp = Blueprint("home", __name__)
+
+HOME_RECOMMENDATIONS = 10
+
+
+# ---------------- HOME (everything the app needs on launch) ----------------
+# Replaces /auth/me + /users/workouts + /api/reminders + /public/workouts on
+# cold open. The independent reads are sent in one pipeline on one
+# connection, so they cost about one round trip instead of one each.
+@home_bp.route("/home", methods=["GET"])
+@jwt_required()
+def home():
+    # ?fields= applies to the library items, as on /users/workouts
+    fields = parse_fields(LIBRARY_FIELDS)
+    equipment = normalize_equipment(request.args.get("equipment"))
+
+    user_id = int(get_jwt_identity())
+
+    with get_conn(readonly=True, user_id=user_id) as conn:
+        profile_cur = conn.cursor(row_factory=rows.dict_row)
+        library_cur = conn.cursor(row_factory=rows.dict_row)
+        checklist_cur = conn.cursor(row_factory=rows.dict_row)
+        reminders_cur = conn.cursor()
+        saved_cur = conn.cursor()
+        with conn.pipeline():
+            run(profile_cur, "user_profile", (user_id,))
+            run(library_cur, "library_list", (user_id, user_id))
+            run(checklist_cur, "checklist_for_user", (user_id,))
+            run(reminders_cur, "reminder_list", (user_id,))
+            run(saved_cur, "saved_profile", (user_id,))
+
+        profile = profile_cur.fetchone()
+        if profile is None:
+            raise NotFound("User not found")
+        library = build_library(library_cur.fetchall(), checklist_cur.fetchall(), fields)
+        reminders = [
+            {"id": r[0], "time": r[1], "description": r[2], "expires_at": r[3]}
+            for r in reminders_cur.fetchall()
+        ]
+
+        # Ranking is in memory; only the top items' details need a query
+        ranked = get_catalog_index().recommend(
+            equipment, saved_cur.fetchall(), limit=HOME_RECOMMENDATIONS
+        )
+        details = {}
+        if ranked:
+            with conn.cursor(row_factory=rows.dict_row) as cur:
+                run(cur, "catalog_by_ids", ([wid for wid, _ in ranked],))
+                details = {w["id"]: w for w in cur.fetchall()}
+
+    recommended = [
+        {**details[wid], "score": round(score, 3)}
+        for wid, score in ranked if wid in details
+    ]
+    profile["id"] = str(profile["id"])  # same shape as /auth/me
+
+    return jsonify({
+        "profile": profile,
+        "workouts": library,
+        "reminders": reminders,
+        "recommended": recommended,
+    }), 200
@@ -1,17 +1,42 @@
-import os
 import json
 import psycopg
-from flask import Blueprint, jsonify, request, current_app
+from psycopg.types.json import Jsonb
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import (
     get_jwt_identity,
     verify_jwt_in_request,
     jwt_required,
 )
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 from utils.generate_checklist import generate_checklist
-from db import get_conn
+from utils.equipment import normalize_equipment
+from utils.payload import parse_fields, to_columns
+from utils.idempotency import idempotent
+from utils.recommend import get_catalog_index
+from utils import user_cache
+from utils.errors import (
+    Conflict,
+    Field,
+    LengthRequired,
+    PayloadTooLarge,
+    Unauthorized,
+    ValidationError,
+    validate,
+)
+from utils.payments import PAYMENT_WEBHOOK_MAX_BYTES, verify_signature
+from db import get_conn, pipeline
+from queries import run, catalog_query
 
 public_bp = Blueprint("public_api", __name__)
-DB_URL = os.getenv("DATABASE_URL")
+
+# Column order of the catalog listing rows (see queries.catalog_query)
+CATALOG_COLUMNS = ["id", "name", "equipment", "type", "muscles", "level", "instructions"]
+
+DUMMY_PAYMENT = {
+    "email": Field(str, required=True),
+    "amount": Field(float, required=True),
+}
 
 
 # ---------------------------------------------------
@@ -29,7 +54,7 @@ def get_request_data():
         try:
             data = json.loads(request.data)
             return data if isinstance(data, dict) else None
-        except Exception:
+        except ValueError:
             pass
 
     return None
@@ -42,227 +67,199 @@ def get_workouts():
     try:
         verify_jwt_in_request(optional=True)
         user_id = get_jwt_identity()  # string or None
-    except Exception:
+    except (JWTExtendedException, PyJWTError):
         user_id = None
 
     type_filter = request.args.get("type")
     muscle_filter = request.args.get("muscle")
     level_filter = request.args.get("level")
 
+    # ?fields=id,name,... drops unused columns (e.g. instructions) from rows;
+    # ?format=columnar returns one array per column instead of one per row
+    fields = parse_fields(CATALOG_COLUMNS)
+    fmt = request.args.get("format", "rows")
+    if fmt not in ("rows", "columnar"):
+        raise ValidationError("format must be 'rows' or 'columnar'")
+
+    with get_conn(readonly=True, user_id=user_id) as conn:
+        with conn.cursor() as cur:
+            name, params = catalog_query(
+                type=type_filter, muscle=muscle_filter, level=level_filter
+            )
+            run(cur, name, params)
+            workouts = cur.fetchall()
+
+    columns = CATALOG_COLUMNS
+    if fields is not None:
+        idx = [CATALOG_COLUMNS.index(f) for f in fields]
+        workouts = [[w[i] for i in idx] for w in workouts]
+        columns = fields
+
+    return jsonify({
+        "user_id": user_id,
+        "count": len(workouts),
+        "columns": columns,
+        "workouts": to_columns(workouts, columns) if fmt == "columnar" else workouts,
+    }), 200
+
+
+# ---------------- RECOMMENDED PUBLIC WORKOUTS ----------------
+@public_bp.route("/workouts/recommended", methods=["GET"])
+def recommend_workouts():
+    user_id = None
     try:
-        # Validate DB_URL
-        if not DB_URL:
-            raise RuntimeError("DATABASE_URL environment variable is not set")
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        user_id = None
 
-        # Correct flat parameter usage
-        form_data = request.form.to_dict(flat=False)
+    # ?equipment=dumbbell,mat  ?level=beginner  ?limit=20
+    equipment = normalize_equipment(request.args.get("equipment"))
+    level = request.args.get("level")
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+    except ValueError:
+        raise ValidationError("limit must be an integer")
 
-        # Correct row factory usage
-        with psycopg.connect(DB_URL, autocommit=True) as conn:
+    saved = []
+    if user_id is not None:
+        with get_conn(readonly=True, user_id=user_id) as conn:
             with conn.cursor() as cur:
+                run(cur, "saved_profile", (int(user_id),))
+                saved = cur.fetchall()
 
-                query = """
-                    SELECT id, name, equipment, type, muscles, level, instructions
-                    FROM public_workouts
-                    WHERE 1=1
-                """
-                params = []
+    ranked = get_catalog_index().recommend(equipment, saved, level, limit)
 
-                if type_filter:
-                    query += " AND LOWER(type) LIKE LOWER(%s)"
-                    params.append(f"%{type_filter}%")
-
-                if muscle_filter:
-                    query += """
-                        AND EXISTS (
-                            SELECT 1 FROM unnest(muscles) m
-                            WHERE LOWER(m) LIKE LOWER(%s)
-                        )
-                    """
-                    params.append(f"%{muscle_filter}%")
-
-                if level_filter:
-                    query += " AND LOWER(level) LIKE LOWER(%s)"
-                    params.append(f"%{level_filter}%")
+    details = {}
+    if ranked:
+        with get_conn(readonly=True, user_id=user_id) as conn:
+            with conn.cursor(row_factory=psycopg.rows.dict_row) as cur:
+                run(cur, "catalog_by_ids", ([wid for wid, _ in ranked],))
+                details = {w["id"]: w for w in cur.fetchall()}
 
-                cur.execute(query, params)
-                workouts = cur.fetchall()
+    workouts = [
+        {**details[wid], "score": round(score, 3)}
+        for wid, score in ranked if wid in details
+    ]
+    return jsonify({
+        "user_id": user_id,
+        "count": len(workouts),
+        "workouts": workouts,
+    }), 200
 
-        return jsonify({
-            "user_id": user_id,
-            "count": len(workouts),
-            "workouts": workouts,
-        }), 200
 
-    except Exception as e:
-        current_app.logger.exception("Error fetching public workouts")
-        return jsonify({"error": "database error", "detail": str(e)}), 500
+# ---------------- SAVE PUBLIC WORKOUT(S) ----------------
+def save_request(public_workout_id=None, **_):
+    """Body (JSON or form) -> catalog ids to save and their overrides."""
+    data = get_request_data() or {}
+
+    # Require body if no URL ID
+    if not data and public_workout_id is None:
+        raise ValidationError("Request body required")
+
+    # Determine list of workout IDs
+    if public_workout_id is not None:
+        workout_ids = [public_workout_id]
+    else:
+        workout_ids = data.get("workout_ids", [])
+        if isinstance(workout_ids, int):
+            workout_ids = [workout_ids]
+        if not isinstance(workout_ids, list):
+            raise ValidationError("workout_ids must be int or list")
+
+    if not workout_ids:
+        raise ValidationError("workout_ids required")
+
+    if not all(isinstance(wid, int) for wid in workout_ids):
+        raise ValidationError("workout_ids must be integers")
+
+    requested_overrides = data.get("overrides") or {}
+    if not isinstance(requested_overrides, dict):
+        raise ValidationError("Invalid overrides structure")
+
+    overrides = {}
+    for wid in workout_ids:
+        o = requested_overrides.get(str(wid), {})
+        if not isinstance(o, dict):
+            raise ValidationError("Invalid overrides structure")
+        o = {k: o[k] for k in ("name", "description", "equipment") if o.get(k) is not None}
+        if "equipment" in o:
+            o["equipment"] = normalize_equipment(o["equipment"])
+        overrides[str(wid)] = o
+
+    return {"workout_ids": workout_ids, "overrides": overrides}
 
 
-# ---------------- SAVE PUBLIC WORKOUT(S) ----------------
 @public_bp.route("/workouts/save", methods=["POST"])
 @public_bp.route("/workouts/save/<int:public_workout_id>", methods=["POST"])
 @jwt_required()
-def save_public_workouts(public_workout_id=None):
-    try:
-        # JWT identity → STRING → INT
-        user_id_int = int(get_jwt_identity())
-
-        data = get_request_data() or {}
-
-        # Require body if no URL ID
-        if not data and public_workout_id is None:
-            return jsonify({"error": "Request body required"}), 400
-
-        # Determine list of workout IDs
-        if public_workout_id is not None:
-            workout_ids = [public_workout_id]
-        else:
-            workout_ids = data.get("workout_ids", [])
-            if isinstance(workout_ids, int):
-                workout_ids = [workout_ids]
-            if not isinstance(workout_ids, list):
-                return jsonify({"error": "workout_ids must be int or list"}), 400
-
-        if not workout_ids:
-            return jsonify({"error": "workout_ids required"}), 400
-
-        saved_workouts = []
+@validate(save_request)
+@idempotent
+def save_public_workouts(body, public_workout_id=None):
+    # JWT identity → STRING → INT
+    user_id_int = int(get_jwt_identity())
+
+    # Every workout is saved by one set-based statement
+    with pipeline() as conn:
+        cur = run(conn.cursor(row_factory=psycopg.rows.dict_row), "saved_insert_many", {
+            "user_id": user_id_int,
+            "ids": body["workout_ids"],
+            "overrides": Jsonb(body["overrides"]),
+        })
+    rows = cur.fetchall()
+    user_cache.library.invalidate(user_id_int)
+
+    # Saved workouts have no checklist rows of their own (checklist_items
+    # belong to created workouts); the checklist is derived from equipment
+    saved_workouts = [
+        {
+            "id": r["id"],
+            "public_workout_id": r["public_workout_id"],
+            "name": r["name"],
+            "description": r["description"],
+            "equipment": r["equipment"] or [],
+            "checklist": generate_checklist(r["equipment"]),
+            "created": r["created"],
+        }
+        for r in rows
+    ]
+
+    if not saved_workouts:
+        raise Conflict("no workouts saved")
+
+    return jsonify({
+        "message": "workouts saved",
+        "saved_workouts": saved_workouts,
+    }), 201
+
+
+# ---------------- PAYSTACK WEBHOOK ----------------
+# Verify and append to the inbox only; utils.payments applies events in
+# batches from the worker. Paystack retries anything but a 200.
+@public_bp.route("/paystack/webhook", methods=["POST"])
+def paystack_webhook():
+    if request.content_length is None:
+        raise LengthRequired()
+    if request.content_length > PAYMENT_WEBHOOK_MAX_BYTES:
+        raise PayloadTooLarge()
+    body = request.get_data(cache=False)
+    if not verify_signature(body, request.headers.get("X-Paystack-Signature")):
+        raise Unauthorized("Invalid signature")
 
+    try:
         with get_conn() as conn:
-            with conn.cursor(row_factory=psycopg.rows.dict_row) as cur:
-                for wid in workout_ids:
-
-                    # Validate data before accessing attributes
-                    if not isinstance(data, dict):
-                        return jsonify({"error": "Invalid JSON payload"}), 400
-
-                    overrides = data.get("overrides", {}).get(str(wid), {})
-                    if not isinstance(overrides, dict):
-                        return jsonify({"error": "Invalid overrides structure"}), 400
-
-                    # Fetch public workout
-                    cur.execute(
-                        "SELECT * FROM public_workouts WHERE id=%s",
-                        (wid,),
-                    )
-                    public_w = cur.fetchone()
-                    if not public_w:
-                        continue
-
-                    # Check existing save
-                    cur.execute(
-                        """
-                        SELECT * FROM saved_workouts
-                        WHERE user_id=%s AND public_workout_id=%s
-                        """,
-                        (user_id_int, wid),
-                    )
-                    existing = cur.fetchone()
-                    if existing:
-                        saved_id = existing["id"]
-
-                        cur.execute(
-                            """
-                            SELECT id, task, done
-                            FROM checklist_items
-                            WHERE workout_id=%s
-                            """,
-                            (saved_id,),
-                        )
-                        checklist = cur.fetchall()
-
-                        saved_workouts.append({
-                            "id": saved_id,
-                            "name": existing["name"],
-                            "description": existing["description"],
-                            "equipment": existing["equipment"].split(",") if existing["equipment"] else [],
-                            "checklist": checklist,
-                        })
-                        continue
-
-                    # Build values
-                    name = overrides.get("name") or public_w["name"]
-                    description = overrides.get("description") or public_w.get("instructions") or ""
-
-                    equipment = overrides.get("equipment")
-                    if equipment is None:
-                        equipment = public_w["equipment"].split(",") if public_w["equipment"] else []
-
-                    eq_str = ",".join(equipment)
-
-                    muscles = public_w.get("muscles") or []
-                    muscles_pg = "{" + ",".join(muscles) + "}" if isinstance(muscles, list) else muscles
-
-                    # Insert saved workout
-                    cur.execute(
-                        """
-                        INSERT INTO saved_workouts
-                        (user_id, public_workout_id, name, description, equipment, type, muscles, level)
-                        VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
-                        RETURNING id
-                        """,
-                        (
-                            user_id_int,
-                            wid,
-                            name,
-                            description,
-                            eq_str,
-                            public_w.get("type"),
-                            muscles_pg,
-                            public_w.get("level"),
-                        ),
-                    )
-                    result = cur.fetchone()
-                    # Check fetchone() result
-                    if result is None:
-                        return jsonify({"error": "No data found"}), 404
-                    saved_id = result[0]
-
-                    # Generate checklist
-                    checklist = generate_checklist(equipment)
-                    for item in checklist:
-                        cur.execute(
-                            """
-                            INSERT INTO checklist_items (task, done, workout_id)
-                            VALUES (%s,%s,%s)
-                            """,
-                            (item["task"], item["done"], saved_id),
-                        )
-
-                    saved_workouts.append({
-                        "id": saved_id,
-                        "name": name,
-                        "description": description,
-                        "equipment": equipment,
-                        "checklist": checklist,
-                    })
-
-        if not saved_workouts:
-            return jsonify({"error": "no workouts saved"}), 409
-
-        return jsonify({
-            "message": "workouts saved",
-            "saved_workouts": saved_workouts,
-        }), 201
-
-    except Exception as e:
-        current_app.logger.exception("Save workout failed")
-        return jsonify({"error": str(e)}), 500
+            with conn.cursor() as cur:
+                run(cur, "payment_event_insert", (body.decode("utf-8"),))
+    except (UnicodeDecodeError, psycopg.errors.InvalidTextRepresentation):
+        raise ValidationError("Body must be JSON")
+
+    return jsonify({"status": "received"}), 200
 
 
 # Dummy Paystack Payment Integration
 @public_bp.route('/paystack/dummy-payment', methods=['POST'])
-def dummy_paystack_payment():
-    data = request.get_json()
-
-    # Validate request payload
-    if not data or 'email' not in data or 'amount' not in data:
-        return jsonify({"error": "Email and amount are required"}), 400
-
-    email = data['email']
-    amount = data['amount']
-
+@validate(DUMMY_PAYMENT)
+def dummy_paystack_payment(body):
     # Simulate Paystack payment initialization
     paystack_response = {
         "status": True,
@@ -1,170 +1,108 @@
-from flask import Blueprint, request, jsonify
+import datetime
+
+from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from db import get_conn
+from queries import run
+from utils.errors import MISSING, Field, NotFound, validate
+from utils.idempotency import idempotent
 
 reminders_bp = Blueprint("reminders", __name__)
 
+# expires_at (optional, ISO 8601): hidden after it passes, then archived
+# by utils.retention. On update, null clears it and leaving it out keeps it.
+REMINDER_CREATE = {
+    "time": Field(str, required=True),
+    "description": Field(str, default=""),
+    "expires_at": Field(datetime.datetime),
+}
+REMINDER_UPDATE = {
+    "time": Field(str),
+    "description": Field(str),
+    "expires_at": Field(datetime.datetime, default=MISSING, nullable=True),
+}
+
 # ---------------- CREATE REMINDER ----------------
 @reminders_bp.route("/reminders", methods=["POST"])
 @jwt_required()
-def create_reminder():
-    try:
-        # JWT identity is STRING
-        user_id_str = get_jwt_identity()
-        user_id_int = int(user_id_str)
-
-        # Validate incoming JSON
-        data = request.get_json(silent=True) or {}
-        if not isinstance(data, dict):
-            return jsonify({"error": "Invalid JSON payload"}), 400
-
-        reminder_time = data.get("time")
-        if not reminder_time or not isinstance(reminder_time, str):
-            return jsonify({
-                "error": "Invalid or missing 'time'. It must be a string."
-            }), 400
-
-        description = data.get("description", "")
-        if not isinstance(description, str):
-            return jsonify({
-                "error": "Invalid 'description'. It must be a string."
-            }), 400
-
-        # Store reminder
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO reminders (user_id, time, description)
-                    VALUES (%s, %s, %s)
-                    RETURNING id
-                    """,
-                    (user_id_int, reminder_time, description),
-                )
-
-                # Check fetchone() result
-                result = cur.fetchone()
-                if result is None:
-                    return jsonify({"error": "No reminder found"}), 404
-                reminder_id = result[0]
-
-        return jsonify({
-            "message": "Reminder created successfully",
-            "reminder": {
-                "id": reminder_id,
-                "time": reminder_time,
-                "description": description,
-            },
-        }), 201
-
-    except ValueError:
-        return jsonify({"error": "Invalid user ID in token"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+@validate(REMINDER_CREATE)
+@idempotent
+def create_reminder(body):
+    # JWT identity is STRING
+    user_id_int = int(get_jwt_identity())
+    reminder_time = body["time"]
+    description = body["description"]
+    expires_at = body["expires_at"]
+
+    # Store reminder
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "reminder_insert", (user_id_int, reminder_time, description, expires_at))
+            reminder_id = cur.fetchone()[0]
+
+    return jsonify({
+        "message": "Reminder created successfully",
+        "reminder": {
+            "id": reminder_id,
+            "time": reminder_time,
+            "description": description,
+            "expires_at": expires_at,
+        },
+    }), 201
+
 
 # ---------------- DELETE REMINDER ----------------
 @reminders_bp.route("/reminders/<int:reminder_id>", methods=["DELETE"])
 @jwt_required()
 def delete_reminder(reminder_id):
-    try:
-        # JWT identity is STRING
-        user_id_str = get_jwt_identity()
-        user_id_int = int(user_id_str)
-
-        # Delete reminder
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "DELETE FROM reminders WHERE id=%s AND user_id=%s RETURNING id",
-                    (reminder_id, user_id_int),
-                )
-
-                # Check fetchone() result
-                result = cur.fetchone()
-                if result is None:
-                    return jsonify({"error": "Reminder not found or not authorized"}), 404
-
-        return jsonify({"message": "Reminder deleted successfully"}), 200
-
-    except ValueError:
-        return jsonify({"error": "Invalid user ID in token"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    # JWT identity is STRING
+    user_id_int = int(get_jwt_identity())
+
+    # Delete reminder
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "reminder_delete", (reminder_id, user_id_int))
+            if cur.fetchone() is None:
+                raise NotFound("Reminder not found or not authorized")
+
+    return jsonify({"message": "Reminder deleted successfully"}), 200
 
 # ---------------- EDIT REMINDER ----------------
 @reminders_bp.route("/reminders/<int:reminder_id>", methods=["PUT"])
 @jwt_required()
-def edit_reminder(reminder_id):
-    try:
-        # JWT identity is STRING
-        user_id_str = get_jwt_identity()
-        user_id_int = int(user_id_str)
-
-        # Validate incoming JSON
-        data = request.get_json(silent=True) or {}
-        if not isinstance(data, dict):
-            return jsonify({"error": "Invalid JSON payload"}), 400
-
-        reminder_time = data.get("time")
-        description = data.get("description")
-
-        if reminder_time is not None and not isinstance(reminder_time, str):
-            return jsonify({"error": "Invalid 'time'. It must be a string."}), 400
-
-        if description is not None and not isinstance(description, str):
-            return jsonify({"error": "Invalid 'description'. It must be a string."}), 400
-
-        # Update reminder
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    UPDATE reminders
-                    SET time = COALESCE(%s, time),
-                        description = COALESCE(%s, description)
-                    WHERE id = %s AND user_id = %s
-                    RETURNING id
-                    """,
-                    (reminder_time, description, reminder_id, user_id_int),
-                )
-
-                # Check fetchone() result
-                result = cur.fetchone()
-                if result is None:
-                    return jsonify({"error": "Reminder not found or not authorized"}), 404
-
-        return jsonify({"message": "Reminder updated successfully"}), 200
-
-    except ValueError:
-        return jsonify({"error": "Invalid user ID in token"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+@validate(REMINDER_UPDATE)
+def edit_reminder(reminder_id, body):
+    # JWT identity is STRING
+    user_id_int = int(get_jwt_identity())
+
+    # Update reminder
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            expires_at = body["expires_at"]
+            run(cur, "reminder_update", (
+                body["time"], body["description"], expires_at is not MISSING,
+                None if expires_at is MISSING else expires_at, reminder_id, user_id_int,
+            ))
+            if cur.fetchone() is None:
+                raise NotFound("Reminder not found or not authorized")
+
+    return jsonify({"message": "Reminder updated successfully"}), 200
 
 # ---------------- LIST REMINDERS ----------------
 @reminders_bp.route("/reminders", methods=["GET"])
 @jwt_required()
 def list_reminders():
-    try:
-        # JWT identity is STRING
-        user_id_str = get_jwt_identity()
-        user_id_int = int(user_id_str)
-
-        # Fetch reminders
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT id, time, description FROM reminders WHERE user_id = %s ORDER BY time ASC",
-                    (user_id_int,),
-                )
-                reminders = cur.fetchall()
-
-        return jsonify({
-            "reminders": [
-                {"id": r[0], "time": r[1], "description": r[2]} for r in reminders
-            ]
-        }), 200
-
-    except ValueError:
-        return jsonify({"error": "Invalid user ID in token"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+    # JWT identity is STRING
+    user_id_int = int(get_jwt_identity())
+
+    # Fetch reminders
+    with get_conn(readonly=True, user_id=user_id_int) as conn:
+        with conn.cursor() as cur:
+            run(cur, "reminder_list", (user_id_int,))
+            reminders = cur.fetchall()
+
+    return jsonify({
+        "reminders": [
+            {"id": r[0], "time": r[1], "description": r[2], "expires_at": r[3]} for r in reminders
+        ]
+    }), 200
@@ -0,0 +1,242 @@
+import re
+import uuid
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from db import get_conn, pipeline
+from queries import run
+from utils import user_cache
+from utils.errors import (
+    Conflict,
+    Field,
+    Forbidden,
+    Gone,
+    LengthRequired,
+    NotFound,
+    PayloadTooLarge,
+    RangeNotSatisfiable,
+    ValidationError,
+    validate,
+)
+from utils.idempotency import idempotent
+from utils.media import upload_image, destroy_image_later
+from utils.uploads import (
+    UPLOAD_CHUNK_BYTES, UPLOAD_MAX_BYTES, UPLOAD_TTL_SECONDS,
+    OffsetMismatch, UploadBusy, append_chunk, create_staging, received, remove_staging, staging_path,
+)
+
+uploads_bp = Blueprint("uploads", __name__)
+
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+UPLOAD_CREATE = {
+    "filename": Field(str, default=""),
+    "content_type": Field(str, required=True),
+    "size": Field(int, required=True),
+}
+UPLOAD_COMPLETE = {"workout_id": Field(int, required=True)}
+
+
+def _parse_id(upload_id):
+    try:
+        return str(uuid.UUID(upload_id))
+    except ValueError:
+        return None
+
+
+def _load(upload_id, user_id):
+    upload_id = _parse_id(upload_id)
+    if upload_id is None:
+        return None, None
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "upload_get", (upload_id, user_id))
+            return upload_id, cur.fetchone()
+
+
+def _offset_conflict(offset, error="Chunk does not start at the upload offset"):
+    return Conflict(error, headers={"Upload-Offset": str(offset)}, offset=offset)
+
+
+# ---------------- RESUMABLE IMAGE UPLOADS ----------------
+# POST /uploads {filename, content_type, size} → upload_id
+# PUT /uploads/<id> with Content-Range: bytes start-end/size, one chunk per request
+# GET /uploads/<id> → offset to resume from after a dropped connection
+# POST /uploads/<id>/complete {workout_id} → stored and attached to the workout
+@uploads_bp.route("/uploads", methods=["POST"])
+@jwt_required()
+@validate(UPLOAD_CREATE)
+@idempotent
+def initiate_upload(body):
+    content_type = body["content_type"]
+    size = body["size"]
+    if not content_type.startswith("image/"):
+        raise ValidationError("Only image files are allowed")
+    if size < 1:
+        raise ValidationError("size must be a positive integer")
+    if size > UPLOAD_MAX_BYTES:
+        raise PayloadTooLarge(f"size exceeds the {UPLOAD_MAX_BYTES} byte limit")
+
+    user_id = int(get_jwt_identity())
+    upload_id = str(uuid.uuid4())
+    create_staging(upload_id)
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                run(cur, "upload_create", {
+                    "id": upload_id,
+                    "user_id": user_id,
+                    "filename": body["filename"][:255] or None,
+                    "content_type": content_type[:100],
+                    "size": size,
+                    "ttl": UPLOAD_TTL_SECONDS,
+                })
+                expires_at = cur.fetchone()[0]
+    except Exception:
+        remove_staging(upload_id)
+        raise
+
+    return jsonify({
+        "upload_id": upload_id,
+        "size": size,
+        "offset": 0,
+        "chunk_size": UPLOAD_CHUNK_BYTES,
+        "expires_at": expires_at.isoformat(),
+    }), 201, {"Location": f"{request.path}/{upload_id}"}
+
+
+@uploads_bp.route("/uploads/<upload_id>", methods=["GET"])
+@jwt_required()
+def upload_status(upload_id):
+    user_id = int(get_jwt_identity())
+    upload_id, row = _load(upload_id, user_id)
+    if row is None:
+        raise NotFound("Upload not found")
+    status, size, workout_id, image_url, _, expires_at = row
+    offset = size if status == "complete" else received(upload_id)
+    if offset is None:
+        raise Gone("Upload data is gone; start a new upload")
+    return jsonify({
+        "upload_id": upload_id,
+        "status": status,
+        "size": size,
+        "offset": offset,
+        "workout_id": workout_id,
+        "image_url": image_url,
+        "expires_at": expires_at.isoformat(),
+    }), 200, {"Upload-Offset": str(offset)}
+
+
+@uploads_bp.route("/uploads/<upload_id>", methods=["PUT"])
+@jwt_required()
+def upload_chunk(upload_id):
+    # Validate from the headers alone, before reading a byte of the body
+    length = request.content_length
+    if length is None:
+        raise LengthRequired()
+    if length > UPLOAD_CHUNK_BYTES:
+        raise PayloadTooLarge(f"Chunks are limited to {UPLOAD_CHUNK_BYTES} bytes")
+    match = CONTENT_RANGE.match(request.headers.get("Content-Range", ""))
+    if not match:
+        raise ValidationError("Content-Range: bytes start-end/size required")
+    start, end, total = (int(g) for g in match.groups())
+    if length == 0 or end - start + 1 != length:
+        raise ValidationError("Content-Range does not match Content-Length")
+
+    user_id = int(get_jwt_identity())
+    upload_id, row = _load(upload_id, user_id)
+    if row is None:
+        raise NotFound("Upload not found")
+    status, size = row[0], row[1]
+    if status != "open":
+        raise Conflict("Upload already completed")
+    if total != size or end >= size:
+        raise RangeNotSatisfiable(f"Content-Range is outside the declared size {size}")
+
+    try:
+        offset = append_chunk(upload_id, start, request.stream, length)
+    except OffsetMismatch as e:
+        raise _offset_conflict(e.offset) from None
+    except UploadBusy:
+        raise Conflict("Another chunk for this upload is in progress", headers={"Retry-After": "1"}) from None
+    except FileNotFoundError:
+        raise Gone("Upload data is gone; start a new upload") from None
+
+    return jsonify({"upload_id": upload_id, "offset": offset, "size": size}), 200, {
+        "Upload-Offset": str(offset)
+    }
+
+
+@uploads_bp.route("/uploads/<upload_id>/complete", methods=["POST"])
+@jwt_required()
+@validate(UPLOAD_COMPLETE)
+def complete_upload(upload_id, body):
+    workout_id = body["workout_id"]
+    user_id = int(get_jwt_identity())
+    upload_id, row = _load(upload_id, user_id)
+    if row is None:
+        raise NotFound("Upload not found")
+    status, size, attached_to, image_url = row[:4]
+    if status == "complete":
+        # A retried complete: report what the first one did
+        if attached_to != workout_id:
+            raise Conflict("Upload already attached to another workout")
+        return jsonify({"upload_id": upload_id, "workout_id": workout_id, "image_url": image_url}), 200
+
+    offset = received(upload_id)
+    if offset is None:
+        raise Gone("Upload data is gone; start a new upload")
+    if offset != size:
+        raise _offset_conflict(offset, "Upload is incomplete")
+
+    # Check before storing so a bad workout id doesn't leave an orphan image
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "workout_owner", (workout_id,))
+            owner = cur.fetchone()
+    if not owner:
+        raise NotFound("Workout not found")
+    if owner[0] != user_id:
+        raise Forbidden()
+
+    with open(staging_path(upload_id), "rb") as f:
+        image_url, public_id = upload_image(f, user_id)
+
+    with pipeline() as conn:
+        cur = run(conn.cursor(), "upload_attach", {
+            "id": upload_id,
+            "user_id": user_id,
+            "workout_id": workout_id,
+            "image_url": image_url,
+            "public_id": public_id,
+        })
+    attached = cur.fetchone()
+    if attached is None:
+        # Completed concurrently, or the workout was deleted meanwhile
+        destroy_image_later(public_id)
+        raise Conflict("Upload already completed or workout not found")
+
+    remove_staging(upload_id)
+    user_cache.library.invalidate(user_id)
+    old_public_id = attached[0]
+    if old_public_id and old_public_id != public_id:
+        destroy_image_later(old_public_id)
+
+    return jsonify({"upload_id": upload_id, "workout_id": workout_id, "image_url": image_url}), 200
+
+
+@uploads_bp.route("/uploads/<upload_id>", methods=["DELETE"])
+@jwt_required()
+def cancel_upload(upload_id):
+    user_id = int(get_jwt_identity())
+    upload_id = _parse_id(upload_id)
+    if upload_id is None:
+        raise NotFound("Upload not found")
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "upload_delete", (upload_id, user_id))
+            deleted = cur.fetchone()
+    if not deleted:
+        raise NotFound("Upload not found")
+    remove_staging(upload_id)
+    return jsonify({"message": "Upload cancelled"}), 200
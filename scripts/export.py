@@ -0,0 +1,325 @@
+"""Export app tables to date-partitioned columnar files for analytics.
+
+    python -m scripts.export --out exports/                   # incremental, every table
+    python -m scripts.export --out exports/ --tables payments,reminders --format csv
+
+Reads from EXPORT_DATABASE_URL, else the first DATABASE_REPLICA_URLS entry,
+else DATABASE_URL, so analytics never has to query the primary. Each table
+is written as
+
+    <out>/<table>/date=YYYY-MM-DD/part-<first id>.parquet   (or .csv.gz)
+
+Parquet needs pyarrow (optional): rows come from a server-side cursor
+EXPORT_BATCH_ROWS at a time and each batch becomes one row group. Without
+pyarrow, or with --format csv, COPY ... TO STDOUT is streamed straight into
+gzip. Either way memory stays bounded whatever the table size.
+
+Runs are incremental: <out>/_watermarks.json holds each table's watermark
+and is only rewritten once that table's files are in place. A crashed run
+starts again from the same watermark and overwrites the same part files.
+
+- Append-only tables (saved_workouts, activity_log) go by id. Rows younger
+  than EXPORT_LAG_SECONDS, and every row after the first of them, wait for
+  the next run: a transaction still in flight can hold a lower id than rows
+  already committed, and moving the watermark past it would skip it for
+  good.
+- Tables whose rows change (workouts, checklist_items, reminders, payments)
+  go by updated_at and are partitioned by it: each run writes every row
+  changed since the last one, so a row appears once per exported version
+  and readers keep the latest per id. Changes younger than
+  EXPORT_LAG_SECONDS wait, for the same reason. Deletes are not exported.
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import time
+
+import psycopg
+from dotenv import load_dotenv
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; gzip CSV is always available
+    pa = pq = None
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "50000"))
+EXPORT_LAG_SECONDS = int(os.getenv("EXPORT_LAG_SECONDS", "300"))
+WATERMARKS_FILE = "_watermarks.json"
+
+# name -> (select list, FROM clause, timestamp the rows are partitioned by,
+# watermark column). Rows are identified by t.id; columns that identify
+# people beyond user_id stay out.
+EXPORT_TABLES = {
+    "workouts": (
+        "t.id, t.user_id, t.name, t.description, t.equipment, t.image_url, t.created_at, t.updated_at",
+        "workouts t",
+        "t.updated_at",
+        "t.updated_at",
+    ),
+    "saved_workouts": (
+        "t.id, t.user_id, t.public_workout_id, t.name, t.equipment, t.type, t.muscles,"
+        " t.level, t.created_at",
+        "saved_workouts t",
+        "t.created_at",
+        "t.id",
+    ),
+    "checklist_items": (
+        "t.id, t.workout_id, w.user_id, t.task, t.done, t.completed_at, t.updated_at",
+        "checklist_items t JOIN workouts w ON w.id = t.workout_id",
+        "t.updated_at",
+        "t.updated_at",
+    ),
+    "reminders": (
+        "t.id, t.user_id, t.time, t.description, t.created_at, t.expires_at, t.updated_at",
+        "reminders t",
+        "t.updated_at",
+        "t.updated_at",
+    ),
+    "payments": (
+        "t.id, t.user_id, t.amount, t.currency, t.status, t.type, t.created_at, t.paid_at,"
+        " t.updated_at",
+        "payments t",
+        "t.updated_at",
+        "t.updated_at",
+    ),
+    "activity_log": (
+        "t.id, t.user_id, t.checklist_item_id, t.workout_id, t.done, t.day, t.created_at",
+        "activity_log t",
+        "t.created_at",
+        "t.id",
+    ),
+}
+
+
+def source_url():
+    replicas = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    url = os.getenv("EXPORT_DATABASE_URL") or (replicas[0] if replicas else os.getenv("DATABASE_URL"))
+    if not url:
+        raise SystemExit("Set EXPORT_DATABASE_URL, DATABASE_REPLICA_URLS or DATABASE_URL")
+    return url
+
+
+# ---------------- WATERMARKS ----------------
+def by_id(table):
+    return EXPORT_TABLES[table][3] == "t.id"
+
+
+def start_mark(table, marks):
+    """Where this table's export resumes: an id, or an updated_at."""
+    if by_id(table):
+        return marks.get(table, {}).get("id", 0)
+    mark = marks.get(table, {}).get("updated_at")
+    return datetime.datetime.fromisoformat(mark) if mark else datetime.datetime.min
+
+
+def part_name(lo):
+    # Named by the run's starting watermark: a redone run overwrites its own files
+    if isinstance(lo, datetime.datetime):
+        return "part-" + ("0" if lo == datetime.datetime.min else lo.strftime("%Y%m%dT%H%M%S%f"))
+    return f"part-{lo + 1}"
+
+
+def load_watermarks(out):
+    path = os.path.join(out, WATERMARKS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(out, marks):
+    path = os.path.join(out, WATERMARKS_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(marks, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+# ---------------- QUERIES ----------------
+def export_bounds(cur, table, lo, lag):
+    """Last watermark this run may export up to (None when nothing is ready)."""
+    _, source, ts, mark = EXPORT_TABLES[table]
+    if by_id(table):
+        query = f"""
+            SELECT COALESCE(MIN(t.id) FILTER (WHERE {ts} >= NOW() - %(lag)s * INTERVAL '1 second') - 1,
+                            MAX(t.id))
+            FROM {source} WHERE t.id > %(lo)s
+        """
+    else:
+        query = f"""
+            SELECT MAX({mark}) FROM {source}
+            WHERE {mark} > %(lo)s AND {mark} < NOW() - %(lag)s * INTERVAL '1 second'
+        """
+    cur.execute(query, {"lo": lo, "lag": lag})
+    hi = cur.fetchone()[0]
+    return hi if hi is not None and hi > lo else None
+
+
+def partition_days(cur, table, lo, hi):
+    _, source, ts, mark = EXPORT_TABLES[table]
+    cur.execute(
+        f"SELECT DISTINCT COALESCE({ts}, 'epoch')::date FROM {source}"
+        f" WHERE {mark} > %s AND {mark} <= %s ORDER BY 1",
+        (lo, hi),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def partition_query(table):
+    columns, source, ts, mark = EXPORT_TABLES[table]
+    return (
+        f"SELECT {columns} FROM {source}"
+        f" WHERE {mark} > %(lo)s AND {mark} <= %(hi)s AND COALESCE({ts}, 'epoch')::date = %(day)s"
+        " ORDER BY t.id"
+    )
+
+
+# ---------------- WRITERS ----------------
+def write_csv(conn, table, params, path):
+    with gzip.open(path, "wb") as out:
+        with conn.cursor() as cur:
+            with cur.copy(
+                f"COPY ({partition_query(table)}) TO STDOUT WITH (FORMAT csv, HEADER)", params
+            ) as copy:
+                for data in copy:
+                    out.write(data)
+            return cur.rowcount
+
+
+def _arrow_type(column):
+    info = psycopg.adapters.types.get(column.type_code)
+    if info is not None and column.type_code == info.array_oid:
+        return pa.list_(_scalar_arrow_type(info.name, column))
+    return _scalar_arrow_type(info.name if info else "", column)
+
+
+def _scalar_arrow_type(name, column):
+    if name in ("int2", "int4"):
+        return pa.int32()
+    if name == "int8":
+        return pa.int64()
+    if name in ("float4", "float8"):
+        return pa.float64()
+    if name == "numeric":
+        return pa.decimal128(column.precision or 38, column.scale or 0)
+    if name == "bool":
+        return pa.bool_()
+    if name == "date":
+        return pa.date32()
+    if name == "timestamp":
+        return pa.timestamp("us")
+    if name == "timestamptz":
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+def _arrow_value(value, type_):
+    if value is None:
+        return None
+    if pa.types.is_list(type_):
+        return [_arrow_value(v, type_.value_type) for v in value]
+    if not pa.types.is_string(type_) or isinstance(value, str):
+        return value
+    return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+
+
+def write_parquet(conn, table, params, path, batch_rows):
+    rows_written = 0
+    writer = None
+    with conn.cursor(name=f"export_{table}") as cur:
+        cur.itersize = batch_rows
+        cur.execute(partition_query(table), params)
+        schema = pa.schema([(c.name, _arrow_type(c)) for c in cur.description])
+        try:
+            writer = pq.ParquetWriter(path, schema, compression="zstd")
+            while True:
+                rows = cur.fetchmany(batch_rows)
+                if not rows:
+                    break
+                arrays = [
+                    pa.array([_arrow_value(r[i], field.type) for r in rows], type=field.type)
+                    for i, field in enumerate(schema)
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                rows_written += len(rows)
+        finally:
+            if writer is not None:
+                writer.close()
+    return rows_written
+
+
+# ---------------- EXPORT ----------------
+def export_table(conn, table, lo, out, fmt, batch_rows, lag):
+    """Export rows past watermark lo; returns (new watermark, rows, files)."""
+    ext = "parquet" if fmt == "parquet" else "csv.gz"
+    # One snapshot for the bounds and every partition of this table
+    with conn.transaction():
+        with conn.cursor() as cur:
+            hi = export_bounds(cur, table, lo, lag)
+            if hi is None:
+                return lo, 0, 0
+            days = partition_days(cur, table, lo, hi)
+
+        rows = 0
+        for day in days:
+            directory = os.path.join(out, table, f"date={day.isoformat()}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{part_name(lo)}.{ext}")
+            params = {"lo": lo, "hi": hi, "day": day}
+            if fmt == "parquet":
+                rows += write_parquet(conn, table, params, path + ".tmp", batch_rows)
+            else:
+                rows += write_csv(conn, table, params, path + ".tmp")
+            os.replace(path + ".tmp", path)
+    return hi, rows, len(days)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--tables", default=",".join(EXPORT_TABLES),
+                        help=f"comma-separated subset of: {', '.join(EXPORT_TABLES)}")
+    parser.add_argument("--format", choices=("auto", "parquet", "csv"), default="auto",
+                        help="auto = parquet when pyarrow is installed, else csv")
+    parser.add_argument("--batch", type=int, default=EXPORT_BATCH_ROWS, help="rows per parquet row group")
+    parser.add_argument("--lag", type=int, default=EXPORT_LAG_SECONDS,
+                        help="leave rows younger than this many seconds for the next run")
+    args = parser.parse_args()
+
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    unknown = set(tables) - set(EXPORT_TABLES)
+    if unknown:
+        raise SystemExit(f"Unknown table(s): {', '.join(sorted(unknown))}")
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "parquet" if pq is not None else "csv"
+    if fmt == "parquet" and pq is None:
+        raise SystemExit("--format parquet needs pyarrow (pip install pyarrow)")
+
+    os.makedirs(args.out, exist_ok=True)
+    marks = load_watermarks(args.out)
+    with psycopg.connect(source_url()) as conn:
+        conn.read_only = True
+        conn.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+        conn.autocommit = True  # transactions are explicit, one per table
+        for table in tables:
+            start = time.perf_counter()
+            lo = start_mark(table, marks)
+            hi, rows, files = export_table(conn, table, lo, args.out, fmt, args.batch, args.lag)
+            if hi != lo:
+                key, value = ("id", hi) if by_id(table) else ("updated_at", hi.isoformat())
+                marks[table] = {
+                    key: value,
+                    "format": fmt,
+                    "exported_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                }
+                save_watermarks(args.out, marks)
+            print(f"✓ {table}: {rows} rows in {files} file(s), past {lo} up to {hi}"
+                  f" ({time.perf_counter() - start:.1f}s)" if rows else f"✓ {table}: nothing new")
+
+
+if __name__ == "__main__":
+    main()
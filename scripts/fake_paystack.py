@@ -0,0 +1,120 @@
+"""Send signed Paystack-style webhook events to a running app.
+
+    python -m scripts.fake_paystack --user-id 1
+    python -m scripts.fake_paystack --email bench1@example.com --event charge.failed
+    python -m scripts.fake_paystack --user-id 1 --count 500 --duplicates 2 --concurrency 16
+
+Events are signed with PAYSTACK_SECRET_KEY exactly as Paystack does
+(x-paystack-signature). --duplicates re-sends each event, as Paystack's
+retries would; --refund follows every charge with refund.processed. A
+running worker applies them within PAYMENT_EVENTS_POLL_SECONDS; --process
+applies the inbox right away from this script instead (needs DATABASE_URL).
+"""
+import argparse
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from utils.payments import process_batch, sign  # noqa: E402
+
+
+def charge_event(args, reference):
+    return {
+        "event": args.event,
+        "data": {
+            "reference": reference,
+            "status": "success" if args.event == "charge.success" else "failed",
+            "amount": int(args.amount * 100),  # kobo
+            "currency": "NGN",
+            "paid_at": datetime.now(timezone.utc).isoformat(),
+            "customer": {"email": args.email},
+            "metadata": {"user_id": args.user_id, "type": args.type},
+        },
+    }
+
+
+def refund_event(args, reference):
+    return {
+        "event": "refund.processed",
+        "data": {
+            "transaction_reference": reference,
+            "amount": int(args.amount * 100),
+            "currency": "NGN",
+            "customer": {"email": args.email},
+            "metadata": {"user_id": args.user_id, "type": args.type},
+        },
+    }
+
+
+def send(url, secret, event):
+    body = json.dumps(event).encode()
+    req = urllib.request.Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json",
+        "X-Paystack-Signature": sign(body, secret),
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=os.getenv("BASE_URL", "http://localhost:5000") + "/public/paystack/webhook")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--email")
+    parser.add_argument("--event", default="charge.success", choices=("charge.success", "charge.failed"))
+    parser.add_argument("--type", default="subscription")
+    parser.add_argument("--amount", type=float, default=5000, help="naira")
+    parser.add_argument("--reference", help="default: a new random reference per payment")
+    parser.add_argument("--count", type=int, default=1, help="payments to send")
+    parser.add_argument("--duplicates", type=int, default=1, help="deliveries per event")
+    parser.add_argument("--refund", action="store_true", help="follow each charge with a refund")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--secret", default=os.getenv("PAYSTACK_SECRET_KEY"))
+    parser.add_argument("--process", action="store_true", help="apply the inbox after sending")
+    args = parser.parse_args()
+
+    if args.user_id is None and not args.email:
+        raise SystemExit("--user-id or --email is required")
+    if not args.secret:
+        raise SystemExit("PAYSTACK_SECRET_KEY (or --secret) is required to sign events")
+
+    events = []
+    for i in range(args.count):
+        reference = args.reference or f"FAKE_{uuid.uuid4().hex[:16].upper()}"
+        events += [charge_event(args, reference)] * args.duplicates
+        if args.refund:
+            events += [refund_event(args, reference)] * args.duplicates
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        statuses = list(pool.map(lambda e: send(args.url, args.secret, e), events))
+    elapsed = time.perf_counter() - start
+
+    by_status = {s: statuses.count(s) for s in sorted(set(statuses))}
+    print(f"✓ Sent {len(events)} event(s) in {elapsed:.2f}s ({len(events) / elapsed:.0f}/s): {by_status}")
+
+    if args.process:
+        start = time.perf_counter()
+        processed = 0
+        while True:
+            claimed = process_batch()
+            processed += claimed
+            if not claimed:
+                break
+        print(f"✓ Applied {processed} inbox event(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
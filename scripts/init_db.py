@@ -1,8 +1,12 @@
 import os
 import json
+import sys
 import psycopg
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.equipment import normalize_equipment
+
 # ----------------------
 # ENV SETUP
 # ----------------------
@@ -59,11 +63,10 @@ try:
                 for w in workouts:
                     
                     
-                    equipments = w.get('equipments') or []
-                    if isinstance(equipments, list):
-                        equipment_str = ",".join(equipments)
-                    else:
-                        equipment_str = str(equipments)
+                    # ----------------------------------------
+                    # SANITIZE EQUIPMENT → TEXT[]
+                    # ----------------------------------------
+                    equipment = normalize_equipment(w.get('equipments'))
 
                     # ----------------------------------------
                     # SANITIZE MUSCLES → TEXT[]
@@ -98,7 +101,7 @@ try:
                             w.get('type'),
                             w.get('name'),
                             muscles,
-                            equipment_str,
+                            equipment,
                             desc,
                             instr,
                             w.get('level')
@@ -0,0 +1,63 @@
+"""Apply pending SQL migrations.
+
+    python scripts/migrate.py [--list]
+
+Runs every migrations/NNN_*.sql not yet recorded in schema_migrations, in
+order, each in its own transaction. Migrations are written to be idempotent,
+so running them against a fresh db_init.sql schema is safe.
+"""
+import argparse
+import os
+
+import psycopg
+from dotenv import load_dotenv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(ROOT, "migrations")
+
+
+def pending(cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cur.execute("SELECT name FROM schema_migrations")
+    applied = {r[0] for r in cur.fetchall()}
+    return [f for f in sorted(os.listdir(MIGRATIONS_DIR)) if f.endswith(".sql") and f not in applied]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--list", action="store_true", help="only list pending migrations")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise RuntimeError("DATABASE_URL environment variable is not set")
+
+    with psycopg.connect(db_url, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            todo = pending(cur)
+            if not todo:
+                print("✓ Schema is up to date.")
+                return
+            for name in todo:
+                if args.list:
+                    print(f"  pending: {name}")
+                    continue
+                with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+                    sql = f.read()
+                print(f"→ Applying {name}...")
+                with conn.transaction():
+                    cur.execute(sql)
+                    cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+                print(f"✓ Applied {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Show where db.get_conn routes reads and writes.
+
+    DATABASE_URL=postgresql://localhost:5432/app \
+    DATABASE_REPLICA_URLS=postgresql://localhost:5433/app \
+    python -m scripts.replica_check --reads 10
+
+Works with two independent local Postgres instances (no replication needed):
+each connection reports the server port it landed on. Reads are listed
+round-robin, then again right after pinning user 1 (read-your-writes).
+Stop a replica mid-run to watch it get ejected.
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import db  # noqa: E402
+
+
+def server_port(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT inet_server_port()")
+        return cur.fetchone()[0]
+
+
+def sample(label, n, **kwargs):
+    ports = []
+    for _ in range(n):
+        try:
+            with db.get_conn(**kwargs) as conn:
+                ports.append(server_port(conn))
+        except Exception as e:
+            ports.append(f"error: {type(e).__name__}")
+    print(f"{label:<28} {ports}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reads", type=int, default=6)
+    parser.add_argument("--user", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"replicas: {db.get_replica_urls() or 'none'}")
+    sample("writes (primary)", 2)
+    sample("reads", args.reads, readonly=True, user_id=args.user)
+
+    db.pin_to_primary(args.user)
+    sample("reads after write (pinned)", args.reads, readonly=True, user_id=args.user)
+
+    time.sleep(db.READ_YOUR_WRITES_SECONDS)
+    sample("reads after pin expiry", args.reads, readonly=True, user_id=args.user)
+
+    for r in db.get_replicas():
+        state = "healthy" if r.healthy else "ejected"
+        print(f"  {r.url.rsplit('@', 1)[-1]}: {state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Per-module import-time report for the app.
+
+    python scripts/startup_profile.py [--top 25] [--module app]
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+lists the slowest modules by cumulative and self time.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile(module):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        print(proc.stderr.splitlines()[-1] if proc.stderr else "import failed")
+        sys.exit(proc.returncode)
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return entries, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    entries, wall = profile(args.module)
+    # Nested imports are indented two extra spaces per level
+    top_level = [e for e in entries if len(e[0]) - len(e[0].lstrip()) == 1]
+
+    print(f"\n=== import {args.module}: {wall * 1000:.0f} ms wall, {len(entries)} modules ===")
+    print("\nSlowest top-level imports (cumulative):")
+    for name, _, cumulative in sorted(top_level, key=lambda e: -e[2])[: args.top]:
+        print(f"  {cumulative / 1000:9.1f} ms  {name.strip()}")
+
+    print("\nSlowest modules (self):")
+    for name, self_us, _ in sorted(entries, key=lambda e: -e[1])[: args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Run background jobs from the Postgres job queue (utils/jobs.py).
+
+    python -m scripts.worker                       # every registered kind
+    python -m scripts.worker --kinds media.destroy --threads 2
+    python -m scripts.worker --once                # drain what is due, then exit
+    python -m scripts.worker --list                # queue depth and dead jobs per kind
+
+Start as many workers as you like, on any host that can reach the database.
+SIGTERM/SIGINT stop claiming new jobs and wait for running ones to finish.
+"""
+import argparse
+import importlib
+import logging
+import signal
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from db import get_conn  # noqa: E402
+from utils import jobs  # noqa: E402
+
+
+def print_queue():
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT kind,
+                       COUNT(*) FILTER (WHERE locked_at IS NULL AND run_at <= NOW()),
+                       COUNT(*) FILTER (WHERE locked_at IS NULL AND run_at > NOW()),
+                       COUNT(*) FILTER (WHERE locked_at IS NOT NULL)
+                FROM jobs GROUP BY kind ORDER BY kind
+                """
+            )
+            queued = {r[0]: r[1:] for r in cur.fetchall()}
+            cur.execute("SELECT kind, COUNT(*) FROM dead_jobs GROUP BY kind")
+            dead = dict(cur.fetchall())
+
+    print(f"{'kind':<28}{'due':>8}{'later':>8}{'running':>9}{'dead':>8}")
+    for kind in sorted(set(jobs.JOBS) | set(queued) | set(dead)):
+        due, later, running = queued.get(kind, (0, 0, 0))
+        print(f"{kind:<28}{due:>8}{later:>8}{running:>9}{dead.get(kind, 0):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kinds", help="comma-separated job kinds (default: all)")
+    parser.add_argument("--threads", type=int, default=jobs.JOB_WORKER_THREADS)
+    parser.add_argument("--poll", type=float, default=jobs.JOB_POLL_SECONDS)
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    for module in jobs.JOB_MODULES:
+        importlib.import_module(module)
+
+    if args.list:
+        print_queue()
+        return
+
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()] if args.kinds else None
+    worker = jobs.Worker(kinds, threads=args.threads, poll=args.poll)
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    logging.getLogger("jobs").info(
+        "worker %s running %s", worker.name, ", ".join(t.kind for t in worker.types)
+    )
+    worker.run(stop, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Shared fixtures.
+
+Tests that touch Postgres need DATABASE_URL pointing at a database set up
+with db_init.sql and ``python scripts/migrate.py``; without one they are
+skipped. Query tracing is on, so every request is counted against
+QUERY_BUDGETS.
+"""
+import os
+import sys
+import tempfile
+import uuid
+
+import psycopg
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Read at import time by utils.query_tracer / utils.local_store
+os.environ.setdefault("QUERY_TRACE", "1")
+os.environ.setdefault("LOCAL_STORE_PATH", os.path.join(tempfile.mkdtemp(), "local-store.sqlite3"))
+
+
+def _database_available():
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        return False
+    try:
+        psycopg.connect(url, connect_timeout=2).close()
+    except psycopg.Error:
+        return False
+    return True
+
+
+requires_db = pytest.mark.skipif(not _database_available(), reason="DATABASE_URL not set or unreachable")
+
+
+@pytest.fixture
+def app():
+    from app import create_app
+
+    return create_app({"TESTING": True, "RATE_LIMITS": {}, "JWT_SECRET_KEY": "test-secret-" + "x" * 32})
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(client):
+    """A freshly registered user: {"id", "username", "headers"}."""
+    username = "t" + uuid.uuid4().hex[:12]
+    r = client.post("/auth/register", json={
+        "username": username, "password": "pw", "name": "Test",
+        "reg_number": username, "email": username + "@example.com",
+    })
+    assert r.status_code == 201, r.get_json()
+    r = client.post("/auth/login", json={"username": username, "password": "pw"})
+    headers = {"Authorization": "Bearer " + r.get_json()["token"]}
+    return {"id": int(client.get("/auth/me", headers=headers).get_json()["id"]),
+            "username": username, "headers": headers}
+
+
+@pytest.fixture
+def subscriber(client, user):
+    """A user with an active subscription (can create workouts)."""
+    r = client.post("/users/paystack/dummy-payment", json={"email": user["username"] + "@example.com"},
+                    headers=user["headers"])
+    assert r.status_code in (200, 201), r.get_json()
+    return user
@@ -0,0 +1,48 @@
+from conftest import requires_db
+
+pytestmark = requires_db
+
+
+def _checklist(client, user):
+    r = client.post("/users/workouts", json={"name": "Stats", "equipment": ["mat"]}, headers=user["headers"])
+    assert r.status_code == 201, r.get_json()
+    workout_id = r.get_json()["workout_id"]
+    library = client.get("/users/workouts", headers=user["headers"]).get_json()
+    return next(w["checklist"] for w in library if w["workout_id"] == workout_id)
+
+
+def _toggle(client, user, item_id, times=1):
+    for _ in range(times):
+        assert client.patch(f"/users/checklist/items/{item_id}", headers=user["headers"]).status_code == 200
+
+
+def _today(client, user):
+    stats = client.get("/users/stats?periods=1", headers=user["headers"]).get_json()
+    week = client.get("/users/stats?period=week&periods=1", headers=user["headers"]).get_json()
+    return stats["totals"], stats["series"][-1], week["series"][-1]
+
+
+def test_retoggling_an_item_counts_it_once(client, subscriber):
+    first, second = _checklist(client, subscriber)[:2]
+
+    _toggle(client, subscriber, first["id"], times=5)  # on, off, on, off, on
+    totals, day, week = _today(client, subscriber)
+    assert totals == {"completed": 1, "uncompleted": 0, "net_completed": 1}
+    assert (day["completed"], day["uncompleted"]) == (1, 0)
+    assert (week["completed"], week["active_days"]) == (1, 1)
+
+    _toggle(client, subscriber, second["id"])
+    assert _today(client, subscriber)[1]["completed"] == 2
+
+
+def test_undoing_every_completion_clears_the_active_day(client, subscriber):
+    item = _checklist(client, subscriber)[0]
+
+    _toggle(client, subscriber, item["id"], times=2)  # on, off
+    totals, day, week = _today(client, subscriber)
+    assert totals["completed"] == totals["uncompleted"] == 0
+    assert day["completed"] == 0
+    assert week["active_days"] == 0
+
+    _toggle(client, subscriber, item["id"])
+    assert _today(client, subscriber)[2]["active_days"] == 1
@@ -0,0 +1,99 @@
+import os
+import uuid
+
+import psycopg
+import pytest
+
+from conftest import requires_db
+from utils.bulk_delete import delete_library
+
+pytestmark = requires_db
+
+
+@pytest.fixture
+def db():
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as conn:
+        yield conn
+
+
+def _workout(client, user):
+    r = client.post("/users/workouts", json={"name": "Mine", "equipment": ["mat"]}, headers=user["headers"])
+    assert r.status_code == 201, r.get_json()
+    return r.get_json()["workout_id"]
+
+
+def _save(client, user, public_workout_id=1):
+    r = client.post(f"/public/workouts/save/{public_workout_id}", json={}, headers=user["headers"])
+    assert r.status_code == 201, r.get_json()
+    return r.get_json()["saved_workouts"][0]["id"]
+
+
+def _stranger(client):
+    username = "t" + uuid.uuid4().hex[:12]
+    client.post("/auth/register", json={"username": username, "password": "pw", "name": "Other",
+                                        "reg_number": username, "email": username + "@example.com"})
+    r = client.post("/auth/login", json={"username": username, "password": "pw"})
+    return {"headers": {"Authorization": "Bearer " + r.get_json()["token"]}}
+
+
+def _exists(db, table, row_id):
+    return db.execute(f"SELECT 1 FROM {table} WHERE id = %s", (row_id,)).fetchone() is not None
+
+
+def _deleted(client, user, url):
+    r = client.delete(url, headers=user["headers"])
+    assert r.status_code == 200, r.get_json()
+    return r.get_json()["deleted"]
+
+
+def test_malformed_ids_are_rejected(client, subscriber, db):
+    workout_id = _workout(client, subscriber)
+    for url in (f"/users/workouts/{workout_id},x", "/users/workouts/x", f"/users/workouts/{workout_id},",
+                "/users/saved-workouts/abc", "/users/saved-workouts/all"):
+        r = client.delete(url, headers=subscriber["headers"])
+        assert r.status_code == 400, url
+        assert r.get_json() == {"error": "IDs must be a comma-separated list of integers"}
+    assert _exists(db, "workouts", workout_id)
+
+
+def test_created_and_saved_ids_are_deleted_separately(client, subscriber, db):
+    workout_id, saved_id = _workout(client, subscriber), _save(client, subscriber)
+
+    assert _deleted(client, subscriber, f"/users/saved-workouts/{saved_id}") == {
+        "workouts": 0, "saved_workouts": 1, "images": 0}
+    assert _exists(db, "workouts", workout_id)
+
+    assert _deleted(client, subscriber, f"/users/workouts/{workout_id}") == {
+        "workouts": 1, "saved_workouts": 0, "images": 0}
+    assert db.execute("SELECT COUNT(*) FROM checklist_items WHERE workout_id = %s",
+                      (workout_id,)).fetchone() == (0,)
+
+
+def test_other_users_rows_are_not_deleted(client, subscriber, db):
+    workout_id, saved_id = _workout(client, subscriber), _save(client, subscriber)
+    stranger = _stranger(client)
+    assert _deleted(client, stranger, f"/users/workouts/{workout_id}")["workouts"] == 0
+    assert _deleted(client, stranger, f"/users/saved-workouts/{saved_id}")["saved_workouts"] == 0
+    assert _deleted(client, stranger, "/users/workouts/all") == {"workouts": 0, "saved_workouts": 0, "images": 0}
+    assert _exists(db, "workouts", workout_id) and _exists(db, "saved_workouts", saved_id)
+
+
+def test_library_is_deleted_in_batches_with_one_cleanup_job_each(client, subscriber, db):
+    workout_ids = [_workout(client, subscriber) for _ in range(5)]
+    saved_ids = [_save(client, subscriber, n) for n in (1, 2, 3)]
+    public_ids = {}
+    for workout_id in workout_ids[:3]:
+        public_ids[workout_id] = "test/" + uuid.uuid4().hex
+        db.execute("UPDATE workouts SET public_id = %s WHERE id = %s", (public_ids[workout_id], workout_id))
+
+    assert delete_library(subscriber["id"], everything=True, batch=2) == {
+        "workouts": 5, "saved_workouts": 3, "images": 3}
+    assert not any(_exists(db, "workouts", i) for i in workout_ids)
+    assert not any(_exists(db, "saved_workouts", i) for i in saved_ids)
+
+    jobs = db.execute(
+        "SELECT payload->'public_ids' FROM jobs WHERE kind = 'media.destroy_batch' "
+        "AND payload->'public_ids' ?| %s ORDER BY id", (list(public_ids.values()),)
+    ).fetchall()
+    assert sorted(len(j) for (j,) in jobs) == [1, 2]
+    assert sorted(p for (j,) in jobs for p in j) == sorted(public_ids.values())
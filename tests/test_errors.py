@@ -0,0 +1,104 @@
+import uuid
+
+from conftest import requires_db
+from utils.errors import error_counts
+
+
+def test_bad_query_parameters_are_typed_validation_errors(client):
+    before = error_counts().get("validation", 0)
+    for url in ("/public/workouts?fields=bogus", "/public/workouts?format=xml",
+                "/public/workouts/recommended?limit=ten"):
+        r = client.get(url)
+        assert r.status_code == 400, url
+        assert set(r.get_json()) == {"error"}
+    assert error_counts()["validation"] == before + 3
+
+
+def test_webhook_rejects_before_reading_the_body(client):
+    r = client.post("/public/paystack/webhook", data=b"x" * (1024 * 1024),
+                    headers={"X-Paystack-Signature": "0"})
+    assert r.status_code == 413
+    assert r.get_json() == {"error": "Payload too large"}
+
+    r = client.post("/public/paystack/webhook", data=b"{}", headers={"X-Paystack-Signature": "0"})
+    assert r.status_code == 401
+    assert r.get_json() == {"error": "Invalid signature"}
+
+
+@requires_db
+def test_register_clash_stays_a_400(client, user):
+    r = client.post("/auth/register", json={
+        "username": user["username"], "password": "pw", "name": "Test",
+        "reg_number": user["username"] + "-2", "email": user["username"] + "-2@example.com",
+    })
+    assert r.status_code == 400
+    assert r.get_json() == {"error": "Username already exists"}
+
+
+@requires_db
+def test_invalid_token_on_public_listing_is_anonymous(client):
+    r = client.get("/public/workouts?fields=id", headers={"Authorization": "Bearer not-a-jwt"})
+    assert r.status_code == 200
+    assert r.get_json()["user_id"] is None
+
+
+@requires_db
+def test_bad_user_query_parameters_are_rejected(client, user):
+    for url in ("/users/workouts?fields=bogus", "/users/home?fields=bogus",
+                "/users/stats?period=decade"):
+        assert client.get(url, headers=user["headers"]).status_code == 400, url
+
+
+def test_rate_limited_requests_get_retry_after():
+    from app import create_app
+
+    client = create_app({"TESTING": True, "RATE_LIMIT_STORE": "memory",
+                         "RATE_LIMITS": {"public_api.get_workouts": "1/minute"}}).test_client()
+    client.get("/public/workouts?fields=bogus")
+    before = error_counts().get("rate_limited", 0)
+    r = client.get("/public/workouts?fields=bogus")
+    assert r.status_code == 429
+    assert r.get_json() == {"error": "Too many requests", "retry_after": 60}
+    assert r.headers["Retry-After"] == "60"
+    assert error_counts()["rate_limited"] == before + 1
+
+
+@requires_db
+def test_idempotency_key_reuse_is_unprocessable(client, user):
+    headers = {**user["headers"], "Idempotency-Key": uuid.uuid4().hex}
+    assert client.post("/api/reminders", json={"time": "07:00"}, headers=headers).status_code == 201
+    r = client.post("/api/reminders", json={"time": "08:00"}, headers=headers)
+    assert r.status_code == 422
+    assert r.get_json() == {"error": "Idempotency-Key was already used for a different request"}
+
+    r = client.post("/api/reminders", json={"time": "07:00"},
+                    headers={**user["headers"], "Idempotency-Key": "k" * 256})
+    assert r.status_code == 400
+
+
+@requires_db
+def test_upload_errors_are_typed(client, user, tmp_path, monkeypatch):
+    from utils import uploads
+
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    r = client.post("/users/uploads", json={"content_type": "image/png", "size": 4}, headers=user["headers"])
+    url = "/users/uploads/" + r.get_json()["upload_id"]
+
+    def put(data, content_range):
+        return client.put(url, data=data, headers={**user["headers"], "Content-Range": content_range})
+
+    assert put(b"ab", "bytes 0-1/4").status_code == 200
+    r = put(b"ab", "bytes 0-1/4")
+    assert r.status_code == 409
+    assert r.get_json() == {"error": "Chunk does not start at the upload offset", "offset": 2}
+    assert r.headers["Upload-Offset"] == "2"
+    assert put(b"ab", "bytes 4-5/6").status_code == 416
+    assert put(b"ab", "bytes 2-3").status_code == 400
+
+    r = client.post(url + "/complete", json={"workout_id": 1}, headers=user["headers"])
+    assert r.status_code == 409
+    assert r.get_json()["offset"] == 2
+
+    uploads.remove_staging(r.request.path.split("/")[-2])
+    assert client.get(url, headers=user["headers"]).status_code == 410
+    assert client.get("/users/uploads/" + str(uuid.uuid4()), headers=user["headers"]).status_code == 404
@@ -0,0 +1,122 @@
+import csv
+import datetime
+import gzip
+import os
+import shutil
+import sys
+
+import psycopg
+import pytest
+
+from conftest import requires_db
+from scripts import export
+
+pytestmark = requires_db
+
+
+@pytest.fixture
+def db():
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as conn:
+        yield conn
+
+
+def _export(monkeypatch, out, table, lag=0):
+    monkeypatch.setattr(sys, "argv", ["export", "--out", str(out), "--tables", table,
+                                      "--format", "csv", "--lag", str(lag)])
+    export.main()
+    return export.load_watermarks(out).get(table)
+
+
+def _files(out, table):
+    return sorted(os.path.relpath(os.path.join(d, f), out)
+                  for d, _, files in os.walk(os.path.join(out, table)) for f in files)
+
+
+def _rows(out, table, files=None):
+    rows = []
+    for name in files or _files(out, table):
+        with gzip.open(os.path.join(out, name), "rt", newline="") as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+def _ids(rows):
+    return [int(r["id"]) for r in rows]
+
+
+def _reminder(client, user, time="07:00"):
+    r = client.post("/api/reminders", json={"time": time}, headers=user["headers"])
+    assert r.status_code == 201, r.get_json()
+    return r.get_json()["reminder"]["id"]
+
+
+def test_runs_resume_from_the_watermark(client, user, tmp_path, monkeypatch):
+    first = _reminder(client, user)
+    mark = _export(monkeypatch, tmp_path, "reminders")
+    assert first in _ids(_rows(tmp_path, "reminders"))
+    assert mark["format"] == "csv"
+    before = _files(tmp_path, "reminders")
+
+    second = _reminder(client, user)
+    assert client.put(f"/api/reminders/{first}", json={"time": "08:00"},
+                      headers=user["headers"]).status_code == 200
+    mark = _export(monkeypatch, tmp_path, "reminders")
+    new_files = sorted(set(_files(tmp_path, "reminders")) - set(before))
+    rows = [r for r in _rows(tmp_path, "reminders", new_files) if int(r["user_id"]) == user["id"]]
+    # The new reminder, plus the changed one again as its new version
+    assert sorted(_ids(rows)) == sorted([first, second])
+    assert {r["time"] for r in rows if int(r["id"]) == first} == {"08:00"}
+
+    # Nothing new: no files, watermark unchanged
+    files = _files(tmp_path, "reminders")
+    assert _export(monkeypatch, tmp_path, "reminders") == mark
+    assert _files(tmp_path, "reminders") == files
+
+
+def test_rerun_from_the_same_watermark_overwrites_its_files(client, user, tmp_path, monkeypatch):
+    _export(monkeypatch, tmp_path, "reminders")
+    saved = tmp_path / "saved-watermarks.json"
+    shutil.copy(tmp_path / export.WATERMARKS_FILE, saved)
+    before = _files(tmp_path, "reminders")
+
+    reminder = _reminder(client, user)
+    _export(monkeypatch, tmp_path, "reminders")
+    files = _files(tmp_path, "reminders")
+
+    # A run that crashed before saving its watermark is simply done again
+    shutil.copy(saved, tmp_path / export.WATERMARKS_FILE)
+    assert _export(monkeypatch, tmp_path, "reminders") is not None
+    assert _files(tmp_path, "reminders") == files
+    new = sorted(set(files) - set(before))
+    assert _ids(_rows(tmp_path, "reminders", new)).count(reminder) == 1
+
+
+def test_recent_changes_wait_for_the_next_run(client, user, db, tmp_path, monkeypatch):
+    reminder = _reminder(client, user)
+    mark = _export(monkeypatch, tmp_path, "reminders", lag=3600)
+    assert reminder not in _ids(_rows(tmp_path, "reminders"))
+    if mark is not None:
+        updated_at = db.execute("SELECT updated_at FROM reminders WHERE id = %s", (reminder,)).fetchone()[0]
+        assert datetime.datetime.fromisoformat(mark["updated_at"]) < updated_at
+
+    _export(monkeypatch, tmp_path, "reminders")
+    assert reminder in _ids(_rows(tmp_path, "reminders"))
+
+
+def test_ids_after_a_recent_row_wait_too(client, user, db, tmp_path, monkeypatch):
+    # An in-flight insert could still commit an id below a young row; nothing
+    # past the first young id is exported until it is old enough
+    saved = []
+    for public_workout_id in (1, 2):
+        r = client.post(f"/public/workouts/save/{public_workout_id}", json={}, headers=user["headers"])
+        assert r.status_code == 201, r.get_json()
+        saved.append(r.get_json()["saved_workouts"][0]["id"])
+    young, old = saved
+    db.execute("UPDATE saved_workouts SET created_at = NOW() - INTERVAL '1 day' WHERE id = %s", (old,))
+
+    mark = _export(monkeypatch, tmp_path, "saved_workouts", lag=3600)
+    assert mark is None or mark["id"] < young
+    assert not {young, old} & set(_ids(_rows(tmp_path, "saved_workouts")))
+
+    assert _export(monkeypatch, tmp_path, "saved_workouts")["id"] >= old
+    assert {young, old} <= set(_ids(_rows(tmp_path, "saved_workouts")))
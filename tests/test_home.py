@@ -0,0 +1,57 @@
+from conftest import requires_db
+
+pytestmark = requires_db
+
+
+def _get(client, user, url):
+    r = client.get(url, headers=user["headers"])
+    assert r.status_code == 200, (url, r.get_json())
+    return r.get_json()
+
+
+def _library(client, user):
+    """A created workout with one item checked, a saved one and a reminder."""
+    r = client.post("/users/workouts", json={"name": "Mine", "equipment": ["mat", "dumbbell"]},
+                    headers=user["headers"])
+    assert r.status_code == 201, r.get_json()
+    item = _get(client, user, "/users/workouts")[0]["checklist"][0]
+    assert client.patch(f"/users/checklist/items/{item['id']}", headers=user["headers"]).status_code == 200
+    assert client.post("/public/workouts/save/1", json={}, headers=user["headers"]).status_code == 201
+    assert client.post("/api/reminders", json={"time": "07:00", "description": "Stretch"},
+                       headers=user["headers"]).status_code == 201
+
+
+def test_home_matches_the_endpoints_it_replaces(client, subscriber):
+    _library(client, subscriber)
+    home = _get(client, subscriber, "/users/home?equipment=mat")
+
+    me = _get(client, subscriber, "/auth/me")
+    assert {k: home["profile"][k] for k in me} == me
+    assert home["profile"]["subscribed"] is True
+
+    library = _get(client, subscriber, "/users/workouts")
+    assert home["workouts"] == library
+    assert {w["source"] for w in library} == {"created", "saved"}
+    assert any(item["done"] for w in library for item in w["checklist"])
+
+    assert home["reminders"] == _get(client, subscriber, "/api/reminders")["reminders"]
+    assert len(home["reminders"]) == 1
+
+    recommended = _get(client, subscriber, "/public/workouts/recommended?equipment=mat&limit=10")
+    assert home["recommended"] == recommended["workouts"]
+    assert home["recommended"]
+
+
+def test_home_fields_apply_to_the_library(client, subscriber):
+    _library(client, subscriber)
+    home = _get(client, subscriber, "/users/home?fields=name,checklist")
+    assert home["workouts"] == _get(client, subscriber, "/users/workouts?fields=name,checklist")
+    assert all(set(w) == {"name", "checklist"} for w in home["workouts"])
+
+
+def test_home_of_a_new_user_is_empty_but_complete(client, user):
+    home = _get(client, user, "/users/home")
+    assert home["profile"]["username"] == user["username"]
+    assert home["profile"]["subscribed"] is False
+    assert home["workouts"] == [] and home["reminders"] == []
+    assert home["recommended"] == _get(client, user, "/public/workouts/recommended?limit=10")["workouts"]
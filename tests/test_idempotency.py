@@ -0,0 +1,31 @@
+import io
+
+from utils.idempotency import request_fingerprint
+
+
+def _fingerprint(app, image, name="A"):
+    data = {"name": name, "image": (io.BytesIO(image), "photo.jpg")}
+    with app.test_request_context("/users/workouts", method="POST", data=data,
+                                  content_type="multipart/form-data"):
+        from flask import request
+
+        fingerprint = request_fingerprint()
+        # The view still gets the whole file
+        assert request.files["image"].read() == image
+        return fingerprint
+
+
+def test_multipart_fingerprint_covers_file_bytes(app):
+    assert _fingerprint(app, b"\xff\xd8one") == _fingerprint(app, b"\xff\xd8one")
+    # Same name and size, different contents
+    assert _fingerprint(app, b"\xff\xd8one") != _fingerprint(app, b"\xff\xd8two")
+    assert _fingerprint(app, b"x", name="A") != _fingerprint(app, b"x", name="B")
+
+
+def test_json_fingerprint_covers_body(app):
+    def fingerprint(body):
+        with app.test_request_context("/api/reminders", method="POST", json=body):
+            return request_fingerprint()
+
+    assert fingerprint({"time": "07:00"}) == fingerprint({"time": "07:00"})
+    assert fingerprint({"time": "07:00"}) != fingerprint({"time": "08:00"})
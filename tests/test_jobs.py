@@ -0,0 +1,146 @@
+import os
+import uuid
+
+import psycopg
+import pytest
+
+from conftest import requires_db
+from utils import jobs
+from utils.jobs import Worker, enqueue, submit
+
+pytestmark = requires_db
+
+
+@pytest.fixture
+def db():
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as conn:
+        yield conn
+
+
+@pytest.fixture
+def kind(monkeypatch):
+    """A job kind of its own, so tests never claim each other's rows."""
+    kind = "test." + uuid.uuid4().hex[:12]
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        if payload.get("fail"):
+            raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.JOBS, kind, jobs.JobType(kind, handler, concurrency=2, max_attempts=2, every=None))
+    monkeypatch.setattr(jobs, "backoff", lambda attempts: 0)
+    handler.calls = calls
+    yield kind
+
+
+def _worker(kind):
+    return Worker(kinds=[kind], threads=4)
+
+
+def _claim(worker, kind, limit=10):
+    return worker.claim(jobs.JOBS[kind], limit)
+
+
+def _execute(worker, kind, claimed):
+    for job_id, payload, attempts, max_attempts in claimed:
+        worker._inflight += 1
+        worker._execute(jobs.JOBS[kind], job_id, payload, attempts, max_attempts)
+
+
+def _job(db, job_id):
+    return db.execute("SELECT attempts, locked_at IS NOT NULL, last_error FROM jobs WHERE id = %s",
+                      (job_id,)).fetchone()
+
+
+def test_enqueue_commits_with_the_callers_transaction(kind, db):
+    with pytest.raises(RuntimeError):
+        with psycopg.connect(os.environ["DATABASE_URL"]) as conn:
+            with conn.cursor() as cur:
+                job_id = enqueue(cur, kind, {"n": 1})
+                raise RuntimeError("handler failed after enqueueing")
+    assert _job(db, job_id) is None
+
+    key = kind + ":once"
+    assert submit(kind, {"n": 2}, dedupe_key=key) is not None
+    assert submit(kind, {"n": 3}, dedupe_key=key) is None
+    assert db.execute("SELECT COUNT(*) FROM jobs WHERE kind = %s", (kind,)).fetchone() == (1,)
+
+
+def test_a_job_is_handed_out_once(kind, db):
+    job_id = submit(kind, {"n": 1})
+    first, second = _worker(kind), _worker(kind)
+    assert [row[0] for row in _claim(first, kind)] == [job_id]
+    assert _claim(second, kind) == []
+    assert _job(db, job_id)[:2] == (1, True)
+
+    _execute(first, kind, [(job_id, {"n": 1}, 1, 2)])
+    assert _job(db, job_id) is None
+    assert jobs.JOBS[kind].fn.calls == [{"n": 1}]
+
+
+def test_row_locked_by_another_claimer_is_skipped(kind, db):
+    locked, free = submit(kind), submit(kind)
+    with psycopg.connect(os.environ["DATABASE_URL"]) as other:
+        other.execute("SELECT 1 FROM jobs WHERE id = %s FOR UPDATE", (locked,))
+        assert [row[0] for row in _claim(_worker(kind), kind)] == [free]
+
+
+def test_claim_of_a_crashed_worker_is_handed_out_again(kind, db):
+    job_id = submit(kind)
+    _claim(_worker(kind), kind)
+    assert _claim(_worker(kind), kind) == []
+
+    db.execute("UPDATE jobs SET locked_at = NOW() - %s * INTERVAL '1 second' WHERE id = %s",
+               (jobs.JOB_LOCK_SECONDS + 1, job_id))
+    assert [row[:1] + row[2:] for row in _claim(_worker(kind), kind)] == [(job_id, 2, 2)]
+
+
+def test_failed_job_is_retried_then_buried(kind, db):
+    worker = _worker(kind)
+    job_id = submit(kind, {"fail": True})
+
+    _execute(worker, kind, _claim(worker, kind))
+    assert _job(db, job_id) == (1, False, "RuntimeError: boom")
+
+    _execute(worker, kind, _claim(worker, kind))
+    assert _job(db, job_id) is None
+    assert db.execute("SELECT kind, attempts, last_error FROM dead_jobs WHERE id = %s",
+                      (job_id,)).fetchone() == (kind, 2, "RuntimeError: boom")
+    assert _claim(worker, kind) == []
+
+
+def test_concurrency_limit_holds_across_workers(kind, db):
+    ids = [submit(kind, {"n": n}) for n in range(5)]
+    first, second = _worker(kind), _worker(kind)
+
+    claimed = _claim(first, kind)
+    assert len(claimed) == 2
+    assert _claim(second, kind) == []
+
+    _execute(first, kind, claimed[:1])
+    assert len(_claim(second, kind)) == 1
+    assert _claim(first, kind) == []
+    assert db.execute("SELECT COUNT(*) FROM jobs WHERE id = ANY(%s)", (ids,)).fetchone() == (4,)
+
+
+def test_kind_being_claimed_elsewhere_is_skipped(kind, db):
+    submit(kind)
+    with psycopg.connect(os.environ["DATABASE_URL"]) as other:
+        other.execute("SELECT pg_advisory_xact_lock(hashtext('jobs:' || %s))", (kind,))
+        assert _claim(_worker(kind), kind) == []
+    assert len(_claim(_worker(kind), kind)) == 1
+
+
+def test_periodic_job_is_scheduled_once_per_slot(kind, db, monkeypatch):
+    monkeypatch.setattr(jobs.JOBS[kind], "every", 3600)
+    for worker in (_worker(kind), _worker(kind)):
+        with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as conn:
+            with conn.cursor() as cur:
+                worker.schedule_periodic(cur)
+                worker.schedule_periodic(cur)
+    [(key, delay)] = db.execute(
+        "SELECT dedupe_key, EXTRACT(EPOCH FROM run_at - NOW()) FROM jobs WHERE kind = %s", (kind,)
+    ).fetchall()
+    assert key.startswith(kind + "@")
+    assert 0 < delay <= 3600
@@ -0,0 +1,152 @@
+import json
+import os
+import uuid
+
+import psycopg
+import pytest
+
+from conftest import requires_db
+from utils import payments
+from utils.payments import process_batch, sign
+
+pytestmark = requires_db
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setattr(payments, "PAYSTACK_SECRET_KEY", "sk_test_" + uuid.uuid4().hex)
+
+
+def _event(event, reference, user_id=None, email=None):
+    data = {"amount": 500000, "currency": "NGN", "customer": {"email": email}}
+    data["transaction_reference" if event == "refund.processed" else "reference"] = reference
+    if user_id is not None:
+        data["metadata"] = {"user_id": user_id}
+    return json.dumps({"event": event, "data": data}).encode()
+
+
+def _post(client, body, signature=None):
+    return client.post("/public/paystack/webhook", data=body, headers={
+        "X-Paystack-Signature": sign(body) if signature is None else signature,
+        "Content-Type": "application/json",
+    })
+
+
+def _deliver(client, *bodies):
+    for body in bodies:
+        assert _post(client, body).status_code == 200
+    while process_batch():
+        pass
+
+
+def _query(sql, params):
+    with psycopg.connect(os.environ["DATABASE_URL"]) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def _payments(reference):
+    return _query("SELECT user_id, status FROM payments WHERE reference = %s", (reference,))
+
+
+def _reference():
+    return "ref-" + uuid.uuid4().hex
+
+
+def test_bad_signature_is_rejected(client):
+    reference = _reference()
+    body = _event("charge.success", reference, user_id=1)
+    assert _post(client, body, signature="0" * 128).status_code == 401
+    assert _post(client, body, signature="").status_code == 401
+    tampered = body.replace(b"500000", b"1")
+    assert _post(client, tampered, signature=sign(body)).status_code == 401
+    assert _query("SELECT 1 FROM payment_events WHERE payload->'data'->>'reference' = %s",
+                  (reference,)) == []
+
+
+def test_duplicate_deliveries_make_one_payment(client, user):
+    reference = _reference()
+    body = _event("charge.success", reference, user_id=user["id"])
+    _deliver(client, body, body)
+    _deliver(client, body)
+    assert _payments(reference) == [(user["id"], "success")]
+
+
+def test_status_only_moves_forward(client, user):
+    reference = _reference()
+    _deliver(client, _event("charge.success", reference, user_id=user["id"]))
+    _deliver(client, _event("charge.failed", reference, user_id=user["id"]))
+    assert _payments(reference) == [(user["id"], "success")]
+
+
+def test_refund_before_its_charge_stays_reversed(client, user):
+    reference = _reference()
+    _deliver(client, _event("refund.processed", reference, user_id=user["id"]))
+    _deliver(client, _event("charge.success", reference, user_id=user["id"]))
+    assert _payments(reference) == [(user["id"], "reversed")]
+
+
+def test_user_found_by_email(client, user):
+    reference = _reference()
+    _deliver(client, _event("charge.success", reference, email=user["username"] + "@example.com"))
+    assert _payments(reference) == [(user["id"], "success")]
+
+
+def test_unmatched_user_is_recorded_on_the_event(client, user):
+    reference = _reference()
+    _deliver(client,
+             _event("charge.success", reference, email="nobody-" + uuid.uuid4().hex + "@example.com"),
+             _event("charge.success", reference, user_id=2 ** 31 - 1))
+    assert _payments(reference) == []
+    errors = _query("SELECT error, processed_at IS NOT NULL FROM payment_events "
+                    "WHERE payload->'data'->>'reference' = %s", (reference,))
+    assert errors == [("no matching user", True)] * 2
+
+
+def _bad(event, reference, owner, field, value):
+    body = json.loads(_event(event, reference, user_id=owner))
+    target = body["data"]["metadata"] if field in ("user_id", "type") else body["data"]
+    target[field] = value
+    return json.dumps(body).encode()
+
+
+def _event_errors(reference):
+    return _query("SELECT error FROM payment_events WHERE payload->'data'->>'reference' = %s "
+                  "AND processed_at IS NOT NULL ORDER BY id", (reference,))
+
+
+@pytest.mark.parametrize("field, value, error", [
+    ("user_id", "99999999999", "metadata.user_id is out of range"),
+    ("amount", "lots", "amount must be a number"),
+    ("paid_at", "yesterday", "paid_at must be an ISO 8601 date-time"),
+    ("currency", "N" * 11, "currency is longer than 10"),
+    ("type", "t" * 51, "metadata.type is longer than 50"),
+])
+def test_bad_event_does_not_block_the_others(client, user, field, value, error):
+    bad, good = _reference(), _reference()
+    _deliver(client,
+             _bad("charge.success", bad, user["id"], field, value),
+             _event("charge.success", good, user_id=user["id"]))
+    assert _payments(bad) == []
+    assert _event_errors(bad) == [(error,)]
+    assert _payments(good) == [(user["id"], "success")]
+
+
+def test_event_the_database_rejects_is_isolated(client, user, monkeypatch):
+    # Something parse_event lets through but the payments table refuses
+    bad, good = _reference(), _reference()
+    parse_event = payments.parse_event
+
+    def lax_parse(payload):
+        row = parse_event(payload)
+        if row["reference"] == bad:
+            row["currency"] = "N" * 11
+        return row
+
+    monkeypatch.setattr(payments, "parse_event", lax_parse)
+    _deliver(client,
+             _event("charge.success", bad, user_id=user["id"]),
+             _event("charge.success", good, user_id=user["id"]))
+    assert _payments(bad) == []
+    [(error,)] = _event_errors(bad)
+    assert error.startswith("rejected by the database")
+    assert _payments(good) == [(user["id"], "success")]
@@ -0,0 +1,95 @@
+import re
+
+import psycopg
+import pytest
+from flask import jsonify
+
+from conftest import requires_db
+from utils import query_tracer
+from utils.query_tracer import QueryBudgetExceeded, fingerprint
+
+
+@pytest.fixture
+def n_plus_one_app(app):
+    from db import get_conn
+
+    # One query for the list, then one per row: the pattern budgets catch
+    @app.route("/_test/n-plus-one")
+    def n_plus_one():
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id FROM generate_series(1, 5) AS id")
+                names = []
+                for (row_id,) in cur.fetchall():
+                    cur.execute("SELECT %s::text", (row_id,))
+                    names.append(cur.fetchone()[0])
+        return jsonify(names)
+
+    return app
+
+
+def test_fingerprint_collapses_literals():
+    assert fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a'") == \
+        fingerprint("SELECT  *  FROM t WHERE id = 42 AND name = 'b'")
+    assert fingerprint("SELECT 1 WHERE x IN (1, 2, 3)") == fingerprint("SELECT 1 WHERE x IN (%s)")
+
+
+@requires_db
+def test_n_plus_one_endpoint_exceeds_budget(n_plus_one_app):
+    n_plus_one_app.config["QUERY_BUDGETS"] = {"n_plus_one": 3}
+    with pytest.raises(QueryBudgetExceeded, match=r"n_plus_one ran 6 queries \(budget 3\)"):
+        n_plus_one_app.test_client().get("/_test/n-plus-one")
+
+
+@requires_db
+def test_within_budget_reports_query_count(n_plus_one_app):
+    n_plus_one_app.config["QUERY_BUDGETS"] = {"n_plus_one": 6}
+    r = n_plus_one_app.test_client().get("/_test/n-plus-one")
+    assert r.status_code == 200
+    assert r.headers["X-Query-Count"] == "6"
+
+
+@requires_db
+def test_library_listing_stays_within_budget(app, client, user):
+    app.config["QUERY_BUDGETS"] = {"workouts.list_workouts": 4}
+    r = client.get("/users/workouts", headers=user["headers"])
+    assert r.status_code == 200
+    assert int(r.headers["X-Query-Count"]) <= 4
+
+    # ... and going over it is reported
+    app.config["QUERY_BUDGETS"] = {"workouts.list_workouts": 1}
+    with pytest.raises(QueryBudgetExceeded, match=r"workouts.list_workouts ran \d+ queries \(budget 1\)"):
+        client.get("/users/workouts?fields=name", headers=user["headers"])
+
+
+@requires_db
+def test_slow_query_in_pipeline_does_not_break_the_batch(monkeypatch):
+    from db import get_pool
+
+    # Every statement is "slow": an EXPLAIN inside the pipeline would force
+    # a Sync and commit the INSERT before the failing statement
+    monkeypatch.setattr(query_tracer, "SLOW_QUERY_MS", 0)
+    with get_pool().connection() as conn:
+        conn.execute("CREATE TEMP TABLE tracer_pipeline (n INTEGER)")
+        try:
+            with pytest.raises(psycopg.errors.DivisionByZero):
+                with conn.pipeline():
+                    conn.execute("INSERT INTO tracer_pipeline VALUES (%s)", (1,))
+                    conn.execute("SELECT 1 / 0")
+            assert conn.execute("SELECT count(*) FROM tracer_pipeline").fetchone()[0] == 0
+        finally:
+            conn.execute("DROP TABLE tracer_pipeline")
+
+
+@requires_db
+@pytest.mark.parametrize("explain_everything", [False, True])
+def test_explaining_a_slow_statement_keeps_the_transaction_usable(monkeypatch, explain_everything):
+    from db import unit_of_work
+
+    monkeypatch.setattr(query_tracer, "SLOW_QUERY_MS", 0)
+    if explain_everything:
+        # EXPLAIN SET fails: it must fail in its own savepoint
+        monkeypatch.setattr(query_tracer, "_EXPLAINABLE", re.compile(""))
+    with unit_of_work(synchronous_commit="off") as conn:
+        conn.execute("SET LOCAL statement_timeout = 5000")
+        assert conn.execute("SELECT current_setting('statement_timeout')").fetchone() == ("5s",)
@@ -0,0 +1,53 @@
+import pytest
+
+from conftest import requires_db
+from utils.rate_limit import MemoryStore, PostgresStore
+
+
+@pytest.fixture
+def limited_app():
+    from app import create_app
+
+    def build(**config):
+        app = create_app({"TESTING": True, "RATE_LIMIT_STORE": "memory",
+                          "RATE_LIMITS": {"public_api.get_workouts": "2/minute"}, **config})
+        return app.test_client()
+
+    return build
+
+
+def _statuses(client, forwarded_for):
+    return [client.get("/public/workouts?fields=id", headers={"X-Forwarded-For": forwarded_for},
+                       environ_base={"REMOTE_ADDR": "10.0.0.1"}).status_code for _ in range(3)]
+
+
+@requires_db
+def test_behind_trusted_proxy_clients_get_their_own_bucket(limited_app):
+    client = limited_app(TRUSTED_PROXIES=1)
+    assert _statuses(client, "203.0.113.1") == [200, 200, 429]
+    assert _statuses(client, "203.0.113.2") == [200, 200, 429]
+
+
+@requires_db
+def test_without_trusted_proxies_forwarded_for_is_ignored(limited_app):
+    client = limited_app()
+    assert _statuses(client, "203.0.113.1") == [200, 200, 429]
+    # A spoofed header does not buy a fresh bucket
+    assert _statuses(client, "203.0.113.2") == [429, 429, 429]
+
+
+def test_memory_store_refills():
+    store = MemoryStore()
+    assert store.take("k", 1, 1.0, now=0)[0]
+    assert not store.take("k", 1, 1.0, now=0.5)[0]
+    assert store.take("k", 1, 1.0, now=2)[0]
+
+
+@requires_db
+def test_postgres_store_refills():
+    import uuid
+
+    store, key = PostgresStore(), "test:" + uuid.uuid4().hex
+    assert store.take(key, 1, 1.0, now=0)[0]
+    assert not store.take(key, 1, 1.0, now=0.5)[0]
+    assert store.take(key, 1, 1.0, now=2)[0]
@@ -0,0 +1,95 @@
+"""Read-your-writes pins and replica ejection in db.get_conn.
+
+Runs with only DATABASE_URL: the "replicas" are the same database under
+their own application_name, which is enough to tell who served a read.
+"""
+import os
+
+import psycopg
+import pytest
+from psycopg.conninfo import make_conninfo
+
+import db
+from conftest import requires_db
+
+pytestmark = requires_db
+
+
+def _served_by(conn):
+    return conn.execute("SHOW application_name").fetchone()[0] or "primary"
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    urls = [make_conninfo(os.environ["DATABASE_URL"], application_name=f"replica{n}") for n in (1, 2)]
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", ",".join(urls))
+    monkeypatch.setattr(db, "_replicas", None)
+    try:
+        yield db.get_replicas()
+    finally:
+        for replica in db.get_replicas():
+            replica.pool.close()
+        db._replicas = None
+
+
+def _read(user_id=None):
+    with db.get_conn(readonly=True, user_id=user_id) as conn:
+        return _served_by(conn)
+
+
+def test_reads_rotate_over_healthy_replicas(replicas):
+    assert {_read() for _ in range(4)} == {"replica1", "replica2"}
+
+    replicas[0].eject()
+    assert {_read() for _ in range(4)} == {"replica2"}
+
+    replicas[1].eject()
+    assert _read() == "primary"
+
+    # Back in rotation once the ejection runs out
+    replicas[0].ejected_until = 0.0
+    assert _read() == "replica1"
+
+
+def test_connection_error_mid_read_ejects_the_replica(replicas):
+    with pytest.raises(psycopg.OperationalError):
+        with db.get_conn(readonly=True) as conn:
+            served = _served_by(conn)
+            raise psycopg.OperationalError("server closed the connection unexpectedly")
+    ejected = [r for r in replicas if not r.healthy]
+    assert [r.url for r in ejected] == [r.url for r in replicas if served in r.url]
+
+    # A bad query is the caller's problem, not the replica's
+    with pytest.raises(psycopg.errors.UndefinedTable):
+        with db.get_conn(readonly=True) as conn:
+            conn.execute("SELECT * FROM no_such_table")
+    assert [r for r in replicas if not r.healthy] == ejected
+
+
+def test_pin_keeps_a_writer_on_the_primary_until_it_expires(replicas, monkeypatch):
+    db.pin_to_primary(10 ** 9)
+    assert _read(10 ** 9) == "primary"
+    assert _read(10 ** 9 + 1).startswith("replica")
+    assert _read().startswith("replica")
+
+    monkeypatch.setattr(db, "READ_YOUR_WRITES_SECONDS", -1)
+    db.pin_to_primary(10 ** 9)
+    assert not db.pinned_to_primary(10 ** 9)
+    assert _read(10 ** 9).startswith("replica")
+
+
+def test_only_successful_writes_pin(replicas, client, user):
+    assert client.get("/api/reminders", headers=user["headers"]).status_code == 200
+    assert client.post("/api/reminders", json={}, headers=user["headers"]).status_code == 400
+    assert not db.pinned_to_primary(user["id"])
+
+    assert client.post("/api/reminders", json={"time": "07:00"}, headers=user["headers"]).status_code == 201
+    assert db.pinned_to_primary(user["id"])
+    assert _read(user["id"]) == "primary"
+
+
+def test_no_pins_without_replicas(monkeypatch):
+    monkeypatch.delenv("DATABASE_REPLICA_URLS", raising=False)
+    db.pin_to_primary(10 ** 9 + 2)
+    assert not db.pinned_to_primary(10 ** 9 + 2)
+    assert _read(10 ** 9 + 2) == "primary"
@@ -0,0 +1,97 @@
+"""Read routing in db.get_conn.
+
+The routing tests run against real replicas: set DATABASE_REPLICA_URLS
+(a URL that only differs from DATABASE_URL by e.g. application_name works
+too). The dead-replica fallback only needs DATABASE_URL.
+"""
+import os
+
+import pytest
+from psycopg.conninfo import conninfo_to_dict
+
+import db
+from conftest import requires_db
+
+requires_replicas = pytest.mark.skipif(
+    not os.getenv("DATABASE_REPLICA_URLS"), reason="DATABASE_REPLICA_URLS not set"
+)
+
+
+def _connected_to(conn, url):
+    dsn = conninfo_to_dict(conn.info.dsn)
+    return all(dsn.get(k) == str(v) for k, v in conninfo_to_dict(url).items() if k != "password")
+
+
+def _served_by(conn):
+    for url in db.get_replica_urls():
+        if _connected_to(conn, url):
+            return "replica"
+    return "primary" if _connected_to(conn, db.get_db_url()) else "unknown"
+
+
+@pytest.fixture
+def healthy_replicas():
+    if any(conninfo_to_dict(u) == conninfo_to_dict(db.get_db_url()) for u in db.get_replica_urls()):
+        pytest.skip("a replica URL is identical to DATABASE_URL")
+    for replica in db.get_replicas():
+        replica.ejected_until = 0.0
+    yield db.get_replicas()
+    for replica in db.get_replicas():
+        replica.ejected_until = 0.0
+
+
+@requires_db
+@requires_replicas
+def test_reads_go_to_a_replica(healthy_replicas):
+    with db.get_conn(readonly=True) as conn:
+        assert _served_by(conn) == "replica"
+    with db.get_conn() as conn:
+        assert _served_by(conn) == "primary"
+
+
+@requires_db
+@requires_replicas
+def test_writer_is_pinned_to_primary(healthy_replicas, client, user):
+    with db.get_conn(readonly=True, user_id=user["id"]) as conn:
+        assert _served_by(conn) == "replica"
+
+    r = client.post("/api/reminders", json={"time": "07:00"}, headers=user["headers"])
+    assert r.status_code == 201
+    assert db.pinned_to_primary(user["id"])
+    with db.get_conn(readonly=True, user_id=user["id"]) as conn:
+        assert _served_by(conn) == "primary"
+
+    # Other users keep reading from the replicas
+    with db.get_conn(readonly=True, user_id=user["id"] + 1) as conn:
+        assert _served_by(conn) == "replica"
+
+
+@requires_db
+@requires_replicas
+def test_ejected_replicas_fall_back_to_primary(healthy_replicas):
+    for replica in healthy_replicas:
+        replica.eject()
+    with db.get_conn(readonly=True) as conn:
+        assert _served_by(conn) == "primary"
+
+
+@requires_db
+def test_unreachable_replica_is_ejected(monkeypatch):
+    dead = "postgresql://postgres@127.0.0.1:1/none?connect_timeout=1"
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", dead)
+    monkeypatch.setattr(db, "REPLICA_CONNECT_TIMEOUT", 0.5)
+    monkeypatch.setattr(db, "_replicas", None)
+    try:
+        with db.get_conn(readonly=True) as conn:
+            assert conn.execute("SELECT 1").fetchone() == (1,)
+            assert _served_by(conn) == "primary"
+        (replica,) = db.get_replicas()
+        assert not replica.healthy
+
+        # Ejected: the next read goes straight to the primary
+        with db.get_conn(readonly=True) as conn:
+            assert _served_by(conn) == "primary"
+    finally:
+        for replica in db.get_replicas():
+            replica.pool.close()
+        db._replicas = None
@@ -0,0 +1,94 @@
+import os
+
+import psycopg
+import pytest
+
+from conftest import requires_db
+from utils.retention import archive_batch
+
+pytestmark = requires_db
+
+DAYS = 365
+
+
+@pytest.fixture
+def db():
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as conn:
+        yield conn
+
+
+def _workout(client, user):
+    r = client.post("/users/workouts", json={"name": "Old", "equipment": ["mat"]}, headers=user["headers"])
+    assert r.status_code == 201, r.get_json()
+    return r.get_json()["workout_id"]
+
+
+def _finish(db, workout_id, days_ago=DAYS + 30, except_first=False):
+    db.execute("""
+        UPDATE checklist_items SET done = TRUE, completed_at = NOW() - %s * INTERVAL '1 day'
+        WHERE workout_id = %s AND (NOT %s OR id > (SELECT MIN(id) FROM checklist_items WHERE workout_id = %s))
+    """, (days_ago, workout_id, except_first, workout_id))
+
+
+def _counts(db, workout_id):
+    live = db.execute("SELECT COUNT(*) FROM checklist_items WHERE workout_id = %s", (workout_id,)).fetchone()[0]
+    archived = db.execute("SELECT COUNT(*) FROM checklist_items_archive WHERE workout_id = %s",
+                          (workout_id,)).fetchone()[0]
+    return live, archived
+
+
+def _archive():
+    return archive_batch("checklist_archive_batch", DAYS, limit=1000)
+
+
+def test_finished_checklist_is_archived_whole(client, subscriber, db):
+    workout_id = _workout(client, subscriber)
+    items, _ = _counts(db, workout_id)
+    assert items > 1
+    _finish(db, workout_id)
+
+    _archive()
+    assert _counts(db, workout_id) == (0, items)
+    assert db.execute("SELECT DISTINCT user_id FROM checklist_items_archive WHERE workout_id = %s",
+                      (workout_id,)).fetchall() == [(subscriber["id"],)]
+
+
+def test_checklist_with_work_left_stays(client, subscriber, db):
+    unfinished, recent = _workout(client, subscriber), _workout(client, subscriber)
+    _finish(db, unfinished, except_first=True)
+    _finish(db, recent, days_ago=1)
+
+    _archive()
+    assert _counts(db, unfinished)[1] == 0
+    assert _counts(db, recent)[1] == 0
+
+
+def test_checklist_being_toggled_is_left_whole(client, subscriber, db):
+    workout_id = _workout(client, subscriber)
+    items, _ = _counts(db, workout_id)
+    _finish(db, workout_id)
+
+    # A toggle in flight holds a lock on one item and will un-check it
+    with psycopg.connect(os.environ["DATABASE_URL"]) as toggle:
+        toggle.execute("""
+            UPDATE checklist_items SET done = FALSE, completed_at = NULL
+            WHERE id = (SELECT MIN(id) FROM checklist_items WHERE workout_id = %s)
+        """, (workout_id,))
+        _archive()
+        assert _counts(db, workout_id) == (items, 0)
+        toggle.commit()
+
+    # Un-checked for real now: the checklist is live and stays
+    _archive()
+    assert _counts(db, workout_id) == (items, 0)
+
+
+def test_expired_reminders_are_archived(client, user, db):
+    r = client.post("/api/reminders", json={"time": "07:00", "expires_at": "2000-01-01T00:00:00Z"},
+                    headers=user["headers"])
+    reminder_id = r.get_json()["reminder"]["id"]
+
+    archive_batch("reminders_archive_batch", DAYS, limit=1000)
+    assert db.execute("SELECT 1 FROM reminders WHERE id = %s", (reminder_id,)).fetchone() is None
+    assert db.execute("SELECT user_id FROM reminders_archive WHERE id = %s",
+                      (reminder_id,)).fetchone() == (user["id"],)
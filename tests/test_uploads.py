@@ -0,0 +1,33 @@
+import io
+import uuid
+
+import pytest
+from werkzeug.wsgi import LimitedStream
+
+from utils import uploads
+
+
+@pytest.fixture
+def upload_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    upload_id = str(uuid.uuid4())
+    uploads.create_staging(upload_id)
+    return upload_id
+
+
+def test_append_chunk(upload_id):
+    assert uploads.append_chunk(upload_id, 0, io.BytesIO(b"abcdef"), 6) == 6
+    assert uploads.append_chunk(upload_id, 6, io.BytesIO(b"gh"), 2) == 8
+    with pytest.raises(uploads.OffsetMismatch) as e:
+        uploads.append_chunk(upload_id, 4, io.BytesIO(b"xx"), 2)
+    assert e.value.offset == 8
+
+
+def test_disconnect_mid_chunk_keeps_what_arrived(upload_id, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_BUFFER_BYTES", 4)
+    # What request.stream does when the body ends before Content-Length
+    stream = LimitedStream(io.BytesIO(b"abcdef"), 10)
+    assert uploads.append_chunk(upload_id, 0, stream, 10) == 6
+    assert uploads.received(upload_id) == 6
+    # The client resumes from the reported offset
+    assert uploads.append_chunk(upload_id, 6, io.BytesIO(b"ghij"), 4) == 10
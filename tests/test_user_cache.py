@@ -0,0 +1,84 @@
+import os
+
+import psycopg
+
+from conftest import requires_db
+from utils import local_store, user_cache
+
+
+def test_old_library_cache_settings_are_fallbacks(monkeypatch):
+    monkeypatch.delenv("USER_CACHE_TTL", raising=False)
+    monkeypatch.setenv("LIBRARY_CACHE_TTL", "30")
+    assert user_cache._setting("TTL", "600") == "30"
+
+    monkeypatch.setenv("USER_CACHE_TTL", "60")
+    assert user_cache._setting("TTL", "600") == "60"
+
+    monkeypatch.delenv("USER_CACHE_TTL")
+    monkeypatch.delenv("LIBRARY_CACHE_TTL")
+    assert user_cache._setting("TTL", "600") == "600"
+
+
+def test_lru_evicts_oldest_and_expires():
+    lru = user_cache.LRU(size=2, ttl=10)
+    lru.put((1, 0, "a"), b"1", stored=0)
+    lru.put((2, 0, "a"), b"2", stored=0)
+    lru.put((3, 0, "a"), b"3", stored=0)
+    assert lru.get((1, 0, "a"), now=1) is None
+    assert lru.get((3, 0, "a"), now=1) == b"3"
+    assert lru.get((3, 0, "a"), now=11) is None
+
+
+# ---------------- INVALIDATION (database) ----------------
+def _library(client, user):
+    r = client.get("/users/workouts", headers=user["headers"])
+    assert r.status_code == 200
+    return r.headers["X-Cache"], {w["workout_id"]: w for w in r.get_json() if w["workout_id"]}
+
+
+@requires_db
+def test_reads_after_a_write_never_get_the_old_body(client, subscriber):
+    headers = subscriber["headers"]
+    assert _library(client, subscriber)[0] == "miss"
+    assert _library(client, subscriber)[0] == "hit"
+
+    r = client.post("/users/workouts", json={"name": "Cached", "equipment": ["mat"]}, headers=headers)
+    workout_id = r.get_json()["workout_id"]
+    state, library = _library(client, subscriber)
+    assert state == "miss" and library[workout_id]["name"] == "Cached"
+    assert _library(client, subscriber)[0] == "hit"
+
+    client.put(f"/users/workouts/{workout_id}", json={"name": "Renamed"}, headers=headers)
+    assert _library(client, subscriber)[1][workout_id]["name"] == "Renamed"
+
+    item = library[workout_id]["checklist"][0]
+    client.patch(f"/users/checklist/items/{item['id']}", headers=headers)
+    checklist = _library(client, subscriber)[1][workout_id]["checklist"]
+    assert next(i for i in checklist if i["id"] == item["id"])["done"] is True
+
+    client.delete(f"/users/workouts/{workout_id}", headers=headers)
+    assert workout_id not in _library(client, subscriber)[1]
+
+
+@requires_db
+def test_invalidation_from_another_host_is_seen(client, subscriber, tmp_path, monkeypatch):
+    r = client.post("/users/workouts", json={"name": "Elsewhere", "equipment": ["mat"]},
+                    headers=subscriber["headers"])
+    workout_id = r.get_json()["workout_id"]
+    _library(client, subscriber)
+    assert _library(client, subscriber)[0] == "hit"
+
+    # The job worker on another host (own local_store, own LRU) changes the
+    # data and invalidates, as utils.retention does
+    with psycopg.connect(os.environ["DATABASE_URL"]) as conn:
+        conn.execute("DELETE FROM checklist_items WHERE workout_id = %s", (workout_id,))
+    web_store = local_store.LOCAL_STORE_PATH
+    monkeypatch.setattr(local_store, "LOCAL_STORE_PATH", str(tmp_path / "worker.sqlite3"))
+    monkeypatch.setattr(local_store._local, "conn", None)
+    user_cache.UserCache("library").invalidate(subscriber["id"])
+    monkeypatch.setattr(local_store, "LOCAL_STORE_PATH", web_store)
+    monkeypatch.setattr(local_store._local, "conn", None)
+
+    state, library = _library(client, subscriber)
+    assert state == "miss"
+    assert library[workout_id]["checklist"] == []
@@ -0,0 +1,60 @@
+"""Checklist activity stats.
+
+Every checklist toggle appends to activity_log and, in the same statement,
+bumps the user's rollups (queries.py "checklist_toggle"):
+
+- activity_daily / activity_weekly: completed and uncompleted counts per
+  day / ISO week, plus the number of active days per week. Un-doing an item
+  completed the same day takes that completion back, so an item toggled
+  off and on again counts once;
+- activity_summary: lifetime totals and the current/longest streak of
+  consecutive days with at least one completion.
+
+Stats are read from the rollups only, so a request costs one primary-key
+lookup per period asked for, however long the user's history is. Days are
+bucketed in ACTIVITY_TIMEZONE.
+"""
+import os
+
+from queries import run
+
+ACTIVITY_TIMEZONE = os.getenv("ACTIVITY_TIMEZONE", "UTC")
+
+# period -> (default number of periods, max number of periods)
+PERIODS = {"day": (30, 366), "week": (12, 104)}
+
+
+def load_stats(cur, user_id, period, periods):
+    params = {"user_id": user_id, "tz": ACTIVITY_TIMEZONE, "periods": periods}
+
+    run(cur, "activity_summary", params)
+    row = cur.fetchone()
+    completed, uncompleted, current_streak, longest_streak, last_active = row or (0, 0, 0, 0, None)
+
+    if period == "day":
+        run(cur, "activity_daily_range", params)
+        series = [
+            {"day": r[0].isoformat(), "completed": r[1], "uncompleted": r[2]}
+            for r in cur.fetchall()
+        ]
+    else:
+        run(cur, "activity_weekly_range", params)
+        series = [
+            {"week": r[0].isoformat(), "completed": r[1], "uncompleted": r[2], "active_days": r[3]}
+            for r in cur.fetchall()
+        ]
+
+    return {
+        "totals": {
+            "completed": completed,
+            "uncompleted": uncompleted,
+            "net_completed": completed - uncompleted,
+        },
+        "streak": {
+            "current": current_streak,
+            "longest": longest_streak,
+            "last_active_day": last_active.isoformat() if last_active else None,
+        },
+        "period": period,
+        "series": series,
+    }
@@ -0,0 +1,50 @@
+"""Bulk deletion of a user's library.
+
+Rows are deleted in batches of BULK_DELETE_BATCH, each batch its own short
+transaction, so deleting a large library never holds row locks (or blocks
+the user's other requests) for the whole run. Created workouts and saved
+catalog workouts are separate tables with separate id spaces, so callers
+pass their ids separately.
+
+Cloudinary public_ids freed by a batch are queued as one media.destroy_batch
+job in that batch's transaction: the images are removed off the request
+path, and only if the rows they belonged to are really gone.
+"""
+import os
+
+from db import unit_of_work
+from queries import run
+from utils.jobs import enqueue
+
+BULK_DELETE_BATCH = int(os.getenv("BULK_DELETE_BATCH", "500"))
+
+
+def _delete_in_batches(user_id, table, ids, batch):
+    name = f"{table}_delete_batch" + ("_ids" if ids is not None else "")
+    params = {"user_id": user_id, "ids": ids, "batch": batch}
+    deleted = assets = 0
+    while True:
+        with unit_of_work() as conn:
+            with conn.cursor() as cur:
+                run(cur, name, params)
+                count, public_ids = cur.fetchone()
+                if public_ids:
+                    enqueue(cur, "media.destroy_batch", {"public_ids": public_ids})
+        deleted += count
+        assets += len(public_ids)
+        if count < batch:
+            return deleted, assets
+
+
+def delete_library(user_id, workout_ids=None, saved_ids=None, everything=False,
+                   batch=BULK_DELETE_BATCH):
+    """Delete the given created/saved workout ids (or everything) owned by
+    user_id. Returns counts of deleted rows and images queued for removal."""
+    result = {"workouts": 0, "saved_workouts": 0, "images": 0}
+    if everything or workout_ids:
+        result["workouts"], result["images"] = _delete_in_batches(
+            user_id, "workouts", None if everything else list(workout_ids), batch)
+    if everything or saved_ids:
+        result["saved_workouts"], _ = _delete_in_batches(
+            user_id, "saved", None if everything else list(saved_ids), batch)
+    return result
@@ -0,0 +1,11 @@
+def normalize_equipment(value):
+    """Equipment from a form string ("a, b") or JSON list -> clean list.
+
+    Stored as TEXT[] so reads never re-parse; this is the only place the
+    comma-separated input format is understood.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(e).strip() for e in value if e is not None and str(e).strip()]
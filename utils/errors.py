@@ -0,0 +1,314 @@
+"""Typed API errors, request validation and the app-wide error handlers.
+
+Handlers raise an ApiError subclass instead of building error responses by
+hand, and init_app turns it into ``{"error": ...}`` JSON with its status.
+Request bodies are checked by @validate before the view (and @idempotent
+below it) runs, so a bad request is rejected without taking a database
+connection.
+
+Failures are answered by kind:
+
+- PoolTimeout (no free connection within DB_POOL_TIMEOUT) and
+  psycopg.OperationalError (database unreachable, statement cancelled) are
+  transient: 503 with Retry-After, so clients back off instead of retrying
+  straight away.
+- Anything else is logged with its traceback and answered with a generic
+  500. Exception text never reaches the client.
+
+ERROR_COUNTS counts error responses per class ("validation", "not_found",
+"pool_timeout", "internal", ...) per process. ERROR_STATS_ENABLED=1 serves
+them at GET /errors/stats.
+"""
+import datetime
+import logging
+import os
+import threading
+from collections import Counter
+from functools import wraps
+
+import psycopg
+from flask import g, jsonify, request
+from psycopg_pool import PoolTimeout
+from werkzeug.exceptions import HTTPException
+
+logger = logging.getLogger("errors")
+
+DB_RETRY_AFTER_SECONDS = int(os.getenv("DB_RETRY_AFTER_SECONDS", "2"))
+ERROR_STATS_ENABLED = os.getenv("ERROR_STATS_ENABLED", "").lower() in ("1", "true", "yes")
+
+# Class of error responses that weren't raised as an ApiError
+STATUS_KINDS = {
+    400: "validation",
+    401: "unauthorized",
+    403: "forbidden",
+    404: "not_found",
+    405: "method_not_allowed",
+    409: "conflict",
+    410: "gone",
+    411: "validation",
+    413: "too_large",
+    415: "validation",
+    416: "validation",
+    422: "unprocessable",
+    429: "rate_limited",
+    500: "internal",
+    503: "unavailable",
+}
+
+ERROR_COUNTS = Counter()
+_counts_lock = threading.Lock()
+
+
+class ApiError(Exception):
+    status = 500
+    kind = "internal"
+    message = "Internal server error"
+
+    def __init__(self, message=None, headers=None, **extra):
+        super().__init__(message or self.message)
+        self.message = message or self.message
+        self.headers = headers or {}
+        self.extra = extra
+
+
+class ValidationError(ApiError):
+    status = 400
+    kind = "validation"
+    message = "Invalid request"
+
+
+class Unauthorized(ApiError):
+    status = 401
+    kind = "unauthorized"
+    message = "Unauthorized"
+
+
+class Forbidden(ApiError):
+    status = 403
+    kind = "forbidden"
+    message = "Not allowed"
+
+
+class NotFound(ApiError):
+    status = 404
+    kind = "not_found"
+    message = "Not found"
+
+
+class Conflict(ApiError):
+    status = 409
+    kind = "conflict"
+    message = "Conflict"
+
+
+class Gone(ApiError):
+    status = 410
+    kind = "gone"
+    message = "Gone"
+
+
+class LengthRequired(ApiError):
+    status = 411
+    kind = "validation"
+    message = "Content-Length required"
+
+
+class PayloadTooLarge(ApiError):
+    status = 413
+    kind = "too_large"
+    message = "Payload too large"
+
+
+class RangeNotSatisfiable(ApiError):
+    status = 416
+    kind = "validation"
+    message = "Range not satisfiable"
+
+
+class Unprocessable(ApiError):
+    status = 422
+    kind = "unprocessable"
+    message = "Unprocessable request"
+
+
+class TooManyRequests(ApiError):
+    status = 429
+    kind = "rate_limited"
+    message = "Too many requests"
+
+    def __init__(self, message=None, retry_after=1, **extra):
+        super().__init__(message, headers={"Retry-After": str(retry_after)}, retry_after=retry_after, **extra)
+
+
+class Unavailable(ApiError):
+    status = 503
+    kind = "unavailable"
+    message = "Service temporarily unavailable, retry later"
+
+    def __init__(self, message=None, retry_after=DB_RETRY_AFTER_SECONDS, **extra):
+        super().__init__(message, headers={"Retry-After": str(retry_after)}, **extra)
+
+
+# ---------------- VALIDATION ----------------
+_TYPE_NAMES = {str: "a string", int: "an integer", float: "a number", bool: "a boolean",
+               list: "a list", dict: "an object", datetime.datetime: "an ISO 8601 date-time"}
+
+
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+    def __bool__(self):
+        return False
+
+
+# A field absent from the body, as opposed to one sent as null
+MISSING = _Missing()
+
+
+class Field:
+    """One JSON body field: its type, whether it's required, and limits.
+
+    Strings are stripped unless ``strip=False``; a required string must not
+    be empty. ``int`` never accepts booleans, ``float`` accepts any number,
+    ``datetime.datetime`` takes an ISO 8601 string (converted to naive UTC).
+    A null counts as absent unless ``nullable=True``, which passes it through
+    as None; ``default=MISSING`` then tells "not sent" apart from "cleared".
+    """
+
+    def __init__(self, type, required=False, default=None, max_length=None, choices=None, strip=True,
+                 nullable=False):
+        self.type = type
+        self.required = required
+        self.default = default
+        self.strip = strip
+        self.max_length = max_length
+        self.choices = choices
+        self.nullable = nullable
+
+    def parse(self, name, value=MISSING):
+        if value is MISSING or (value is None and not self.nullable):
+            if self.required:
+                raise ValidationError(f"{name} is required")
+            return self.default
+        if value is None:
+            return None
+
+        ok = isinstance(value, self.type) and not (isinstance(value, bool) and self.type is not bool)
+        if self.type is float:
+            ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if self.type is datetime.datetime:
+            value = _parse_datetime(value)
+            ok = value is not None
+        if not ok:
+            raise ValidationError(f"{name} must be {_TYPE_NAMES.get(self.type, self.type.__name__)}")
+
+        if isinstance(value, str):
+            if self.strip:
+                value = value.strip()
+            if self.required and not value:
+                raise ValidationError(f"{name} is required")
+        if self.max_length is not None and len(value) > self.max_length:
+            raise ValidationError(f"{name} is longer than {self.max_length}")
+        if self.choices is not None and value not in self.choices:
+            raise ValidationError(f"{name} must be one of: {', '.join(map(str, self.choices))}")
+        return value
+
+
+def _parse_datetime(value):
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_json(schema):
+    """Validate the JSON body against {name: Field}; returns {name: value}.
+
+    A missing body counts as ``{}``; one that isn't a JSON object is rejected.
+    Fields not in the schema are ignored; absent ones parse as MISSING.
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        if request.get_data(cache=True).strip():
+            raise ValidationError("Request body must be a JSON object")
+        data = {}
+    if not isinstance(data, dict):
+        raise ValidationError("Request body must be a JSON object")
+    return {name: field.parse(name, data.get(name, MISSING)) for name, field in schema.items()}
+
+
+def validate(schema):
+    """Parse the request before the view runs and pass the result as ``body``.
+
+    ``schema`` is a {name: Field} dict for a JSON body, or a function that
+    takes the view's URL arguments, reads the request itself and raises
+    ValidationError. Apply below @jwt_required() and above @idempotent, so a
+    bad request is rejected before anything touches the database.
+    """
+    parse = schema if callable(schema) else (lambda **_: parse_json(schema))
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return view(*args, body=parse(**kwargs), **kwargs)
+        return wrapper
+
+    return decorator
+
+
+# ---------------- HANDLERS ----------------
+def count(kind):
+    with _counts_lock:
+        ERROR_COUNTS[kind] += 1
+
+
+def error_counts():
+    with _counts_lock:
+        return dict(ERROR_COUNTS)
+
+
+def _error_response(status, kind, message, headers=None, **extra):
+    g.error_kind = kind
+    response = jsonify({"error": message, **extra})
+    response.status_code = status
+    response.headers.update(headers or {})
+    return response
+
+
+def init_app(app):
+    @app.errorhandler(ApiError)
+    def _api_error(e):
+        return _error_response(e.status, e.kind, e.message, e.headers, **e.extra)
+
+    @app.errorhandler(PoolTimeout)
+    def _pool_timeout(e):
+        logger.warning("%s: no database connection available: %s", request.endpoint, e)
+        return _error_response(503, "pool_timeout", Unavailable.message,
+                               {"Retry-After": str(DB_RETRY_AFTER_SECONDS)})
+
+    @app.errorhandler(psycopg.OperationalError)
+    def _database_unavailable(e):
+        logger.warning("%s: database unavailable: %s", request.endpoint, e)
+        return _error_response(503, "db_unavailable", Unavailable.message,
+                               {"Retry-After": str(DB_RETRY_AFTER_SECONDS)})
+
+    @app.errorhandler(Exception)
+    def _unhandled(e):
+        if isinstance(e, HTTPException):
+            return e  # routing errors, abort(), ...: Flask's own response
+        logger.exception("Unhandled error in %s", request.endpoint)
+        return _error_response(500, "internal", ApiError.message)
+
+    @app.after_request
+    def _count_errors(response):
+        if response.status_code >= 400:
+            kind = g.pop("error_kind", None)
+            count(kind or STATUS_KINDS.get(response.status_code, f"http_{response.status_code}"))
+        return response
+
+    if ERROR_STATS_ENABLED:
+        app.add_url_rule("/errors/stats", "error_stats", lambda: (jsonify(error_counts()), 200))
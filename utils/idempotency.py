@@ -0,0 +1,150 @@
+"""Idempotency-Key support for write endpoints.
+
+A request carrying an ``Idempotency-Key`` header is executed at most once per
+(user, key) within IDEMPOTENCY_TTL_SECONDS; retries get the stored response
+replayed (marked with ``Idempotent-Replayed: true``) without re-running the
+handler. A retry that arrives while the original is still in flight waits
+for it to finish instead of racing it. Only successful responses are kept:
+errors and exceptions release the key so the client's next retry runs again.
+"""
+import hashlib
+import os
+import time
+from functools import wraps
+
+from flask import make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from db import get_conn
+from queries import run
+from utils.errors import Conflict, Unprocessable, ValidationError
+from utils.jobs import job
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# An in-flight claim older than this is assumed dead (crashed worker)
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+IDEMPOTENCY_PURGE_SECONDS = int(os.getenv("IDEMPOTENCY_PURGE_SECONDS", "3600"))
+MAX_KEY_LENGTH = 255
+FINGERPRINT_CHUNK = 64 * 1024
+
+
+def request_fingerprint():
+    h = hashlib.sha256()
+    h.update(f"{request.method} {request.path}\n".encode())
+    if request.mimetype == "multipart/form-data":
+        # Fields, then each file's name and bytes. Werkzeug has already
+        # spooled the parts; they are streamed through the hash in chunks
+        # and rewound for the view.
+        for k, v in sorted(request.form.items(multi=True)):
+            h.update(f"{k}={v}\n".encode())
+        for k, f in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+            h.update(f"{k}:{f.filename}\n".encode())
+            for chunk in iter(lambda: f.stream.read(FINGERPRINT_CHUNK), b""):
+                h.update(chunk)
+            f.stream.seek(0)
+    else:
+        h.update(request.get_data(cache=True))
+    return h.hexdigest()
+
+
+def _claim(user_id, key, fingerprint):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "idempotency_claim", {
+                "user_id": user_id,
+                "key": key,
+                "hash": fingerprint,
+                "ttl": IDEMPOTENCY_TTL_SECONDS,
+                "lock": IDEMPOTENCY_LOCK_SECONDS,
+            })
+            return cur.fetchone() is not None
+
+
+def _fetch(user_id, key):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "idempotency_get", (user_id, key))
+            return cur.fetchone()
+
+
+def _wait_for_completion(user_id, key):
+    # Poll with backoff until the in-flight request stores its response
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.05
+    while True:
+        row = _fetch(user_id, key)
+        if row is None or row[1] is not None or time.monotonic() >= deadline:
+            return row
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+
+def _store(user_id, key, response):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "idempotency_store", (
+                response.status_code, response.get_data(), response.content_type, user_id, key,
+            ))
+
+
+def _release(user_id, key):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "idempotency_release", (user_id, key))
+
+
+@job("idempotency.purge", concurrency=1, every=IDEMPOTENCY_PURGE_SECONDS)
+def purge_expired(payload):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "idempotency_purge")
+
+
+def _replay(row):
+    _, status_code, body, content_type = row
+    response = make_response(bytes(body), status_code)
+    response.content_type = content_type
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view):
+    """Apply below @jwt_required(): keys are scoped to the JWT identity."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValidationError(f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters")
+
+        user_id = int(get_jwt_identity())
+        fingerprint = request_fingerprint()
+
+        while not _claim(user_id, key, fingerprint):
+            row = _fetch(user_id, key)
+            if row is not None and row[0] != fingerprint:
+                raise Unprocessable("Idempotency-Key was already used for a different request")
+            if row is not None and row[1] is None:
+                row = _wait_for_completion(user_id, key)
+            if row is None:
+                continue  # released by a failed original: claim it ourselves
+            if row[1] is None:
+                raise Conflict("A request with this Idempotency-Key is still in progress",
+                               headers={"Retry-After": "1"})
+            return _replay(row)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            _release(user_id, key)
+            raise
+
+        if response.status_code < 400:
+            _store(user_id, key, response)
+        else:
+            _release(user_id, key)
+        return response
+
+    return wrapper
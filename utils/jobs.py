@@ -0,0 +1,200 @@
+"""Durable background jobs stored in Postgres.
+
+Handlers enqueue work and return; ``python -m scripts.worker`` runs it.
+
+    @job("media.destroy", concurrency=2)
+    def destroy(payload): ...
+
+    enqueue(cur, "media.destroy", {"public_id": ...})   # in the caller's transaction
+    submit("media.destroy", {"public_id": ...})         # on its own connection
+
+A job row is claimed with FOR UPDATE SKIP LOCKED, so any number of workers
+can poll the same table without handing out a job twice. Per-kind
+concurrency limits are global: claimers of one kind serialise on an advisory
+transaction lock while they count what is already running. A failed job is
+retried with exponential backoff until max_attempts, then moved to
+dead_jobs. A claim older than JOB_LOCK_SECONDS (crashed worker) is handed
+out again, so handlers must be safe to run twice.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg.types.json import Jsonb
+
+from db import get_conn, unit_of_work
+from queries import run
+
+logger = logging.getLogger("jobs")
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+JOB_LOCK_SECONDS = int(os.getenv("JOB_LOCK_SECONDS", "300"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "5"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "3600"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", "8"))
+
+# Modules whose @job handlers the worker loads
+JOB_MODULES = ("utils.media", "utils.idempotency", "utils.uploads", "utils.payments", "utils.retention")
+
+
+class JobType:
+    def __init__(self, kind, fn, concurrency, max_attempts, every):
+        self.kind = kind
+        self.fn = fn
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.every = every
+
+
+JOBS = {}
+
+
+def job(kind, concurrency=JOB_CONCURRENCY, max_attempts=JOB_MAX_ATTEMPTS, every=None):
+    """Register a handler for `kind`. every=N also schedules it every N seconds."""
+    def decorator(fn):
+        JOBS[kind] = JobType(kind, fn, concurrency, max_attempts, every)
+        return fn
+    return decorator
+
+
+# ---------------- ENQUEUE ----------------
+def enqueue(cur, kind, payload=None, delay=0, dedupe_key=None, max_attempts=None):
+    """Queue a job on the caller's cursor, so it commits (or rolls back) with
+    the caller's own writes. Returns the job id, or None when dedupe_key is
+    already queued."""
+    if max_attempts is None:
+        max_attempts = JOBS[kind].max_attempts if kind in JOBS else JOB_MAX_ATTEMPTS
+    run(cur, "job_enqueue", {
+        "kind": kind,
+        "payload": Jsonb(payload or {}),
+        "delay": delay,
+        "max_attempts": max_attempts,
+        "dedupe_key": dedupe_key,
+    })
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def submit(kind, payload=None, **options):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            return enqueue(cur, kind, payload, **options)
+
+
+def backoff(attempts):
+    delay = min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+# ---------------- WORKER ----------------
+class Worker:
+    def __init__(self, kinds=None, threads=JOB_WORKER_THREADS, poll=JOB_POLL_SECONDS):
+        unknown = set(kinds or ()) - set(JOBS)
+        if unknown:
+            raise ValueError(f"Unknown job kind(s): {', '.join(sorted(unknown))}")
+        self.types = [JOBS[k] for k in (kinds or JOBS)]
+        self.threads = threads
+        self.poll = poll
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job")
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._scheduled = {}
+
+    def schedule_periodic(self, cur):
+        now = time.time()
+        for t in self.types:
+            if not t.every:
+                continue
+            slot = (int(now // t.every) + 1) * t.every
+            if self._scheduled.get(t.kind) != slot:
+                # Every worker computes the same slot; the dedupe key keeps one
+                enqueue(cur, t.kind, delay=slot - now, dedupe_key=f"{t.kind}@{slot}")
+                self._scheduled[t.kind] = slot
+
+    def claim(self, job_type, limit):
+        with unit_of_work() as conn:
+            with conn.cursor() as cur:
+                run(cur, "job_lock_kind", (job_type.kind,))
+                if not cur.fetchone()[0]:
+                    return []  # another worker is claiming this kind right now
+                run(cur, "job_running_count", (job_type.kind, JOB_LOCK_SECONDS))
+                limit = min(limit, job_type.concurrency - cur.fetchone()[0])
+                if limit <= 0:
+                    return []
+                run(cur, "job_claim", {
+                    "kind": job_type.kind,
+                    "limit": limit,
+                    "lock": JOB_LOCK_SECONDS,
+                    "worker": self.name,
+                })
+                return cur.fetchall()
+
+    def run_once(self):
+        """Claim whatever this worker has room for; returns the number claimed."""
+        claimed = 0
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                self.schedule_periodic(cur)
+        for t in self.types:
+            free = self.threads - self._inflight
+            if free <= 0:
+                break
+            for job_id, payload, attempts, max_attempts in self.claim(t, free):
+                with self._lock:
+                    self._inflight += 1
+                self._executor.submit(self._execute, t, job_id, payload, attempts, max_attempts)
+                claimed += 1
+        return claimed
+
+    def _execute(self, job_type, job_id, payload, attempts, max_attempts):
+        try:
+            try:
+                job_type.fn(payload)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                self._failed(job_type, job_id, attempts, max_attempts, error)
+            else:
+                with get_conn() as conn:
+                    with conn.cursor() as cur:
+                        run(cur, "job_done", (job_id,))
+        except Exception:
+            # Bookkeeping failed; the claim expires and the job runs again
+            logger.exception("job %s (%s) bookkeeping failed", job_id, job_type.kind)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    def _failed(self, job_type, job_id, attempts, max_attempts, error):
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                if attempts >= max_attempts:
+                    logger.error("job %s (%s) dead after %d attempts: %s",
+                                 job_id, job_type.kind, attempts, error)
+                    run(cur, "job_bury", {"id": job_id, "error": error})
+                else:
+                    delay = backoff(attempts)
+                    logger.warning("job %s (%s) attempt %d failed, retrying in %.0fs: %s",
+                                   job_id, job_type.kind, attempts, delay, error)
+                    run(cur, "job_retry", {"id": job_id, "delay": delay, "error": error})
+
+    def run(self, stop=None, once=False):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("job poll failed")
+                claimed = 0
+            if once:
+                break
+            # Keep draining while there is work; otherwise wait for the next poll
+            if not claimed or self._inflight >= self.threads:
+                stop.wait(self.poll)
+        self._executor.shutdown(wait=True)
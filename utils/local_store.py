@@ -0,0 +1,41 @@
+"""Small SQLite file shared by every worker process on this host.
+
+Used for state that must be visible across gunicorn workers but does not
+belong in Postgres (read-your-writes pins, ...). WAL mode lets readers and a
+writer proceed concurrently; each thread keeps its own connection.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+
+LOCAL_STORE_PATH = os.getenv(
+    "LOCAL_STORE_PATH", os.path.join(tempfile.gettempdir(), "backend-local-store.sqlite3")
+)
+
+_local = threading.local()
+_schemas = []
+_schemas_lock = threading.Lock()
+
+
+def register_schema(ddl):
+    """Register CREATE ... IF NOT EXISTS statements run on every new connection."""
+    with _schemas_lock:
+        _schemas.append(ddl)
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.pid == os.getpid():
+        conn.executescript(ddl)
+
+
+def connect():
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        conn = sqlite3.connect(LOCAL_STORE_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with _schemas_lock:
+            for ddl in _schemas:
+                conn.executescript(ddl)
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
@@ -0,0 +1,152 @@
+"""Image storage for workout media.
+
+MEDIA_STORAGE picks the backend every upload and delete goes through:
+
+- ``cloudinary`` (default): the CLOUDINARY_* account
+- ``local``: files under MEDIA_LOCAL_DIR, for development and tests. Their
+  URLs start with MEDIA_LOCAL_URL, which the app serves itself when it is a
+  path (/media by default); set MEDIA_LOCAL_SERVE=0 when a reverse proxy
+  serves MEDIA_LOCAL_DIR there instead.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+
+from utils.jobs import job, submit
+
+MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "cloudinary")
+MEDIA_LOCAL_DIR = os.getenv("MEDIA_LOCAL_DIR", os.path.join(tempfile.gettempdir(), "backend-media"))
+MEDIA_LOCAL_URL = os.getenv("MEDIA_LOCAL_URL", "/media")
+MEDIA_LOCAL_SERVE = os.getenv("MEDIA_LOCAL_SERVE", "1") != "0"
+
+# Cloudinary Admin API calls are rate limited per account; cap them globally
+MEDIA_DESTROY_CONCURRENCY = int(os.getenv("MEDIA_DESTROY_CONCURRENCY", "4"))
+
+_cloudinary_lock = threading.Lock()
+_cloudinary_ready = False
+
+
+# ---------------- CLOUDINARY CONFIG (on first use) ----------------
+def _uploader():
+    global _cloudinary_ready
+    import cloudinary
+    import cloudinary.uploader
+
+    if not _cloudinary_ready:
+        with _cloudinary_lock:
+            if not _cloudinary_ready:
+                cloudinary.config(
+                    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+                    api_key=os.getenv("CLOUDINARY_API_KEY"),
+                    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+                    secure=True,
+                )
+                _cloudinary_ready = True
+    return cloudinary.uploader
+
+
+# ---------------- STORAGE BACKENDS ----------------
+class CloudinaryStorage:
+    def upload(self, fileobj, user_id, **options):
+        uploaded = _uploader().upload(
+            fileobj, folder=f"workouts/{user_id}", resource_type="image", **options
+        )
+        return uploaded.get("secure_url"), uploaded.get("public_id")
+
+    def destroy(self, public_id):
+        result = _uploader().destroy(public_id)
+        if result.get("result") not in ("ok", "not found"):
+            raise RuntimeError(f"Cloudinary destroy returned {result}")
+
+    def destroy_many(self, public_ids):
+        _uploader()
+        import cloudinary.api
+
+        # The Admin API takes up to 100 public_ids per call; missing ones are skipped
+        for i in range(0, len(public_ids), 100):
+            cloudinary.api.delete_resources(public_ids[i:i + 100])
+
+
+class LocalStorage:
+    def __init__(self, root=MEDIA_LOCAL_DIR, base_url=MEDIA_LOCAL_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, public_id):
+        path = os.path.realpath(os.path.join(self.root, public_id))
+        if not path.startswith(os.path.realpath(self.root) + os.sep):
+            raise ValueError(f"Invalid public_id: {public_id!r}")
+        return path
+
+    def upload(self, fileobj, user_id, **options):
+        # Cloudinary-only options (overwrite, ...) don't apply: names are unique
+        name = getattr(fileobj, "filename", None) or getattr(fileobj, "name", "")
+        ext = os.path.splitext(str(name))[1].lower()[:10]
+        public_id = f"workouts/{user_id}/{uuid.uuid4().hex}{ext}"
+        path = self._path(public_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(fileobj, out)
+        return f"{self.base_url}/{public_id}", public_id
+
+    def destroy(self, public_id):
+        try:
+            os.remove(self._path(public_id))
+        except FileNotFoundError:
+            pass
+
+    def destroy_many(self, public_ids):
+        for public_id in public_ids:
+            self.destroy(public_id)
+
+
+STORAGES = {"cloudinary": CloudinaryStorage, "local": LocalStorage}
+_storage = None
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        if MEDIA_STORAGE not in STORAGES:
+            raise RuntimeError(f"Unknown MEDIA_STORAGE {MEDIA_STORAGE!r}; use one of {', '.join(STORAGES)}")
+        _storage = STORAGES[MEDIA_STORAGE]()
+    return _storage
+
+
+def upload_image(fileobj, user_id, **options):
+    """Upload to the user's folder; returns (url, public_id)."""
+    return get_storage().upload(fileobj, user_id, **options)
+
+
+# Storage calls whose result the response does not need (deletes) go
+# through the job queue, so request threads never wait on them and a failed
+# call is retried instead of leaking the image.
+@job("media.destroy", concurrency=MEDIA_DESTROY_CONCURRENCY, max_attempts=8)
+def destroy_image(payload):
+    get_storage().destroy(payload["public_id"])
+
+
+@job("media.destroy_batch", concurrency=MEDIA_DESTROY_CONCURRENCY, max_attempts=8)
+def destroy_images(payload):
+    get_storage().destroy_many(payload["public_ids"])
+
+
+def destroy_image_later(public_id):
+    if public_id:
+        submit("media.destroy", {"public_id": public_id})
+
+
+# ---------------- FLASK INTEGRATION ----------------
+def init_app(app):
+    """Serve local media at MEDIA_LOCAL_URL (local storage only)."""
+    if MEDIA_STORAGE != "local" or not MEDIA_LOCAL_SERVE or not MEDIA_LOCAL_URL.startswith("/"):
+        return
+    from flask import send_from_directory
+
+    def local_media(public_id):
+        # send_from_directory refuses paths that leave MEDIA_LOCAL_DIR
+        return send_from_directory(MEDIA_LOCAL_DIR, public_id, max_age=86400)
+
+    app.add_url_rule(MEDIA_LOCAL_URL.rstrip("/") + "/<path:public_id>", "local_media", local_media)
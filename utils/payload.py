@@ -0,0 +1,34 @@
+from flask import request
+
+from utils.errors import ValidationError
+
+
+def parse_fields(allowed):
+    """Read the ``fields=a,b,c`` sparse-fieldset parameter.
+
+    Returns None when the parameter is absent (meaning "everything"),
+    otherwise the requested names in the order given. Unknown names raise
+    ValidationError.
+    """
+    raw = request.args.get("fields")
+    if raw is None:
+        return None
+
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValidationError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    if not fields:
+        raise ValidationError("fields must name at least one field")
+    return fields
+
+
+def project(record, fields):
+    if fields is None:
+        return record
+    return {f: record[f] for f in fields}
+
+
+def to_columns(rows, columns):
+    """Row tuples -> {column: [values...]} for the columnar format."""
+    return {c: [r[i] for r in rows] for i, c in enumerate(columns)}
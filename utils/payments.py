@@ -0,0 +1,232 @@
+"""Paystack webhook ingestion.
+
+The webhook handler verifies the signature and appends the raw event to
+payment_events in one INSERT, so a burst from the provider costs web
+workers almost nothing. The payments.process_events job (run by
+``python -m scripts.worker``) drains the inbox in batches. Each batch is one
+transaction that collapses its events to one per payment reference,
+upserts those into payments and marks the events processed. Subscription
+state is derived from payments, so it follows along. Paystack retries
+deliveries and may reorder them; a payment's status only moves forward
+(see STATUS_ORDER), which makes duplicates and stragglers harmless.
+
+Events that can't be applied keep the reason in payment_events.error:
+unparseable or ignored ones, those whose metadata.user_id / customer email
+match no user ("no matching user"), and any the database still rejects. A
+bad event never holds up the rest of its batch or the ones after it.
+
+    python -m scripts.fake_paystack --user-id 1    # signed test events
+"""
+import datetime
+import hashlib
+import hmac
+import logging
+import os
+from decimal import Decimal
+
+import psycopg
+
+from db import unit_of_work
+from queries import run
+from utils.jobs import job
+
+logger = logging.getLogger("payments")
+
+PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
+PAYMENT_WEBHOOK_MAX_BYTES = int(os.getenv("PAYMENT_WEBHOOK_MAX_BYTES", str(64 * 1024)))
+PAYMENT_EVENTS_BATCH = int(os.getenv("PAYMENT_EVENTS_BATCH", "500"))
+PAYMENT_EVENTS_POLL_SECONDS = int(os.getenv("PAYMENT_EVENTS_POLL_SECONDS", "5"))
+
+# Later statuses win; "reversed" is a refunded charge
+STATUS_ORDER = ["pending", "abandoned", "failed", "success", "reversed"]
+# payments column limits (db_init.sql)
+MAX_USER_ID = 2 ** 31 - 1
+MAX_AMOUNT = Decimal("99999999.99")  # NUMERIC(10,2), in naira
+MAX_CURRENCY_LENGTH = 10
+MAX_TYPE_LENGTH = 50
+MAX_REFERENCE_LENGTH = 100
+# Paystack event -> payment status it reports
+EVENT_STATUS = {
+    "charge.success": "success",
+    "charge.failed": "failed",
+    "refund.processed": "reversed",
+}
+
+
+def sign(body, secret=None):
+    """Paystack's x-paystack-signature: hex HMAC-SHA512 of the raw body."""
+    return hmac.new((secret or PAYSTACK_SECRET_KEY).encode(), body, hashlib.sha512).hexdigest()
+
+
+def verify_signature(body, signature):
+    if not PAYSTACK_SECRET_KEY or not signature:
+        return False
+    return hmac.compare_digest(sign(body), signature)
+
+
+def _text(value, name, max_length, default=None):
+    if value is None or value == "":
+        return default
+    if not isinstance(value, (str, int)) or isinstance(value, bool):
+        raise ValueError(f"{name} must be a string")
+    value = str(value)
+    if len(value) > max_length:
+        raise ValueError(f"{name} is longer than {max_length}")
+    return value
+
+
+def _user_id(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or not str(value).isdigit():
+        raise ValueError("metadata.user_id must be a positive integer")
+    user_id = int(value)
+    if not 1 <= user_id <= MAX_USER_ID:
+        raise ValueError("metadata.user_id is out of range")
+    return user_id
+
+
+def _amount(value):
+    # Paystack amounts are in kobo
+    if isinstance(value, bool):
+        raise ValueError("amount must be a number")
+    try:
+        amount = Decimal(str(value or 0)) / 100
+    except ArithmeticError:  # decimal.InvalidOperation, Overflow
+        raise ValueError("amount must be a number") from None
+    if not amount.is_finite() or not 0 <= amount <= MAX_AMOUNT:
+        raise ValueError("amount is out of range")
+    return amount.quantize(Decimal("0.01"))
+
+
+def _paid_at(value):
+    """ISO 8601 -> naive UTC datetime, like the rest of the schema."""
+    if value is None or value == "":
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        raise ValueError("paid_at must be an ISO 8601 date-time") from None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_event(payload):
+    """Webhook payload -> payments row fields, or raise ValueError."""
+    if not isinstance(payload, dict):
+        raise ValueError("event must be an object")
+    event = payload.get("event")
+    status = EVENT_STATUS.get(event)
+    if status is None:
+        raise ValueError(f"ignored event {event!r}")
+    data = payload.get("data")
+    if not isinstance(data, dict):
+        raise ValueError("data must be an object")
+    # A refund names the charge it reverses
+    reference = data.get("transaction_reference") if event == "refund.processed" else data.get("reference")
+    reference = _text(reference, "reference", MAX_REFERENCE_LENGTH)
+    if not reference:
+        raise ValueError("missing reference")
+    metadata = data.get("metadata") if isinstance(data.get("metadata"), dict) else {}
+    customer = data.get("customer") if isinstance(data.get("customer"), dict) else {}
+    email = customer.get("email")
+    return {
+        "reference": reference,
+        "user_id": _user_id(metadata.get("user_id")),
+        "email": email if isinstance(email, str) else None,
+        "amount": _amount(data.get("amount")),
+        "currency": _text(data.get("currency"), "currency", MAX_CURRENCY_LENGTH, "NGN"),
+        "status": status,
+        "type": _text(metadata.get("type"), "metadata.type", MAX_TYPE_LENGTH, "subscription"),
+        "paid_at": _paid_at(data.get("paid_at") or data.get("paidAt")),
+    }
+
+
+def _apply(cur, rows):
+    run(cur, "payments_apply_events", {
+        "references": [r["reference"] for r in rows],
+        "user_ids": [r["user_id"] for r in rows],
+        "emails": [r["email"] for r in rows],
+        "amounts": [r["amount"] for r in rows],
+        "currencies": [r["currency"] for r in rows],
+        "statuses": [r["status"] for r in rows],
+        "types": [r["type"] for r in rows],
+        "paid_at": [r["paid_at"] for r in rows],
+        "order": STATUS_ORDER,
+    })
+    return cur.fetchall()
+
+
+def _apply_each(conn, cur, rows):
+    """Fallback when the batch statement fails: one savepoint per reference.
+
+    Returns (results, {reference: error}) for the references that failed.
+    """
+    results, failed = [], {}
+    for row in rows:
+        try:
+            with conn.transaction():
+                results += _apply(cur, [row])
+        except (psycopg.DataError, psycopg.IntegrityError) as e:
+            failed[row["reference"]] = f"rejected by the database: {e.diag.message_primary or e}"
+    return results, failed
+
+
+def process_batch(limit=PAYMENT_EVENTS_BATCH):
+    """Apply up to `limit` pending events; returns how many were claimed."""
+    with unit_of_work() as conn:
+        with conn.cursor() as cur:
+            run(cur, "payment_events_claim", (limit,))
+            events = cur.fetchall()
+            if not events:
+                return 0
+
+            latest, errors, references = {}, {}, {}
+            for event_id, payload in events:
+                try:
+                    row = parse_event(payload)
+                except (ValueError, TypeError, AttributeError) as e:
+                    errors[event_id] = str(e)
+                    continue
+                references[event_id] = row["reference"]
+                # Keep the furthest-along status per reference
+                current = latest.get(row["reference"])
+                if current is None or STATUS_ORDER.index(row["status"]) >= STATUS_ORDER.index(current["status"]):
+                    latest[row["reference"]] = row
+
+            if latest:
+                rows = list(latest.values())
+                failed = {}
+                try:
+                    with conn.transaction():
+                        results = _apply(cur, rows)
+                except (psycopg.DataError, psycopg.IntegrityError) as e:
+                    # Something parse_event let through; find it instead of
+                    # failing (and then re-claiming) the whole batch forever
+                    logger.warning("payment events: batch rejected (%s), applying one by one", e)
+                    results, failed = _apply_each(conn, cur, rows)
+                unmatched = {reference for reference, matched, _ in results if not matched}
+                for event_id, reference in references.items():
+                    if reference in failed:
+                        errors[event_id] = failed[reference]
+                    elif reference in unmatched:
+                        errors[event_id] = "no matching user"
+                if unmatched:
+                    logger.warning("payment events: no matching user for %d reference(s): %s",
+                                   len(unmatched), ", ".join(sorted(unmatched)[:10]))
+                unchanged = sum(1 for _, matched, applied in results if matched and not applied)
+                if unchanged:
+                    logger.info("payment events: %d of %d references had no newer status",
+                                unchanged, len(rows))
+
+            ids = [event_id for event_id, _ in events]
+            run(cur, "payment_events_done", (ids, [errors.get(i) for i in ids]))
+    return len(events)
+
+
+@job("payments.process_events", concurrency=1, every=PAYMENT_EVENTS_POLL_SECONDS)
+def process_events(payload):
+    # Drain the backlog; each batch commits on its own
+    while process_batch() == PAYMENT_EVENTS_BATCH:
+        pass
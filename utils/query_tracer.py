@@ -0,0 +1,187 @@
+"""Development/test-mode SQL tracer.
+
+Enabled with QUERY_TRACE=1. Every statement run through a traced connection is
+fingerprinted and counted against the current request, statements slower than
+SLOW_QUERY_MS are logged together with their EXPLAIN plan, and repeated
+fingerprints (the N+1 pattern) are reported when the request finishes.
+
+Query budgets come from ``app.config["QUERY_BUDGETS"]`` (endpoint -> max
+statements) with ``app.config["QUERY_BUDGET"]`` as the default. Going over
+budget is logged, and raises QueryBudgetExceeded when the app is in testing
+mode (or QUERY_BUDGET_STRICT=1) so test runs fail on regressions.
+"""
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+import psycopg
+from psycopg import pq
+
+logger = logging.getLogger("query_tracer")
+
+
+def _env_flag(name):
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+QUERY_TRACE = _env_flag("QUERY_TRACE")
+QUERY_BUDGET_STRICT = _env_flag("QUERY_BUDGET_STRICT")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "0"))  # 0 = no default budget
+QUERY_REPEAT_LIMIT = int(os.getenv("QUERY_REPEAT_LIMIT", "3"))
+
+_current = ContextVar("query_stats", default=None)
+
+# Statements EXPLAIN accepts; anything else (SET, DDL, ...) isn't explained
+_EXPLAINABLE = re.compile(r"^\s*(?:\(\s*)*(SELECT|INSERT|UPDATE|DELETE|WITH|VALUES|TABLE|MERGE)\b", re.I)
+
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),          # string literals
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),       # numeric literals
+    (re.compile(r"%\(\w+\)s|%[sbt]"), "?"),        # driver placeholders
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),  # IN (?, ?, ?)
+    (re.compile(r"\s+"), " "),
+]
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(query):
+    """Collapse literals and whitespace so repeats of one statement match."""
+    text = query if isinstance(query, str) else str(query)
+    for pattern, repl in _NORMALIZE:
+        text = pattern.sub(repl, text)
+    return text.strip()
+
+
+class QueryStats:
+    def __init__(self, label=None):
+        self.label = label
+        self.counts = Counter()
+        self.total = 0
+        self.elapsed_ms = 0.0
+
+    def record(self, fp, elapsed_ms, n=1):
+        self.counts[fp] += n
+        self.total += n
+        self.elapsed_ms += elapsed_ms
+
+    def repeated(self, limit=QUERY_REPEAT_LIMIT):
+        return [(fp, n) for fp, n in self.counts.most_common() if n > limit]
+
+
+def _query_text(cur, query):
+    if isinstance(query, str):
+        return query
+    if isinstance(query, bytes):
+        return query.decode()
+    return query.as_string(cur.connection)
+
+
+def _explain(cur, query, params):
+    conn = cur.connection
+    # In pipeline mode (db.pipeline()) the statement is only queued: the
+    # timing means nothing, and fetching an EXPLAIN would force a Sync that
+    # commits the batch so far in the middle of the block
+    if conn.pgconn.pipeline_status != pq.PipelineStatus.OFF:
+        return "<explain skipped: pipeline mode>"
+    if not _EXPLAINABLE.match(query):
+        return "<explain skipped: not a plannable statement>"
+    if conn.info.transaction_status == pq.TransactionStatus.INERROR:
+        return "<explain skipped: transaction aborted>"
+    # In a savepoint, so a failing EXPLAIN can't abort the caller's
+    # transaction (unit_of_work); plain cursor so it is not traced itself
+    try:
+        with conn.transaction(), psycopg.Cursor(conn) as ecur:
+            ecur.execute("EXPLAIN " + query, params)
+            return "\n".join(r[0] for r in ecur.fetchall())
+    except psycopg.Error as e:
+        return f"<explain failed: {e}>"
+
+
+def _trace(cur, query, params, elapsed_ms, n=1):
+    text = _query_text(cur, query)
+    fp = fingerprint(text)
+    stats = _current.get()
+    if stats is not None:
+        stats.record(fp, elapsed_ms, n)
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        plan = _explain(cur, text, params) if n == 1 else "<executemany>"
+        logger.warning(
+            "slow query (%.1f ms) [%s]: %s\n%s",
+            elapsed_ms, stats.label if stats else "-", fp, plan,
+        )
+
+
+class TracingCursor(psycopg.Cursor):
+    def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        result = super().execute(query, params, **kwargs)
+        _trace(self, query, params, (time.perf_counter() - start) * 1000)
+        return result
+
+    def executemany(self, query, params_seq, **kwargs):
+        params_seq = list(params_seq)
+        start = time.perf_counter()
+        result = super().executemany(query, params_seq, **kwargs)
+        _trace(self, query, None, (time.perf_counter() - start) * 1000, n=len(params_seq))
+        return result
+
+
+def start(label=None):
+    """Begin collecting stats for a unit of work; returns a reset token."""
+    return _current.set(QueryStats(label))
+
+
+def stop(token):
+    stats = _current.get()
+    _current.reset(token)
+    return stats
+
+
+def current():
+    return _current.get()
+
+
+# ---------------- FLASK INTEGRATION ----------------
+def init_app(app):
+    from flask import g, request
+
+    app.config.setdefault("QUERY_BUDGET", QUERY_BUDGET)
+    app.config.setdefault("QUERY_BUDGETS", {})
+
+    @app.before_request
+    def _begin_query_trace():
+        g._query_trace_token = start(request.endpoint)
+
+    @app.after_request
+    def _check_query_budget(response):
+        stats = current()
+        if stats is None:
+            return response
+
+        response.headers["X-Query-Count"] = str(stats.total)
+
+        for fp, n in stats.repeated():
+            logger.warning("possible N+1 in %s: %d x %s", request.endpoint, n, fp)
+
+        budget = app.config["QUERY_BUDGETS"].get(request.endpoint, app.config["QUERY_BUDGET"])
+        if budget and stats.total > budget:
+            msg = f"{request.endpoint} ran {stats.total} queries (budget {budget})"
+            logger.error(msg)
+            if app.testing or QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(msg)
+
+        return response
+
+    @app.teardown_request
+    def _end_query_trace(exc=None):
+        token = g.pop("_query_trace_token", None)
+        if token is not None:
+            stop(token)
@@ -0,0 +1,179 @@
+"""Per-endpoint token-bucket rate limiting.
+
+Limits are configured per blueprint endpoint in ``app.config["RATE_LIMITS"]``
+(e.g. ``{"auth.login": "10/minute"}``) and keyed on the JWT identity when the
+request carries a valid token, otherwise on the client IP. Behind reverse
+proxies set TRUSTED_PROXIES (see app.py) to their number: otherwise the IP
+is the proxy's and all anonymous clients share one bucket. Buckets live in
+the store selected by RATE_LIMIT_STORE:
+
+- ``sqlite`` (default): utils.local_store, shared by all workers on a host
+- ``postgres``: the rate_limit_buckets table, shared by every host
+- ``memory``: per-process, for tests
+
+Each check is a single UPSERT ... RETURNING, so it costs one round trip to
+the store. Rejected requests get 429 with a Retry-After header.
+"""
+import math
+import os
+import threading
+import time
+
+from utils import local_store
+from utils.errors import TooManyRequests
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") != "0"
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "sqlite")
+
+DEFAULT_RATE_LIMITS = {
+    # Password hashing makes these the most expensive calls per request
+    "auth.login": "10/minute",
+    "auth.register": "5/minute",
+    # Full-catalog reads
+    "public_api.get_workouts": "120/minute",
+}
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate):
+    """'10/minute' -> (capacity, tokens refilled per second)."""
+    count, _, period = rate.partition("/")
+    seconds = _PERIODS.get(period.strip().rstrip("s"))
+    if not seconds or not count.strip().isdigit() or int(count) < 1:
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+    return int(count), int(count) / seconds
+
+
+def retry_after(tokens, refill_rate):
+    return max(1, math.ceil((1 - tokens) / refill_rate))
+
+
+# ---------------- STORES ----------------
+class MemoryStore:
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+
+class SQLiteStore:
+    # SET expressions all see the old row, so the refill is computed once per
+    # column; `allowed` is stored so RETURNING can report the decision.
+    SQL = """
+        INSERT INTO rate_buckets (key, tokens, ts, allowed) VALUES (:key, :cap - 1, :now, 1)
+        ON CONFLICT(key) DO UPDATE SET
+            allowed = MIN(:cap, tokens + (:now - ts) * :rate) >= 1,
+            tokens = MIN(:cap, tokens + (:now - ts) * :rate)
+                     - (MIN(:cap, tokens + (:now - ts) * :rate) >= 1),
+            ts = :now
+        RETURNING allowed, tokens
+    """
+
+    def __init__(self):
+        local_store.register_schema(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            " key TEXT PRIMARY KEY, tokens REAL NOT NULL, ts REAL NOT NULL, allowed INTEGER NOT NULL)"
+        )
+
+    def take(self, key, capacity, refill_rate, now=None):
+        now = time.time() if now is None else now
+        allowed, tokens = local_store.connect().execute(
+            self.SQL, {"key": key, "cap": capacity, "now": now, "rate": refill_rate}
+        ).fetchone()
+        return bool(allowed), tokens
+
+
+class PostgresStore:
+    def take(self, key, capacity, refill_rate, now=None):
+        from db import get_conn
+        from queries import run
+
+        now = time.time() if now is None else now
+        params = {"key": key, "cap": float(capacity), "now": now, "rate": refill_rate}
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                allowed, tokens = run(cur, "rate_limit_take", params).fetchone()
+        return allowed, tokens
+
+
+STORES = {"memory": MemoryStore, "sqlite": SQLiteStore, "postgres": PostgresStore}
+
+
+def make_store(name=RATE_LIMIT_STORE):
+    if name not in STORES:
+        raise RuntimeError(f"Unknown RATE_LIMIT_STORE {name!r}; use one of {', '.join(STORES)}")
+    return STORES[name]()
+
+
+# ---------------- FLASK INTEGRATION ----------------
+def client_key():
+    """JWT identity when the request has a valid token, otherwise the IP."""
+    from flask import request
+    from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+    from flask_jwt_extended.exceptions import JWTExtendedException
+    from jwt.exceptions import PyJWTError
+
+    if request.headers.get("Authorization"):
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+            if identity is not None:
+                return f"user:{identity}"
+        except (JWTExtendedException, PyJWTError):
+            pass
+    # The client's own address once ProxyFix (TRUSTED_PROXIES) has read X-Forwarded-For
+    return f"ip:{request.remote_addr}"
+
+
+def init_app(app, store=None):
+    from flask import g, request
+
+    app.config.setdefault("RATE_LIMITS", dict(DEFAULT_RATE_LIMITS))
+    app.config.setdefault("RATE_LIMIT_ENABLED", RATE_LIMIT_ENABLED)
+    app.config.setdefault("RATE_LIMIT_STORE", RATE_LIMIT_STORE)
+    store = store or make_store(app.config["RATE_LIMIT_STORE"])
+    parsed = {}
+
+    def limit_for(endpoint):
+        rate = app.config["RATE_LIMITS"].get(endpoint)
+        if rate is None:
+            return None
+        if rate not in parsed:
+            parsed[rate] = parse_rate(rate)
+        return parsed[rate]
+
+    @app.before_request
+    def _rate_limit():
+        if not app.config["RATE_LIMIT_ENABLED"]:
+            return None
+        limit = limit_for(request.endpoint)
+        if limit is None:
+            return None
+
+        capacity, refill_rate = limit
+        allowed, tokens = store.take(f"{request.endpoint}:{client_key()}", capacity, refill_rate)
+        if allowed:
+            g.rate_limit_remaining = int(tokens)
+            return None
+
+        raise TooManyRequests(retry_after=retry_after(tokens, refill_rate))
+
+    @app.after_request
+    def _rate_limit_headers(response):
+        remaining = g.pop("rate_limit_remaining", None)
+        if remaining is not None:
+            response.headers["X-RateLimit-Remaining"] = str(remaining)
+        return response
+
+    return store
@@ -0,0 +1,191 @@
+"""In-memory catalog index for workout recommendations.
+
+Built once from public_workouts (on first use per worker) and held as compact
+numpy arrays:
+
+- required equipment as packed bitsets (n x ceil(E/64) uint64), so "can the
+  user do this with what they own" is one vectorized AND over the catalog;
+- inverted postings (muscle -> item positions), so a user's muscle
+  preferences add their weight only to the items that match;
+- type and level ids as small int arrays, plus a precomputed base score per
+  user level.
+
+Ranking the full catalog is a handful of array passes, with no Python loop
+over items.
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+LEVELS = {"beginner": 0, "intermediate": 1, "advanced": 2}
+# Catalog entries listing these need no equipment at all
+FREE_EQUIPMENT = {"", "none", "bodyweight", "body weight", "no equipment"}
+
+CATALOG_INDEX_TTL = float(os.getenv("CATALOG_INDEX_TTL", "0"))  # 0 = build once
+
+MUSCLE_WEIGHT = 1.0
+TYPE_WEIGHT = 0.5
+LEVEL_WEIGHT = 0.75
+EQUIPMENT_USE_WEIGHT = 0.1
+
+
+def _key(value):
+    return (value or "").strip().lower()
+
+
+class CatalogIndex:
+    def __init__(self, ids, equipment, muscles, types, levels):
+        n = len(ids)
+        order = np.argsort(np.asarray(ids, dtype=np.int64), kind="stable")
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.size = n
+
+        equipment = [equipment[i] for i in order]
+        muscles = [muscles[i] for i in order]
+        types = [types[i] for i in order]
+        levels = [levels[i] for i in order]
+
+        # ---- equipment bitsets ----
+        self.equipment_vocab = {}
+        positions, bits = [], []
+        for pos, items in enumerate(equipment):
+            for k in {_key(e) for e in (items or [])} - FREE_EQUIPMENT:
+                positions.append(pos)
+                bits.append(self.equipment_vocab.setdefault(k, len(self.equipment_vocab)))
+        positions = np.asarray(positions, dtype=np.int64)
+        bits = np.asarray(bits, dtype=np.int64)
+        self.words = max(1, -(-len(self.equipment_vocab) // 64))
+        self.equipment_bits = np.zeros((n, self.words), dtype=np.uint64)
+        np.bitwise_or.at(
+            self.equipment_bits,
+            (positions, bits // 64),
+            np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64)),
+        )
+        self.equipment_count = np.bincount(positions, minlength=n).astype(np.int8)
+
+        # ---- inverted postings ----
+        self.muscle_postings = self._postings(muscles)
+
+        self.type_vocab = {}
+        self.type_ids = np.array(
+            [self.type_vocab.setdefault(_key(t), len(self.type_vocab)) for t in types], dtype=np.int16
+        )
+        self.level_ids = np.array([LEVELS.get(_key(lv), -1) for lv in levels], dtype=np.int8)
+
+        # Score parts that only depend on the user's level, one array per level
+        equipment_use = (EQUIPMENT_USE_WEIGHT * self.equipment_count).astype(np.float32)
+        self.base_scores = {None: equipment_use}
+        for level in LEVELS.values():
+            distance = np.abs(self.level_ids.astype(np.int16) - level)
+            fit = np.where(self.level_ids >= 0, 1.0 - distance / 2.0, 0.0)
+            self.base_scores[level] = equipment_use + (LEVEL_WEIGHT * fit).astype(np.float32)
+
+    @staticmethod
+    def _postings(values_per_item):
+        postings = {}
+        for pos, values in enumerate(values_per_item):
+            for v in {_key(v) for v in (values or [])}:
+                if v:
+                    postings.setdefault(v, []).append(pos)
+        return {k: np.asarray(v, dtype=np.int32) for k, v in postings.items()}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: (id, equipment[], muscles[], type, level)"""
+        ids, equipment, muscles, types, levels = [], [], [], [], []
+        for r in rows:
+            ids.append(r[0])
+            equipment.append(r[1])
+            muscles.append(r[2])
+            types.append(r[3])
+            levels.append(r[4])
+        return cls(ids, equipment, muscles, types, levels)
+
+    def _available_bits(self, available_equipment):
+        bits = np.zeros(self.words, dtype=np.uint64)
+        for e in available_equipment or []:
+            b = self.equipment_vocab.get(_key(e))
+            if b is not None:
+                bits[b // 64] |= np.uint64(1 << (b % 64))
+        return bits
+
+    def score(self, available_equipment, saved=(), level=None):
+        """Score every catalog item; -inf marks items the user cannot do
+        (missing equipment) or has already saved.
+
+        saved: (public_workout_id, muscles[], type, level) of the user's
+        saved workouts, used as the preference profile.
+        """
+        # Level: explicit, else the most common level among saved workouts
+        if level is None:
+            saved_levels = Counter(LEVELS[_key(s[3])] for s in saved if _key(s[3]) in LEVELS)
+            level = saved_levels.most_common(1)[0][0] if saved_levels else None
+        elif not isinstance(level, int):
+            level = LEVELS.get(_key(level))
+        scores = self.base_scores[level].copy()
+
+        # Preferences from saved workouts, normalised to frequencies
+        total_saved = max(1, len(saved))
+        muscle_freq = Counter(_key(m) for s in saved for m in (s[1] or []))
+        for muscle, count in muscle_freq.items():
+            postings = self.muscle_postings.get(muscle)
+            if postings is not None:
+                scores[postings] += MUSCLE_WEIGHT * count / total_saved
+        type_freq = Counter(_key(s[2]) for s in saved if s[2])
+        if type_freq:
+            type_weights = np.zeros(len(self.type_vocab), dtype=np.float32)
+            for type_, count in type_freq.items():
+                if type_ in self.type_vocab:
+                    type_weights[self.type_vocab[type_]] = TYPE_WEIGHT * count / total_saved
+            scores += type_weights[self.type_ids]
+
+        # Equipment: everything required must be available
+        missing = self.equipment_bits & ~self._available_bits(available_equipment)
+        infeasible = missing[:, 0] != 0 if self.words == 1 else missing.any(axis=1)
+        scores[infeasible] = -np.inf
+        saved_ids = np.asarray([s[0] for s in saved if s[0] is not None], dtype=np.int64)
+        if saved_ids.size:
+            pos = np.searchsorted(self.ids, saved_ids)
+            pos = pos[(pos < self.size) & (self.ids[np.minimum(pos, self.size - 1)] == saved_ids)]
+            scores[pos] = -np.inf
+        return scores
+
+    def recommend(self, available_equipment, saved=(), level=None, limit=20):
+        """Top `limit` (catalog id, score) pairs, best first."""
+        if self.size == 0:
+            return []
+        scores = self.score(available_equipment, saved, level)
+        limit = min(limit, self.size)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+# ---------------- PROCESS-WIDE INDEX ----------------
+_index = None
+_built_at = 0.0
+_lock = threading.Lock()
+
+
+def load_catalog_index():
+    from db import get_conn
+    from queries import run
+
+    with get_conn(readonly=True) as conn:
+        with conn.cursor() as cur:
+            run(cur, "catalog_index_rows")
+            return CatalogIndex.from_rows(cur.fetchall())
+
+
+def get_catalog_index():
+    global _index, _built_at
+    stale = CATALOG_INDEX_TTL and time.monotonic() - _built_at > CATALOG_INDEX_TTL
+    if _index is None or stale:
+        with _lock:
+            if _index is None or (CATALOG_INDEX_TTL and time.monotonic() - _built_at > CATALOG_INDEX_TTL):
+                _index = load_catalog_index()
+                _built_at = time.monotonic()
+    return _index
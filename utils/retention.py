@@ -0,0 +1,69 @@
+"""Retention: move cold rows out of the hot, partitioned tables.
+
+The retention.archive job (run by ``python -m scripts.worker``) moves the
+checklists of finished workouts (every item done, the last more than
+CHECKLIST_ARCHIVE_DAYS ago) into checklist_items_archive, and reminders
+whose expires_at passed more than REMINDER_ARCHIVE_DAYS ago into
+reminders_archive (migrations/009). A checklist with anything left to do is
+never touched. Each batch (RETENTION_BATCH reminders or workouts) is one
+short transaction (delete + insert in one statement), so a backlog never
+holds many row locks or produces one huge transaction for vacuum and
+replicas to digest; the library cache of every user whose checklist moved
+is invalidated once it commits. RETENTION_MAX_BATCHES caps one run; the
+rest waits for the next. A setting of 0 days turns that table's archiving
+off.
+"""
+import logging
+import os
+
+from db import unit_of_work
+from queries import run
+from utils import user_cache
+from utils.jobs import job
+
+logger = logging.getLogger("retention")
+
+CHECKLIST_ARCHIVE_DAYS = int(os.getenv("CHECKLIST_ARCHIVE_DAYS", "90"))
+REMINDER_ARCHIVE_DAYS = int(os.getenv("REMINDER_ARCHIVE_DAYS", "7"))
+RETENTION_BATCH = int(os.getenv("RETENTION_BATCH", "1000"))
+RETENTION_MAX_BATCHES = int(os.getenv("RETENTION_MAX_BATCHES", "100"))
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+
+# (archive query, age in days, cache holding the rows or None) per table
+ARCHIVES = (
+    ("checklist_archive_batch", CHECKLIST_ARCHIVE_DAYS, user_cache.library),
+    ("reminders_archive_batch", REMINDER_ARCHIVE_DAYS, None),
+)
+
+
+def archive_batch(name, days, limit=RETENTION_BATCH, cache=None):
+    """Move one batch older than `days`; returns how many rows moved."""
+    with unit_of_work() as conn:
+        with conn.cursor() as cur:
+            run(cur, name, {"age": days * 86400, "limit": limit})
+            user_ids = {r[0] for r in cur.fetchall()}
+            moved = cur.rowcount
+
+    if cache is not None:
+        for user_id in user_ids:
+            cache.invalidate(user_id)
+    return moved
+
+
+def archive(name, days, limit=RETENTION_BATCH, max_batches=RETENTION_MAX_BATCHES, cache=None):
+    moved = 0
+    for _ in range(max_batches):
+        count = archive_batch(name, days, limit, cache)
+        moved += count
+        if count < limit:
+            break
+    return moved
+
+
+@job("retention.archive", concurrency=1, every=RETENTION_INTERVAL_SECONDS)
+def archive_all(payload):
+    for name, days, cache in ARCHIVES:
+        if days > 0:
+            moved = archive(name, days, cache=cache)
+            if moved:
+                logger.info("%s: archived %d rows", name, moved)
@@ -0,0 +1,99 @@
+"""Disk staging for resumable chunked uploads (routes/uploads.py).
+
+Each upload is one file under UPLOAD_DIR that chunks are appended to; its
+size is the resume offset, so a chunk cut off mid-way keeps the bytes that
+arrived and the client continues from there. Chunks are copied from the
+request stream in UPLOAD_BUFFER_BYTES pieces, so memory per request stays
+bounded however large the chunk. All app hosts must share UPLOAD_DIR (and
+the worker running uploads.purge must see it too).
+"""
+import fcntl
+import os
+import tempfile
+
+from werkzeug.exceptions import ClientDisconnected
+
+from db import get_conn
+from queries import run
+from utils.jobs import job
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "backend-uploads"))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(5 * 1024 * 1024)))
+UPLOAD_BUFFER_BYTES = int(os.getenv("UPLOAD_BUFFER_BYTES", str(64 * 1024)))
+UPLOAD_TTL_SECONDS = int(os.getenv("UPLOAD_TTL_SECONDS", "86400"))
+UPLOAD_PURGE_SECONDS = int(os.getenv("UPLOAD_PURGE_SECONDS", "3600"))
+
+
+class OffsetMismatch(Exception):
+    """The chunk doesn't start where the staged data ends."""
+
+    def __init__(self, offset):
+        super().__init__(f"upload is at offset {offset}")
+        self.offset = offset
+
+
+class UploadBusy(Exception):
+    """Another request is writing to this upload."""
+
+
+def staging_path(upload_id):
+    return os.path.join(UPLOAD_DIR, upload_id)
+
+
+def create_staging(upload_id):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    open(staging_path(upload_id), "xb").close()
+
+
+def received(upload_id):
+    """Bytes staged so far, or None when the staging file is gone."""
+    try:
+        return os.path.getsize(staging_path(upload_id))
+    except FileNotFoundError:
+        return None
+
+
+def append_chunk(upload_id, offset, stream, length):
+    """Append `length` bytes from `stream` at `offset`; returns the new offset.
+
+    Raises FileNotFoundError, OffsetMismatch or UploadBusy.
+    """
+    with open(staging_path(upload_id), "r+b") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy(upload_id) from None
+        end = f.seek(0, os.SEEK_END)
+        if end != offset:
+            raise OffsetMismatch(end)
+        remaining = length
+        try:
+            while remaining:
+                data = stream.read(min(UPLOAD_BUFFER_BYTES, remaining))
+                if not data:
+                    break
+                f.write(data)
+                remaining -= len(data)
+        except ClientDisconnected:
+            # The body ended before Content-Length: keep what arrived, the
+            # client asks for the offset and resumes from there
+            pass
+        return f.tell()
+
+
+def remove_staging(upload_id):
+    try:
+        os.remove(staging_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+@job("uploads.purge", concurrency=1, every=UPLOAD_PURGE_SECONDS)
+def purge_expired(payload):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            run(cur, "upload_purge")
+            expired = [row[0] for row in cur.fetchall()]
+    for upload_id in expired:
+        remove_staging(upload_id)
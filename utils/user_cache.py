@@ -0,0 +1,170 @@
+"""Per-user caches of serialized JSON responses.
+
+Each UserCache (``library`` for /users/workouts, ``gestures`` for
+/users/gestures) has two tiers, both keyed by (user_id, version, variant):
+
+- a bounded in-process LRU (USER_CACHE_SIZE entries), no I/O on a hit;
+- the user_cache table in utils.local_store, shared by every worker on this
+  host, so a response built by one worker serves the others.
+
+The per-user version lives in Postgres (user_cache_versions, migrations/013)
+and is bumped by invalidate() after every write that changes the cached data
+has committed, whichever host or process made it (the retention job runs in
+the worker). Readers look the version up on the primary *before* building,
+so a response built from data older than a write is always filed under the
+old version and never served again: no TTL is needed for correctness
+(USER_CACHE_TTL only bounds memory and disk, and how long a change to shared
+data such as default_gestures takes to show). Bodies stay per host; a hit
+costs one indexed primary lookup instead of the full build.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from db import get_conn
+from queries import run
+from utils import local_store
+
+
+def _setting(name, default):
+    # LIBRARY_CACHE_* are the names from before the cache covered gestures;
+    # still honoured when the USER_CACHE_* one isn't set
+    return os.getenv(f"USER_CACHE_{name}", os.getenv(f"LIBRARY_CACHE_{name}", default))
+
+
+USER_CACHE_ENABLED = _setting("ENABLED", "1") != "0"
+USER_CACHE_SIZE = int(_setting("SIZE", "1024"))
+USER_CACHE_TTL = float(_setting("TTL", "600"))
+# Expired shared entries are swept every this many puts per process
+USER_CACHE_PRUNE_EVERY = int(_setting("PRUNE_EVERY", "500"))
+
+local_store.register_schema(
+    "CREATE TABLE IF NOT EXISTS user_cache ("
+    " cache TEXT NOT NULL, user_id INTEGER NOT NULL, version INTEGER NOT NULL, variant TEXT NOT NULL,"
+    " body BLOB NOT NULL, stored REAL NOT NULL, PRIMARY KEY (cache, user_id, version, variant))"
+)
+
+
+class LRU:
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            body, stored = item
+            if now - stored > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return body
+
+    def put(self, key, body, stored):
+        with self._lock:
+            self._items[key] = (body, stored)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [k for k in self._items if k[0] == user_id]:
+                del self._items[key]
+
+
+class UserCache:
+    def __init__(self, name, size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL, enabled=USER_CACHE_ENABLED):
+        self.name = name
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lru = LRU(size, ttl)
+        self._puts = 0
+
+    def current_version(self, user_id):
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                run(cur, "user_cache_version", (self.name, user_id))
+                row = cur.fetchone()
+        return row[0] if row else 0
+
+    def get(self, user_id, version, variant):
+        """Cached body for this version, or None."""
+        key = (user_id, version, variant)
+        now = time.time()
+        body = self._lru.get(key, now)
+        if body is not None:
+            return body
+        row = local_store.connect().execute(
+            "SELECT body, stored FROM user_cache"
+            " WHERE cache = ? AND user_id = ? AND version = ? AND variant = ?",
+            (self.name, *key),
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl:
+            return None
+        self._lru.put(key, row[0], row[1])
+        return row[0]
+
+    def put(self, user_id, version, variant, body):
+        now = time.time()
+        self._lru.put((user_id, version, variant), body, now)
+        conn = local_store.connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO user_cache (cache, user_id, version, variant, body, stored)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (self.name, user_id, version, variant, body, now),
+        )
+        self._puts += 1
+        if self._puts % USER_CACHE_PRUNE_EVERY == 0:
+            conn.execute(
+                "DELETE FROM user_cache WHERE cache = ? AND stored < ?", (self.name, now - self.ttl)
+            )
+
+    def invalidate(self, user_id):
+        """Call after a write to the cached data has committed."""
+        if not self.enabled or user_id is None:
+            return
+        user_id = int(user_id)
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                run(cur, "user_cache_bump", (self.name, user_id))
+        # Unreachable now that the version moved; drop this host's copies
+        # instead of waiting for the TTL (other hosts' age out)
+        local_store.connect().execute(
+            "DELETE FROM user_cache WHERE cache = ? AND user_id = ?", (self.name, user_id)
+        )
+        self._lru.discard_user(user_id)
+
+    def respond(self, user_id, variant, build):
+        """JSON response for build(), served from the cache when current.
+
+        build() must read from the primary: a lagging replica could file old
+        rows under the new version.
+        """
+        from flask import current_app, jsonify
+
+        if not self.enabled:
+            return jsonify(build())
+
+        # Version first: a write committing after this point bumps it, so
+        # whatever build() reads can only be filed under the stale version
+        version = self.current_version(user_id)
+        body = self.get(user_id, version, variant)
+        if body is not None:
+            response = current_app.response_class(body, mimetype="application/json")
+            response.headers["X-Cache"] = "hit"
+            return response
+
+        response = jsonify(build())
+        self.put(user_id, version, variant, response.get_data())
+        response.headers["X-Cache"] = "miss"
+        return response
+
+
+library = UserCache("library")
+gestures = UserCache("gestures")